@@ -1,5 +1,6 @@
 from fastapi import APIRouter
-from app.api.routers import chat
+from app.api.routers import chat, status
 
 api_router = APIRouter()
 api_router.include_router(chat.router, tags=["chat"])
+api_router.include_router(status.router, tags=["status"])
@@ -3,18 +3,27 @@ from pydantic import BaseModel
 from typing import List
 from app.models.chat import ChatRequest, ChatResponse
 from app.services.groq_service import groq_service
-from app.services.file_processor import file_processor
+from app.services.ingestion import ingestion
+from app.api.sse import sse_response
 
 router = APIRouter()
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     try:
-        response_content = await groq_service.get_chat_response(
-            messages=[msg.dict() for msg in request.messages],
-            model=request.model
+        messages = [msg.dict() for msg in request.messages]
+        if request.stream:
+            meta = {}
+            return await sse_response(groq_service.stream_chat_response(messages, model=request.model, meta=meta), meta)
+
+        response_content, meta = await groq_service.get_chat_completion(
+            messages=messages,
+            model=request.model,
+            hedge="chat"
         )
-        return ChatResponse(response=response_content)
+        return ChatResponse(response=response_content, meta=meta)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -26,7 +35,7 @@ async def upload_assignment(file: UploadFile = File(...)):
     """
     try:
         # Extract text from the uploaded file
-        extracted_text = await file_processor.process_file(file)
+        extracted_text = await ingestion.extract_text(await ingestion.from_uploads([file]), headers=False)
         
         if not extracted_text:
             raise HTTPException(status_code=400, detail="Could not extract text from file")
@@ -62,7 +71,7 @@ Provide clear, well-formatted answers."""
         
         # Get AI response
         messages = [{"role": "user", "content": prompt}]
-        answer = await groq_service.get_chat_response(messages)
+        answer = await groq_service.get_chat_response(messages, hedge="upload-assignment")
         
         return {
             "success": True,
@@ -71,5 +80,7 @@ Provide clear, well-formatted answers."""
             "answer": answer
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
@@ -0,0 +1,60 @@
+from fastapi import APIRouter
+from app.services.groq_service import groq_service
+from app.services.circuit_breaker import model_health, OPEN
+from app.services.worker_pool import worker_pool
+from app.services.hedging import hedger
+from app.services.rate_limiter import rate_limiter
+from app.services.single_flight import single_flight
+from app.services.batch import batch_manager
+from app.services.jobs import job_runner
+from app.services.profiling import profiler
+
+router = APIRouter()
+
+@router.get("/status/models")
+async def model_status():
+    """
+    Circuit breaker state per model: closed (healthy), open (skipped until
+    `retry_in` elapses) or half_open (one probe request allowed), with the
+    rolling error rate and latency the decision is based on.
+    """
+    models = list(dict.fromkeys(groq_service.fallback_models + list(model_health.breakers)))
+    breakers = {model: model_health.breaker(model).snapshot() for model in models}
+    open_count = sum(1 for b in breakers.values() if b["state"] == OPEN)
+    if open_count == len(breakers):
+        status = "unavailable"
+    elif open_count:
+        status = "degraded"
+    else:
+        status = "ok"
+    return {"status": status, "models": breakers, "worker_pool": worker_pool.stats()}
+
+@router.get("/status/hedging")
+async def hedging_status():
+    """Per-endpoint hedged-request counters: how often a backup model was raced and how often it won."""
+    return hedger.stats()
+
+@router.get("/status/rate-limits")
+async def rate_limit_status():
+    """Remaining per-model Groq quota in this worker, queue depth and admitted/queued/shed counters."""
+    return rate_limiter.stats()
+
+@router.get("/status/single-flight")
+async def single_flight_status():
+    """How many LLM calls went upstream vs. joined an identical call already in flight."""
+    return single_flight.stats()
+
+@router.get("/status/batches")
+async def batch_status():
+    """Batches running in this worker and how many of their items are still pending."""
+    return batch_manager.stats()
+
+@router.get("/status/jobs")
+async def job_status():
+    """Background job counts by state and the job workers running in this process."""
+    return await job_runner.stats()
+
+@router.get("/status/profiling")
+async def profiling_status():
+    """Request profiling settings and how many profiles were taken and written in this worker."""
+    return profiler.stats()
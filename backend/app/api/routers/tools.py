@@ -1,227 +1,474 @@
-from fastapi import APIRouter, HTTPException, Body
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Body, Response, UploadFile, File, Form
+from pydantic import BaseModel, Field, ValidationError
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
 from app.services.groq_service import groq_service
-from app.core.prompts import QUIZ_GENERATION_PROMPT, FLASHCARD_GENERATION_PROMPT, SUMMARIZATION_PROMPT
+from app.services.ingestion import ingestion
+from app.services.cache import response_cache, artifact_cache
+from app.services.file_store import file_store
+from app.services.image_encoder import mime_type
+from app.services.map_reduce import map_reduce_service
+from app.services.token_budget import token_budget
+from app.services.json_extract import extract_json, extract_json_array, JsonItemStream
+from app.services.structured_output import structured_output
+from app.models.generation import QuizQuestion, Flashcard
+from app.services.batch import batch_manager
+from app.services.jobs import job_runner, public_view, FINISHED as JOB_FINISHED
+from app.core.config import settings
+from app.core.prompts import (QUIZ_GENERATION_PROMPT, FLASHCARD_GENERATION_PROMPT, SUMMARIZATION_PROMPT,
+                              ASSIGNMENT_SOLVER_PROMPT, LAB_SOLVER_PROMPT, STUDY_HELPER_PROMPT)
+from app.api.sse import sse_response, sse_event, SSE_HEADERS
+import asyncio
+import base64
 import json
-import re
 
 router = APIRouter()
 
+VISION_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"  # Llama 4 Vision model
+TEXT_MODEL = "llama-3.3-70b-versatile"
+FILES_PLACEHOLDER = "[SEE ATTACHED IMAGES/DOCUMENTS]"
+MAX_VISION_IMAGES = 5
+
 # --- Request Models ---
 class GenerateQuizRequest(BaseModel):
     content: Optional[str] = None
     files_data: List[str] = [] # list of base64 strings
     file_types: List[str] = [] # list of mime types
+    file_ids: List[str] = [] # files stored earlier via POST /tools/files
     num_questions: int = 5
     difficulty: str = "medium"
     question_type: str = "mixed"
     quiz_focus: str = "comprehensive"
+    no_cache: bool = False # Skip the response cache for this request
+    stream: bool = False # Send each question as an SSE `question` event as soon as it is generated
 
 class GenerateFlashcardsRequest(BaseModel):
     content: Optional[str] = None
     files_data: List[str] = []
     file_types: List[str] = []
+    file_ids: List[str] = []
     num_cards: int = 10
     card_style: str = "standard"
     focus_area: str = "all"
+    no_cache: bool = False # Skip the response cache for this request
+    stream: bool = False # Send each card as an SSE `card` event as soon as it is generated
 
 class SummarizeRequest(BaseModel):
     content: Optional[str] = None
     files_data: List[str] = []
     file_types: List[str] = []
+    file_ids: List[str] = []
     mode: str = "standard"
     summary_format: str = "bullet_points"
     focus_area: str = "general"
+    no_cache: bool = False # Skip the response cache for this request
+    map_reduce: Optional[bool] = None # Chunk long content; None = only when it exceeds the prompt budget
 
 # --- Helper to parse JSON from AI response ---
-def parse_json_response(response_text: str):
-    # Try to find JSON block if wrapped in markdown
-    match = re.search(r'```json\n(.*?)\n```', response_text, re.DOTALL)
-    if match:
-        json_str = match.group(1)
-    else:
-        # Sometimes AI just returns the JSON
-        json_str = response_text
-    
+def parse_json_response(response_text: str, expect_list: bool = False):
+    """
+    Parse the JSON in an AI response, tolerating prose, markdown fences and common
+    defects (trailing commas, raw newlines, truncated output). With `expect_list`,
+    an array wrapped in an object (e.g. {"questions": [...]}) is unwrapped.
+    """
     try:
-        return json.loads(json_str)
-    except json.JSONDecodeError:
-        # Fallback: try to clean up the string if needed or just raise
+        return extract_json_array(response_text) if expect_list else extract_json(response_text)
+    except ValueError:
+        raise HTTPException(status_code=500, detail="Failed to parse AI response as JSON")
+
+async def stream_json_items(tokens, cache_key: str, messages: list, model: str, schema: type, wanted: int,
+                            label: str, meta: dict, hedge: str = None):
+    """
+    Yield each valid array element (quiz question, flashcard) of a streamed AI
+    response as soon as it is complete, then ask only for any missing or invalid
+    ones. The validated list is cached once it is complete.
+    """
+    parser = JsonItemStream()
+    parts, accepted, problems = [], [], []
+    async for token in tokens:
+        parts.append(token)
+        streamed = parser.feed(token)
+        items, item_problems = structured_output.validate(streamed, schema, accepted, parser.emitted - len(streamed) + 1)
+        problems += item_problems
+        for item in items[:wanted - len(accepted)]:
+            accepted.append(item)
+            yield item
+    if not parser.emitted:
+        # Not an array we could follow while streaming; it may still parse as a whole
+        try:
+            items, problems = structured_output.validate(extract_json_array("".join(parts)), schema)
+        except ValueError:
+            items, problems = [], ["- the reply was not a JSON array"]
+        for item in items[:wanted]:
+            accepted.append(item)
+            yield item
+    meta.update(invalid_items=len(problems), reasked_items=max(0, wanted - len(accepted)))
+    async for item in structured_output.reask(messages, model, accepted, problems, schema, wanted, label, hedge):
+        accepted.append(item)
+        yield item
+    if not accepted:
         raise HTTPException(status_code=500, detail="Failed to parse AI response as JSON")
+    if len(accepted) == wanted:
+        await response_cache.set(cache_key, json.dumps(accepted))
+
+async def iterate(items: list):
+    for item in items:
+        yield item
+
+def without_streaming(request: BaseModel) -> BaseModel:
+    """Copy of a tool request with `stream` off, for callers that need the JSON body (batches, jobs)."""
+    return request.model_copy(update={"stream": False}) if "stream" in type(request).model_fields else request
+
+# --- Helpers for file-backed generations ---
+async def request_files(request) -> list:
+    """All files of a JSON request: inline base64 `files_data` plus stored `file_ids`."""
+    return await ingestion.from_request(request)
+
+async def parse_upload(model, payload: str, files: List[UploadFile]) -> tuple:
+    """
+    Validate the JSON `payload` form field of a multipart request against a request model.
+    Returns (request, files) where files covers both the uploaded parts and any file_ids.
+    """
+    try:
+        request = model.model_validate_json(payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    return request, await ingestion.from_uploads(files) + await ingestion.from_file_ids(request.file_ids)
+
+async def build_messages(format_prompt, content: Optional[str], files: list, instruction: str = "", condense=None) -> tuple:
+    """
+    Build the chat messages and pick the model for a generation. Returns (messages, model).
+
+    Documents are routed text-first: pages with a usable text layer go to the
+    text model as text, and only scanned or image-heavy pages are rendered
+    for the vision model. `format_prompt(content)` fills the tool's prompt template;
+    `condense(text)`, if given, may shrink long text first (map-reduce).
+    """
+    images = []
+    if files:
+        routed = await ingestion.route(files, max_images=MAX_VISION_IMAGES)
+        print(f"DEBUG: Document routing: {routed['stats']}")
+        content, images = routed["text"], routed["images"]
+    if condense is not None and content:
+        content = await condense(content)
+
+    if not images:
+        return [{"role": "user", "content": format_prompt(content) + instruction}], TEXT_MODEL
+
+    document_content = f"{content}\n\n{FILES_PLACEHOLDER}" if content else FILES_PLACEHOLDER
+    vision_content = [{"type": "text", "text": format_prompt(document_content) + instruction}]
+    for img_b64 in images:
+        vision_content.append({
+            "type": "image_url",
+            "image_url": {"url": f"data:{mime_type(img_b64)};base64,{img_b64}"}
+        })
+    return [{"role": "user", "content": vision_content}], VISION_MODEL
+
+def condense_long_content(text: str):
+    """Map-reduce content that would not fit in one prompt into notes (a no-op for short content)."""
+    return map_reduce_service.condense(text, model=TEXT_MODEL)
+
+def with_meta(body: dict, meta: Optional[dict]) -> dict:
+    """Attach the generation metadata (token estimate, model, max_tokens) when a completion ran."""
+    if meta is not None:
+        body["meta"] = meta
+    return body
+
+def fit_to_context(format_prompt, content: str, model: str = TEXT_MODEL) -> str:
+    """Trim `content` so the formatted prompt leaves room for the answer in `model`'s context."""
+    template_tokens = token_budget.count_tokens(format_prompt(""))
+    return token_budget.trim(content, token_budget.prompt_budget(model) - template_tokens)
+
+async def join_answers(answers):
+    """Yield chunk answers in order, separated by blank lines."""
+    first = True
+    async for answer in answers:
+        yield answer if first else f"\n\n{answer}"
+        first = False
+
+async def cached_response(prompt: str, files: list, bypass: bool, response: Response, options: dict = None):
+    """
+    Look up a previous generation for the same prompt, files and sampling parameters.
+    Returns (cached text or None, cache key) and sets an X-Cache header.
+    `options` holds any request flags that change the output but not the prompt.
+    The lookup happens before any page routing or rendering, so hits skip that work too;
+    the model is implied by the files, which are routed deterministically.
+    """
+    model = "routed" if files else TEXT_MODEL
+    cache_key = response_cache.make_key(prompt, model, files, {**groq_service.generation_params, **(options or {})})
+    cached = await response_cache.get(cache_key, bypass=bypass)
+    response.headers["X-Cache"] = "BYPASS" if bypass else ("HIT" if cached is not None else "MISS")
+    return cached, cache_key
 
 # --- Endpoints ---
 
-@router.post("/generate-quiz")
-async def generate_quiz(request: GenerateQuizRequest):
+async def _generate_quiz(request: GenerateQuizRequest, files: list, response: Response):
     try:
-        messages = []
-        
-        # Handle Files (Vision) or Text
-        if request.files_data:
-            vision_content = []
-            
-            # Add text instruction first
-            prompt_text = QUIZ_GENERATION_PROMPT.format(
-                content="[SEE ATTACHED IMAGES/DOCUMENTS]", 
-                num_questions=request.num_questions,
-                difficulty=request.difficulty,
-                question_type=request.question_type,
-                quiz_focus=request.quiz_focus
-            )
-            # STRICT JSON ENFORCEMENT FOR VISION MODEL
-            prompt_text += "\n\nCRITICAL: You must return ONLY valid JSON. No Markdown. No Explanations. Just the JSON array."
-            
-            vision_content.append({"type": "text", "text": prompt_text})
-            
-            import base64
-            from app.services.file_processor import file_processor
-            
-            for idx, file_b64 in enumerate(request.files_data):
-                # Decode base64 to bytes
-                file_bytes = base64.b64decode(file_b64.split(',')[1] if ',' in file_b64 else file_b64)
-                file_type = request.file_types[idx]
-                
-                # Convert to vision-ready base64 images
-                vision_images = file_processor.process_file_to_base64_images(file_bytes, file_type)
-                
-                for img_b64 in vision_images:
-                    vision_content.append({
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{img_b64}"
-                        }
-                    })
-            
-            messages = [{"role": "user", "content": vision_content}]
-            model = "meta-llama/llama-4-scout-17b-16e-instruct"  # Llama 4 Vision model 
-
-        else:
-            # Text Only
-            prompt = QUIZ_GENERATION_PROMPT.format(
-                content=request.content,
-                num_questions=request.num_questions,
-                difficulty=request.difficulty,
-                question_type=request.question_type,
-                quiz_focus=request.quiz_focus
-            )
-            messages = [{"role": "user", "content": prompt}]
-            model = "llama-3.3-70b-versatile"
-
-        response_text = await groq_service.get_chat_response(messages, model=model)
+        # Handle Files (text layer or Vision) or Text
+        format_prompt = lambda content: QUIZ_GENERATION_PROMPT.format(
+            content=content,
+            num_questions=request.num_questions,
+            difficulty=request.difficulty,
+            question_type=request.question_type,
+            quiz_focus=request.quiz_focus
+        )
+        # STRICT JSON ENFORCEMENT FOR FILE-BASED GENERATIONS
+        instruction = "\n\nCRITICAL: You must return ONLY valid JSON. No Markdown. No Explanations. Just the JSON array." if files else ""
+
+        prompt = format_prompt(FILES_PLACEHOLDER if files else request.content) + instruction
+        cached_text, cache_key = await cached_response(prompt, files, request.no_cache, response)
+        if request.stream:
+            meta = {}
+            if cached_text is not None:
+                items = iterate(parse_json_response(cached_text, expect_list=True))
+            else:
+                messages, model = await build_messages(format_prompt, request.content, files, instruction, condense_long_content)
+                tokens = groq_service.stream_chat_response(messages, model=model, meta=meta)
+                items = stream_json_items(tokens, cache_key, messages, model, QuizQuestion, request.num_questions, "questions", meta, hedge="generate-quiz")
+            streamed = await sse_response(items, meta, event="question")
+            streamed.headers["X-Cache"] = response.headers["X-Cache"]
+            return streamed
+
+        if cached_text is not None:
+            return {"questions": parse_json_response(cached_text, expect_list=True)}
+        messages, model = await build_messages(format_prompt, request.content, files, instruction, condense_long_content)
+        response_text, meta = await groq_service.get_chat_completion(messages, model=model, hedge="generate-quiz")
         print(f"DEBUG: Quiz/Vision Response: {response_text[:200]}...") # Log response
-        quiz_data = parse_json_response(response_text)
+        # Invalid or missing items are re-requested on their own rather than regenerating everything
+        quiz_data, fixes = await structured_output.complete(
+            messages, model, response_text, QuizQuestion, request.num_questions, "questions", hedge="generate-quiz")
+        if not quiz_data:
+            raise HTTPException(status_code=500, detail="Failed to parse AI response as JSON")
+        if len(quiz_data) == request.num_questions:
+            await response_cache.set(cache_key, json.dumps(quiz_data)) # Only cache complete, validated output
         
-        return {"questions": quiz_data}
+        return with_meta({"questions": quiz_data}, {**meta, **fixes})
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR: Generate Quiz Failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/generate-flashcards")
-async def generate_flashcards(request: GenerateFlashcardsRequest):
+@router.post("/generate-quiz")
+async def generate_quiz(request: GenerateQuizRequest, response: Response):
+    return await _generate_quiz(request, await request_files(request), response)
+
+@router.post("/generate-quiz/upload")
+async def generate_quiz_upload(response: Response, payload: str = Form("{}"), files: List[UploadFile] = File(default=[])):
+    """Multipart variant: `payload` is the JSON request body (without files_data), files are streamed parts."""
+    return await _generate_quiz(*await parse_upload(GenerateQuizRequest, payload, files), response)
+
+async def _generate_flashcards(request: GenerateFlashcardsRequest, files: list, response: Response):
     try:
-        if request.files_data:
-            vision_content = []
-            prompt_text = FLASHCARD_GENERATION_PROMPT.format(
-                content="[SEE ATTACHED IMAGES/DOCUMENTS]",
-                num_cards=request.num_cards,
-                card_style=request.card_style,
-                focus_area=request.focus_area
-            )
-            prompt_text += "\n\nCRITICAL: You must return ONLY valid JSON. No Markdown. No Explanations. Just the JSON array."
-            vision_content.append({"type": "text", "text": prompt_text})
-            
-            import base64
-            from app.services.file_processor import file_processor
-            
-            for idx, file_b64 in enumerate(request.files_data):
-                file_bytes = base64.b64decode(file_b64.split(',')[1] if ',' in file_b64 else file_b64)
-                file_type = request.file_types[idx]
-                vision_images = file_processor.process_file_to_base64_images(file_bytes, file_type)
-                for img_b64 in vision_images:
-                    vision_content.append({
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"}
-                    })
-            
-            messages = [{"role": "user", "content": vision_content}]
-            model = "meta-llama/llama-4-scout-17b-16e-instruct"  # Llama 4 Vision model
-        else:
-            prompt = FLASHCARD_GENERATION_PROMPT.format(
-                content=request.content,
-                num_cards=request.num_cards,
-                card_style=request.card_style,
-                focus_area=request.focus_area
-            )
-            messages = [{"role": "user", "content": prompt}]
-            model = "llama-3.3-70b-versatile"
-        
-        response_text = await groq_service.get_chat_response(messages, model=model)
+        format_prompt = lambda content: FLASHCARD_GENERATION_PROMPT.format(
+            content=content,
+            num_cards=request.num_cards,
+            card_style=request.card_style,
+            focus_area=request.focus_area
+        )
+        instruction = "\n\nCRITICAL: You must return ONLY valid JSON. No Markdown. No Explanations. Just the JSON array." if files else ""
+
+        prompt = format_prompt(FILES_PLACEHOLDER if files else request.content) + instruction
+        cached_text, cache_key = await cached_response(prompt, files, request.no_cache, response)
+        if request.stream:
+            meta = {}
+            if cached_text is not None:
+                items = iterate(parse_json_response(cached_text, expect_list=True))
+            else:
+                messages, model = await build_messages(format_prompt, request.content, files, instruction, condense_long_content)
+                tokens = groq_service.stream_chat_response(messages, model=model, meta=meta)
+                items = stream_json_items(tokens, cache_key, messages, model, Flashcard, request.num_cards, "flashcards", meta, hedge="generate-flashcards")
+            streamed = await sse_response(items, meta, event="card")
+            streamed.headers["X-Cache"] = response.headers["X-Cache"]
+            return streamed
+
+        if cached_text is not None:
+            return {"flashcards": parse_json_response(cached_text, expect_list=True)}
+        messages, model = await build_messages(format_prompt, request.content, files, instruction, condense_long_content)
+        response_text, meta = await groq_service.get_chat_completion(messages, model=model, hedge="generate-flashcards")
         print(f"DEBUG: Flashcards Response: {response_text[:200]}...")
-        flashcards_data = parse_json_response(response_text)
+        # Invalid or missing items are re-requested on their own rather than regenerating everything
+        flashcards_data, fixes = await structured_output.complete(
+            messages, model, response_text, Flashcard, request.num_cards, "flashcards", hedge="generate-flashcards")
+        if not flashcards_data:
+            raise HTTPException(status_code=500, detail="Failed to parse AI response as JSON")
+        if len(flashcards_data) == request.num_cards:
+            await response_cache.set(cache_key, json.dumps(flashcards_data)) # Only cache complete, validated output
         
-        return {"flashcards": flashcards_data}
+        return with_meta({"flashcards": flashcards_data}, {**meta, **fixes})
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR: Generate Flashcards Failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/summarize")
-async def summarize_content(request: SummarizeRequest):
+@router.post("/generate-flashcards")
+async def generate_flashcards(request: GenerateFlashcardsRequest, response: Response):
+    return await _generate_flashcards(request, await request_files(request), response)
+
+@router.post("/generate-flashcards/upload")
+async def generate_flashcards_upload(response: Response, payload: str = Form("{}"), files: List[UploadFile] = File(default=[])):
+    """Multipart variant: `payload` is the JSON request body (without files_data), files are streamed parts."""
+    return await _generate_flashcards(*await parse_upload(GenerateFlashcardsRequest, payload, files), response)
+
+async def _summarize_content(request: SummarizeRequest, files: list, response: Response):
     try:
-        if request.files_data:
-            vision_content = []
-            prompt_text = SUMMARIZATION_PROMPT.format(
-                content="[SEE ATTACHED IMAGES/DOCUMENTS]",
-                summary_mode=request.mode,
-                summary_format=request.summary_format,
-                focus_area=request.focus_area
-            )
-            prompt_text += "\n\nCRITICAL: You must return ONLY the summary in the requested format."
-            vision_content.append({"type": "text", "text": prompt_text})
-            
-            import base64
-            from app.services.file_processor import file_processor
-            
-            for idx, file_b64 in enumerate(request.files_data):
-                file_bytes = base64.b64decode(file_b64.split(',')[1] if ',' in file_b64 else file_b64)
-                file_type = request.file_types[idx]
-                vision_images = file_processor.process_file_to_base64_images(file_bytes, file_type)
-                for img_b64 in vision_images:
-                    vision_content.append({
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"}
-                    })
-            
-            messages = [{"role": "user", "content": vision_content}]
-            model = "meta-llama/llama-4-scout-17b-16e-instruct"  # Llama 4 Vision model
-        else:
-            prompt = SUMMARIZATION_PROMPT.format(
-                content=request.content,
-                summary_mode=request.mode,
-                summary_format=request.summary_format,
-                focus_area=request.focus_area
-            )
-            messages = [{"role": "user", "content": prompt}]
-            model = "llama-3.3-70b-versatile"
-
-        response_text = await groq_service.get_chat_response(messages, model=model)
+        format_prompt = lambda content: SUMMARIZATION_PROMPT.format(
+            content=content,
+            summary_mode=request.mode,
+            summary_format=request.summary_format,
+            focus_area=request.focus_area
+        )
+        instruction = "\n\nCRITICAL: You must return ONLY the summary in the requested format." if files else ""
+
+        prompt = format_prompt(FILES_PLACEHOLDER if files else request.content) + instruction
+        # Long documents are condensed chunk by chunk (map) before the final summary (reduce)
+        condense = None
+        if request.map_reduce is not False:
+            condense = lambda text: map_reduce_service.condense(
+                text, model=TEXT_MODEL, focus_area=request.focus_area, force=bool(request.map_reduce))
+
+        response_text, cache_key = await cached_response(
+            prompt, files, request.no_cache, response, options={"map_reduce": request.map_reduce})
+        meta = None
+        if response_text is None:
+            messages, model = await build_messages(format_prompt, request.content, files, instruction, condense)
+            response_text, meta = await groq_service.get_chat_completion(messages, model=model, hedge="summarize")
+            await response_cache.set(cache_key, response_text)
         
-        return {"summary": response_text}
+        return with_meta({"summary": response_text}, meta)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-from app.core.prompts import ASSIGNMENT_SOLVER_PROMPT
+@router.post("/summarize")
+async def summarize_content(request: SummarizeRequest, response: Response):
+    return await _summarize_content(request, await request_files(request), response)
+
+@router.post("/summarize/upload")
+async def summarize_content_upload(response: Response, payload: str = Form("{}"), files: List[UploadFile] = File(default=[])):
+    """Multipart variant: `payload` is the JSON request body (without files_data), files are streamed parts."""
+    return await _summarize_content(*await parse_upload(SummarizeRequest, payload, files), response)
+
+# --- Batch generation ---
+
+class BatchTask(BaseModel):
+    tool: Literal["generate-quiz", "generate-flashcards", "summarize"]
+    params: dict = {} # fields of the tool's request body, e.g. {"num_questions": 10}
+
+class BatchRequest(BaseModel):
+    file_ids: List[str] = [] # one document per stored file
+    contents: List[str] = [] # one document per text
+    tasks: List[BatchTask]
+    concurrency: Optional[int] = Field(None, ge=1, le=settings.BATCH_CONCURRENCY) # completions in flight
+
+BATCH_TOOLS = {
+    "generate-quiz": (GenerateQuizRequest, _generate_quiz),
+    "generate-flashcards": (GenerateFlashcardsRequest, _generate_flashcards),
+    "summarize": (SummarizeRequest, _summarize_content),
+}
+
+async def prepare_batch_document(source: tuple) -> tuple:
+    """Load one batch document; stored files are routed up front so every task on them reuses the result."""
+    kind, value = source
+    if kind == "content":
+        return {"content": value}, []
+    files = await ingestion.from_file_ids([value])
+    await ingestion.route(files, max_images=MAX_VISION_IMAGES)
+    return {"file_ids": [value], "content": None}, files
+
+async def run_batch_task(tool: str, request: BaseModel, prepared: tuple) -> dict:
+    document, files = prepared
+    _, generate = BATCH_TOOLS[tool]
+    return await generate(without_streaming(request).model_copy(update=document), files, Response())
+
+@router.post("/batch")
+async def submit_batch(request: BatchRequest):
+    """
+    Run one or more tools over many documents in the background. Returns a
+    `batch_id` at once; follow progress with GET /tools/batch/{batch_id}
+    (poll, `since` skips results already seen) or its `/events` SSE stream.
+    Documents are prepared once and shared by all tasks, and generations run
+    concurrently up to the batch concurrency limit.
+    """
+    documents = [(file_id, ("file", file_id)) for file_id in request.file_ids]
+    documents += [(f"contents[{idx}]", ("content", text)) for idx, text in enumerate(request.contents)]
+    total = len(documents) * len(request.tasks)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="A batch needs at least one document and one task")
+    if total > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch has {total} items, the limit is {settings.BATCH_MAX_ITEMS}")
+
+    tasks = []
+    for task in request.tasks:
+        model, _ = BATCH_TOOLS[task.tool]
+        try:
+            tasks.append((task.tool, model.model_validate(task.params)))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+    batch = batch_manager.submit(documents, tasks, prepare_batch_document, run_batch_task, request.concurrency)
+    return batch.progress()
+
+@router.get("/batch/{batch_id}")
+async def get_batch(batch_id: str, since: int = 0):
+    """Progress counters plus the results finished so far (in completion order, from `since`)."""
+    return batch_manager.get(batch_id).snapshot(since)
+
+@router.get("/batch/{batch_id}/events")
+async def batch_events(batch_id: str):
+    """SSE stream: `event: result` per finished item (earlier ones replayed first), then `event: done`."""
+    batch = batch_manager.get(batch_id)
+
+    async def frames():
+        async for result in batch.follow():
+            yield sse_event({**result, "completed": len(batch.results), "total": len(batch.items)}, event="result")
+        yield sse_event(batch.progress(), event="done")
+
+    return StreamingResponse(frames(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.delete("/batch/{batch_id}")
+async def cancel_batch(batch_id: str):
+    return batch_manager.cancel(batch_id).progress()
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the response cache and the file artifact cache."""
+    return {**response_cache.stats(), "artifacts": artifact_cache.stats()}
+
+# --- Upload-once file handles ---
+
+@router.post("/files")
+async def upload_file(file: UploadFile = File(...)):
+    """
+    Store a document once and get a `file_id` back. Pass it in `file_ids` to any
+    tool endpoint instead of resending the bytes; text extraction and page
+    rendering results are cached per file, so repeat calls skip preprocessing.
+    """
+    return await file_store.put(file)
+
+@router.get("/files/{file_id}")
+async def get_file(file_id: str):
+    return await file_store.meta(file_id)
+
+@router.delete("/files/{file_id}")
+async def delete_file(file_id: str):
+    await file_store.delete(file_id)
+    return {"deleted": file_id}
 
 class SolveAssignmentRequest(BaseModel):
     questions: str
     files_data: List[str] = []
     file_types: List[str] = []
+    file_ids: List[str] = []
     subject: str = "General"
     marks: str = "5"
     style: str = "academic" # academic, simple, bullet_points
+    stream: bool = False # Stream tokens back as Server-Sent Events
+    map_reduce: Optional[bool] = None # Answer long inputs chunk by chunk; None = only when over the prompt budget
 
-@router.post("/solve-assignment")
-async def solve_assignment(request: SolveAssignmentRequest):
+async def _solve_assignment(request: SolveAssignmentRequest, files: list):
     try:
         # Generate specific instructions based on marks
         marks_instructions = ""
@@ -270,29 +517,30 @@ async def solve_assignment(request: SolveAssignmentRequest):
              marks_instructions += "\n\n**STYLE NOTE**: prioritize bullet points and structured lists over long paragraphs for easy reading."
 
         # Process Files if any
-        extracted_text = ""
-        if request.files_data:
-            import base64
-            from app.services.file_processor import file_processor
-            
-            for idx, file_b64 in enumerate(request.files_data):
-                try:
-                    file_bytes = base64.b64decode(file_b64.split(',')[1] if ',' in file_b64 else file_b64)
-                    file_type = request.file_types[idx]
-                    text = await file_processor.extract_text_from_bytes(file_bytes, file_type)
-                    extracted_text += f"\n\n--- FILE CONTENT ({file_type}) ---\n{text}\n"
-                except Exception as e:
-                    print(f"Error processing file for assignment: {e}")
+        extracted_text = await ingestion.extract_text(files)
 
         final_questions = request.questions + extracted_text
 
-        prompt = ASSIGNMENT_SOLVER_PROMPT.format(
+        format_prompt = lambda questions: ASSIGNMENT_SOLVER_PROMPT.format(
             subject=request.subject,
-            questions=final_questions,
+            questions=questions,
             marks=request.marks,
             style=request.style,
             marks_instructions=marks_instructions
         )
+
+        if request.map_reduce or (request.map_reduce is None and map_reduce_service.needs_map_reduce(final_questions)):
+            # Too long for one prompt: answer each chunk concurrently and join the answers in order
+            chunks = map_reduce_service.split(final_questions)
+            print(f"DEBUG: Solving assignment in {len(chunks)} chunks")
+            answers = map_reduce_service.map_chunks(
+                chunks, lambda idx, chunk: [{"role": "user", "content": format_prompt(chunk)}])
+            meta = {"chunks": len(chunks)}
+            if request.stream:
+                return await sse_response(join_answers(answers), meta)
+            return {"answer": "".join([part async for part in join_answers(answers)]), "meta": meta}
+
+        prompt = format_prompt(final_questions)
         
         # Use a model with larger context window if files are present? 
         # Llama 3 70b has 8k context, should be fine for text.
@@ -300,24 +548,38 @@ async def solve_assignment(request: SolveAssignmentRequest):
             {"role": "user", "content": prompt}
         ]
         
-        response_text = await groq_service.get_chat_response(messages)
+        if request.stream:
+            meta = {}
+            return await sse_response(groq_service.stream_chat_response(messages, meta=meta), meta)
+
+        response_text, meta = await groq_service.get_chat_completion(messages, hedge="solve-assignment")
         
-        return {"answer": response_text}
+        return {"answer": response_text, "meta": meta}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-from app.core.prompts import LAB_SOLVER_PROMPT
+@router.post("/solve-assignment")
+async def solve_assignment(request: SolveAssignmentRequest):
+    return await _solve_assignment(request, await request_files(request))
+
+@router.post("/solve-assignment/upload")
+async def solve_assignment_upload(payload: str = Form("{}"), files: List[UploadFile] = File(default=[])):
+    """Multipart variant: `payload` is the JSON request body (without files_data), files are streamed parts."""
+    return await _solve_assignment(*await parse_upload(SolveAssignmentRequest, payload, files))
 
 class SolveLabRequest(BaseModel):
     questions: str
     files_data: List[str] = []
     file_types: List[str] = []
+    file_ids: List[str] = []
     subject: str = "General"
     language: str = "Python"
     style: str = "detailed" # detailed, concise, code_only
+    stream: bool = False # Stream tokens back as Server-Sent Events
 
-@router.post("/solve-lab-questions")
-async def solve_lab_questions(request: SolveLabRequest):
+async def _solve_lab_questions(request: SolveLabRequest, files: list):
     try:
         style_instructions = ""
         if request.style == 'detailed':
@@ -340,54 +602,56 @@ async def solve_lab_questions(request: SolveLabRequest):
 """
 
         # Process Files if any
-        extracted_text = ""
-        if request.files_data:
-            import base64
-            from app.services.file_processor import file_processor
-            
-            for idx, file_b64 in enumerate(request.files_data):
-                try:
-                    file_bytes = base64.b64decode(file_b64.split(',')[1] if ',' in file_b64 else file_b64)
-                    file_type = request.file_types[idx]
-                    text = await file_processor.extract_text_from_bytes(file_bytes, file_type)
-                    extracted_text += f"\n\n--- FILE CONTENT ({file_type}) ---\n{text}\n"
-                except Exception as e:
-                    print(f"Error processing file for lab: {e}")
-
-        final_questions = request.questions + extracted_text
+        extracted_text = await ingestion.extract_text(files)
 
-        prompt = LAB_SOLVER_PROMPT.format(
+        format_prompt = lambda questions: LAB_SOLVER_PROMPT.format(
             subject=request.subject,
-            questions=final_questions,
+            questions=questions,
             language=request.language,
             language_lower=request.language.lower(),
             style=request.style,
             style_instructions=style_instructions
         )
+        # Trim oversized file content instead of sending a prompt no model can take
+        prompt = format_prompt(fit_to_context(format_prompt, request.questions + extracted_text))
 
         messages = [
             {"role": "user", "content": prompt}
         ]
 
-        response_text = await groq_service.get_chat_response(messages)
+        if request.stream:
+            meta = {}
+            return await sse_response(groq_service.stream_chat_response(messages, meta=meta), meta)
 
-        return {"answer": response_text}
+        response_text, meta = await groq_service.get_chat_completion(messages, hedge="solve-lab-questions")
+
+        return {"answer": response_text, "meta": meta}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-from app.core.prompts import STUDY_HELPER_PROMPT
+@router.post("/solve-lab-questions")
+async def solve_lab_questions(request: SolveLabRequest):
+    return await _solve_lab_questions(request, await request_files(request))
+
+@router.post("/solve-lab-questions/upload")
+async def solve_lab_questions_upload(payload: str = Form("{}"), files: List[UploadFile] = File(default=[])):
+    """Multipart variant: `payload` is the JSON request body (without files_data), files are streamed parts."""
+    return await _solve_lab_questions(*await parse_upload(SolveLabRequest, payload, files))
 
 class SolveStudyRequest(BaseModel):
     questions: str
     files_data: List[str] = []
     file_types: List[str] = []
+    file_ids: List[str] = []
     subject: str = "General"
     difficulty: str = "medium"
     study_mode: str = "balanced"
     tutor_persona: str = "friendly" # friendly, socratic, direct, analogy
+    stream: bool = False # Stream tokens back as Server-Sent Events
 
-@router.post("/study-helper")
-async def study_helper(request: SolveStudyRequest):
+async def _study_helper(request: SolveStudyRequest, files: list):
     try:
         # 1. Persona Instructions
         persona_map = {
@@ -415,25 +679,11 @@ async def study_helper(request: SolveStudyRequest):
         study_mode_instructions = mode_map.get(request.study_mode, mode_map["balanced"])
 
         # Process Files if any
-        extracted_text = ""
-        if request.files_data:
-            import base64
-            from app.services.file_processor import file_processor
-            
-            for idx, file_b64 in enumerate(request.files_data):
-                try:
-                    file_bytes = base64.b64decode(file_b64.split(',')[1] if ',' in file_b64 else file_b64)
-                    file_type = request.file_types[idx]
-                    text = await file_processor.extract_text_from_bytes(file_bytes, file_type)
-                    extracted_text += f"\n\n--- FILE CONTENT ({file_type}) ---\n{text}\n"
-                except Exception as e:
-                    print(f"Error processing file for study helper: {e}")
+        extracted_text = await ingestion.extract_text(files)
 
-        final_questions = request.questions + extracted_text
-
-        prompt = STUDY_HELPER_PROMPT.format(
+        format_prompt = lambda questions: STUDY_HELPER_PROMPT.format(
             subject=request.subject,
-            questions=final_questions,
+            questions=questions,
             difficulty=request.difficulty.upper(),
             study_mode=request.study_mode.upper(),
             tutor_persona=request.tutor_persona.upper(),
@@ -441,13 +691,134 @@ async def study_helper(request: SolveStudyRequest):
             difficulty_instructions=difficulty_instructions,
             study_mode_instructions=study_mode_instructions
         )
+        # Trim oversized file content instead of sending a prompt no model can take
+        prompt = format_prompt(fit_to_context(format_prompt, request.questions + extracted_text))
 
         messages = [
             {"role": "user", "content": prompt}
         ]
 
-        response_text = await groq_service.get_chat_response(messages)
+        if request.stream:
+            meta = {}
+            return await sse_response(groq_service.stream_chat_response(messages, meta=meta), meta)
+
+        response_text, meta = await groq_service.get_chat_completion(messages, hedge="study-helper")
 
-        return {"answer": response_text}
+        return {"answer": response_text, "meta": meta}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/study-helper")
+async def study_helper(request: SolveStudyRequest):
+    return await _study_helper(request, await request_files(request))
+
+@router.post("/study-helper/upload")
+async def study_helper_upload(payload: str = Form("{}"), files: List[UploadFile] = File(default=[])):
+    """Multipart variant: `payload` is the JSON request body (without files_data), files are streamed parts."""
+    return await _study_helper(*await parse_upload(SolveStudyRequest, payload, files))
+
+# --- Background jobs ---
+
+JOB_TOOLS = {
+    **{tool: (model, lambda request, files, generate=generate: generate(request, files, Response()))
+       for tool, (model, generate) in BATCH_TOOLS.items()},
+    "solve-assignment": (SolveAssignmentRequest, _solve_assignment),
+    "solve-lab-questions": (SolveLabRequest, _solve_lab_questions),
+    "study-helper": (SolveStudyRequest, _study_helper),
+}
+
+def job_handler(tool: str):
+    model, generate = JOB_TOOLS[tool]
+
+    async def run(params: dict):
+        request = model.model_validate(params)
+        return await generate(request, await request_files(request))
+    return run
+
+for tool in JOB_TOOLS:
+    job_runner.register(tool, job_handler(tool))
+
+class JobRequest(BaseModel):
+    tool: Literal["generate-quiz", "generate-flashcards", "summarize", "solve-assignment", "solve-lab-questions", "study-helper"]
+    params: dict = {} # the tool's request body
+
+def validate_job(request: JobRequest) -> dict:
+    """Validate the params against the tool's request model now, so bad requests fail at submit time."""
+    model, _ = JOB_TOOLS[request.tool]
+    try:
+        params = model.model_validate(request.params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    return without_streaming(params).model_dump()
+
+async def inline_file_ids(params: dict) -> dict:
+    """
+    Move stored `file_ids` into the job's `files_data`. The file store is a
+    directory on this host, so with JOB_QUEUE_BACKEND=redis, whose workers may
+    run elsewhere, a job must carry its documents itself.
+    """
+    if settings.JOB_QUEUE_BACKEND != "redis" or not params.get("file_ids"):
+        return params
+    files_data = list(params.get("files_data", []))
+    file_types = list(params.get("file_types", []))[:len(files_data)]
+    for file_id in params["file_ids"]:
+        buffer, file_type = await file_store.open(file_id)
+        files_data.append(await asyncio.to_thread(lambda: base64.b64encode(buffer).decode("ascii")))
+        file_types.append(file_type)
+    return {**params, "files_data": files_data, "file_types": file_types, "file_ids": []}
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """
+    Queue a tool call and return its `job_id` immediately. The call runs on a
+    background worker; poll GET /tools/jobs/{job_id} or follow
+    /tools/jobs/{job_id}/events for the result, which has the same body as the
+    synchronous endpoint. Pass documents as `file_ids` (POST /tools/files) so
+    the stored job stays small; with JOB_QUEUE_BACKEND=redis they are copied
+    into the job (see `inline_file_ids`), since workers on other hosts can't
+    read this host's file store.
+    """
+    return public_view(await job_runner.submit(request.tool, await inline_file_ids(validate_job(request))))
+
+@router.post("/jobs/upload", status_code=202)
+async def submit_job_upload(payload: str = Form(...), files: List[UploadFile] = File(default=[])):
+    """
+    Multipart variant: `payload` is the JSON job request; uploaded parts are stored and added as file_ids
+    (inlined into the job with JOB_QUEUE_BACKEND=redis).
+    """
+    try:
+        request = JobRequest.model_validate_json(payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    file_ids = [(await file_store.put(file))["file_id"] for file in files]
+    request.params = {**request.params, "file_ids": request.params.get("file_ids", []) + file_ids}
+    return public_view(await job_runner.submit(request.tool, await inline_file_ids(validate_job(request))))
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    return public_view(await job_runner.queue.get(job_id))
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """SSE stream: `event: status` on every state change, then `event: done` with the finished job."""
+    job = await job_runner.queue.get(job_id)
+
+    async def frames():
+        current, status = job, None
+        while True:
+            if current["status"] in JOB_FINISHED:
+                yield sse_event(public_view(current), event="done")
+                return
+            if current["status"] != status:
+                status = current["status"]
+                yield sse_event({"job_id": job_id, "status": status, "attempts": current["attempts"]}, event="status")
+            await asyncio.sleep(job_runner.poll_interval)
+            current = await job_runner.queue.get(job_id)
+
+    return StreamingResponse(frames(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    return public_view(await job_runner.cancel(job_id))
@@ -0,0 +1,47 @@
+import json
+from typing import AsyncIterator
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # stop proxies (nginx, Vercel) from buffering the stream
+}
+
+def sse_event(data: dict, event: str = None) -> str:
+    """Format one Server-Sent Event frame."""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+async def sse_response(tokens: AsyncIterator, meta: dict = None, event: str = None) -> StreamingResponse:
+    """
+    Wrap a token iterator from GroqService in a text/event-stream response.
+
+    The first token is awaited before the response starts, so failures that
+    happen before any output (including exhausting every fallback model)
+    still surface as a normal HTTP error from the calling endpoint.
+
+    Frames: ``data: {"delta": "..."}`` per token, then ``event: done`` whose
+    data is ``meta`` (e.g. the token estimate filled in by the generator).
+    Errors after the stream has started are sent as ``event: error``.
+    With ``event`` set, the iterator yields dicts (e.g. parsed quiz questions)
+    and each one is sent as its own ``event: <event>`` frame instead.
+    """
+    frame = (lambda value: sse_event(value, event=event)) if event else (lambda token: sse_event({"delta": token}))
+    iterator = tokens.__aiter__()
+    try:
+        first_token = await iterator.__anext__()
+    except StopAsyncIteration:
+        first_token = None
+
+    async def frames():
+        try:
+            if first_token is not None:
+                yield frame(first_token)
+                async for token in iterator:
+                    yield frame(token)
+            yield sse_event(meta or {}, event="done")
+        except Exception as e:
+            print(f"ERROR: Stream failed after first token: {e}")
+            yield sse_event({"detail": str(e)}, event="error")
+
+    return StreamingResponse(frames(), media_type="text/event-stream", headers=SSE_HEADERS)
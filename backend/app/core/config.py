@@ -1,12 +1,121 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "EduGen AI"
     GROQ_API_KEY: str
-    AZURE_STORAGE_CONNECTION_STRING: str
-    AZURE_SEARCH_ENDPOINT: str
-    AZURE_SEARCH_KEY: str
-    AZURE_SQL_CONNECTION_STRING: str
+    # Azure resources are not used by any current endpoint, so they are optional
+    AZURE_STORAGE_CONNECTION_STRING: Optional[str] = None
+    AZURE_SEARCH_ENDPOINT: Optional[str] = None
+    AZURE_SEARCH_KEY: Optional[str] = None
+    AZURE_SQL_CONNECTION_STRING: Optional[str] = None
+
+    # Groq HTTP client (shared connection pool per worker)
+    GROQ_BASE_URL: Optional[str] = None  # override to point at a local fake server
+    GROQ_TIMEOUT_SECONDS: float = 120.0
+    GROQ_MAX_RETRIES: int = 2  # SDK-level retries per model, before falling back to the next one
+    GROQ_MAX_CONNECTIONS: int = 100
+    GROQ_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    GROQ_MAX_OUTPUT_TOKENS: int = 8000  # upper bound; lowered per request so prompt + answer fit the model
+
+    # Per-model circuit breakers (GroqService skips models whose breaker is open)
+    MODEL_BREAKER_WINDOW_SECONDS: int = 60
+    MODEL_BREAKER_MIN_REQUESTS: int = 5  # calls in the window before the error rate is trusted
+    MODEL_BREAKER_ERROR_RATE: float = 0.5
+    MODEL_BREAKER_SLOW_CALL_SECONDS: float = 60.0  # slower calls count as failures
+    MODEL_BREAKER_COOLDOWN_SECONDS: int = 30
+    MODEL_BREAKER_MAX_COOLDOWN_SECONDS: int = 600
+
+    # Hedged requests: if the primary model is slower than its usual latency, race the next model
+    GROQ_HEDGE_ENABLED: bool = False
+    GROQ_HEDGE_PERCENTILE: float = 0.95  # hedge once the primary exceeds this percentile of its recent latency
+    GROQ_HEDGE_MIN_DELAY_SECONDS: float = 0.5
+    GROQ_HEDGE_DEFAULT_DELAY_SECONDS: float = 5.0  # used until a model has enough latency samples
+    GROQ_HEDGE_BUDGET: float = 0.1  # max fraction of an endpoint's requests that may be hedged
+    GROQ_HEDGE_BUDGETS: Dict[str, float] = {}  # per-endpoint overrides, e.g. {"chat": 0.2}
+
+    # Client-side Groq quota; calls beyond it queue fairly per client or get a 503. Off by default: the limits
+    # below are placeholders, and they apply per process, so set them to your account's limits divided by the
+    # number of processes/instances sharing the API key before enabling it.
+    RATE_LIMIT_ENABLED: bool = False
+    GROQ_RPM_LIMIT: int = 1000  # requests per minute, per model, per process
+    GROQ_TPM_LIMIT: int = 300000  # prompt + max_tokens per minute, per model, per process
+    GROQ_MODEL_QUOTAS: Dict[str, Dict[str, int]] = {}  # per-model overrides, e.g. {"gemma2-9b-it": {"rpm": 30, "tpm": 15000}}
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = 10.0
+    RATE_LIMIT_MAX_QUEUE: int = 100
+    RATE_LIMIT_MAX_QUEUE_PER_CLIENT: int = 10
+
+    # Share one upstream call between concurrent identical requests
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Follow-up calls that ask only for missing/invalid quiz questions or flashcards
+    STRUCTURED_MAX_REASKS: int = 2
+
+    # Response cache for quiz / flashcard / summary generations
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: int = 3600
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_BACKEND: str = "memory"  # memory, disk, redis
+    RESPONSE_CACHE_DIR: str = ".cache/responses"
+    RESPONSE_CACHE_DIR_MAX_BYTES: int = 256 * 1024 * 1024  # disk tier; least recently used entries are evicted
+    RESPONSE_CACHE_DIR_MAX_ENTRIES: int = 10000
+    RESPONSE_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Extracted text / rendered page cache, keyed by file digest
+    ARTIFACT_CACHE_TTL_SECONDS: int = 3600
+    ARTIFACT_CACHE_MAX_ENTRIES: int = 1024
+    ARTIFACT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Upload-once file store (shared by workers on one host)
+    FILE_STORE_DIR: Optional[str] = None  # defaults to <tmp>/edugen-files
+    FILE_STORE_MAX_BYTES: int = 1024 * 1024 * 1024
+    FILE_STORE_TTL_SECONDS: int = 24 * 3600
+
+    # Map-reduce summarisation of documents larger than one prompt
+    MAP_REDUCE_THRESHOLD_TOKENS: int = 12000  # content above this is chunked automatically
+    MAP_REDUCE_CHUNK_TOKENS: int = 6000
+    MAP_REDUCE_CONCURRENCY: int = 8  # chunk completions in flight per request
+
+    # Batch generation (POST /tools/batch)
+    BATCH_MAX_ITEMS: int = 500  # documents x tasks per batch
+    BATCH_CONCURRENCY: int = 8  # completions in flight per batch
+    BATCH_MAX_KEPT: int = 50  # finished batches kept for polling
+
+    # Background jobs (POST /tools/jobs)
+    JOB_QUEUE_BACKEND: str = "memory"  # memory, sqlite (durable, shared by workers on one host), redis (shared across hosts)
+    JOB_QUEUE_PATH: Optional[str] = None  # sqlite file; defaults to <tmp>/edugen-jobs.sqlite3
+    JOB_QUEUE_REDIS_URL: str = "redis://localhost:6379/0"
+    JOB_WORKERS: int = 4  # jobs run concurrently per process; 0 = only queue (run worker.py elsewhere)
+    JOB_LEASE_SECONDS: int = 60  # a running job whose worker stops renewing this is re-queued
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_POLL_INTERVAL_SECONDS: float = 0.5
+    JOB_TTL_SECONDS: int = 24 * 3600  # finished jobs are kept this long
+
+    # Worker pool for PDF rendering, image encoding and OCR
+    FILE_WORKER_KIND: str = "thread"  # thread (PDF rendering serialized), process (parallel PDF pages; needs child processes)
+    FILE_WORKERS: int = 4
+    FILE_WORKER_QUEUE: int = 32  # jobs allowed to wait for a worker before returning 503
+
+    # Images sent to the vision model: cropped, grayscale when colourless, sized by text density
+    VISION_IMAGE_ADAPTIVE: bool = True  # false = fixed 2x render / 2000px cap at VISION_IMAGE_MAX_QUALITY
+    VISION_IMAGE_MAX_SIDE: int = 2000  # long side in pixels for dense small print
+    VISION_IMAGE_MIN_SIDE: int = 1024  # long side for sparse pages; never shrunk below this to fit the budget
+    VISION_IMAGE_MAX_BYTES: int = 200 * 1024  # encoded size budget per image (before base64)
+    VISION_IMAGE_MAX_QUALITY: int = 85
+    VISION_IMAGE_MIN_QUALITY: int = 45
+
+    # Observability: Prometheus metrics at /metrics and a Server-Timing header on every response
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True
+
+    # Opt-in CPU profiling of requests (X-Profile: <token> header, or random sampling)
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: Optional[str] = None  # required for per-request opt-in via the X-Profile header
+    PROFILING_SAMPLE_RATE: float = 0.0  # fraction of requests profiled at random
+    PROFILING_SLOW_SECONDS: float = 5.0  # sampled profiles are only kept for requests at least this slow
+    PROFILING_DIR: Optional[str] = None  # defaults to <tmp>/edugen-profiles
+    PROFILING_MAX_FILES: int = 100  # oldest profiles are deleted beyond this
     
     class Config:
         env_file = ".env"
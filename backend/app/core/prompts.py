@@ -206,6 +206,27 @@ CONTENT TO SUMMARIZE:
 {content}
 """
 
+CHUNK_NOTES_PROMPT = """You are an expert academic note-taker. Below is PART {part} OF {total} of a larger document. Your notes will be merged with the notes of the other parts to write the final summary, so they must be complete and self-contained.
+
+🚨 CRITICAL REQUIREMENTS:
+1. **EXTRACT ACTUAL CONTENT**: Record every key concept, definition, fact, formula, step, example, number, date and name from this part.
+2. **BE DENSE**: Use compact bullet points grouped under short headings. No introductions, no conclusions, no commentary.
+3. **STAY FAITHFUL**: Only use information from this part. Do not refer to "this part" or guess about the rest of the document.
+
+FOCUS AREA: {focus_area}
+
+CONTENT (PART {part} OF {total}):
+{content}
+"""
+
+ITEM_REASK_PROMPT = """Some of the {label} you returned could not be used:
+{problems}
+
+Create exactly {missing} NEW {label} from the same content, in exactly the same JSON format as before. Do not repeat any of the {label} already accepted (the JSON above).
+
+🚨 Return ONLY a valid JSON array with {missing} items. No Markdown. No Explanations.
+"""
+
 ASSIGNMENT_SOLVER_PROMPT = """You are a precise academic assistant. Your goal is to provide accurate, direct, and high-quality answers to the following questions for the subject "{subject}".
 
 QUESTIONS:
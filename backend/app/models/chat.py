@@ -8,6 +8,8 @@ class Message(BaseModel):
 class ChatRequest(BaseModel):
     messages: List[Message]
     model: Optional[str] = "llama-3.3-70b-versatile"
+    stream: bool = False # Stream tokens back as Server-Sent Events
 
 class ChatResponse(BaseModel):
     response: str
+    meta: Optional[dict] = None # token estimate and model used
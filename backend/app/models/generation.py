@@ -0,0 +1,72 @@
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+from typing import List
+
+def _as_number(value: str):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+class QuizQuestion(BaseModel):
+    # Math quizzes often come back with bare numbers ("options": [3, 4, 5, 6], "correct_answer": 4)
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    question: str
+    options: List[str]
+    correct_answer: str
+    explanation: str = ""
+
+    @field_validator("question")
+    @classmethod
+    def question_not_empty(cls, value: str) -> str:
+        if not value.strip():
+            raise ValueError("question is empty")
+        return value.strip()
+
+    @field_validator("options")
+    @classmethod
+    def enough_options(cls, value: List[str]) -> List[str]:
+        options = [str(option).strip() for option in value if str(option).strip()]
+        if len(options) < 2:
+            raise ValueError("needs at least 2 options")
+        if len(set(options)) != len(options):
+            raise ValueError("options repeat")
+        return options
+
+    @model_validator(mode="after")
+    def answer_is_an_option(self):
+        # The frontend compares the picked option to correct_answer verbatim, so
+        # map "B", "b)" or a differently-cased copy onto the option itself
+        answer = self.correct_answer.strip()
+        if answer in self.options:
+            self.correct_answer = answer
+            return self
+        for option in self.options:
+            if option.lower() == answer.lower():
+                self.correct_answer = option
+                return self
+        # 4 vs "4.0": the frontend compares strings with ===, so use the option's own spelling
+        number = _as_number(answer)
+        if number is not None:
+            for option in self.options:
+                if _as_number(option) == number:
+                    self.correct_answer = option
+                    return self
+        letter = answer.rstrip(").:").strip().upper()
+        if len(letter) == 1 and "A" <= letter < chr(ord("A") + len(self.options)):
+            self.correct_answer = self.options[ord(letter) - ord("A")]
+            return self
+        raise ValueError("correct_answer is not one of the options")
+
+class Flashcard(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    front: str
+    back: str
+
+    @field_validator("front", "back")
+    @classmethod
+    def side_not_empty(cls, value: str) -> str:
+        if not value.strip():
+            raise ValueError("card side is empty")
+        return value.strip()
@@ -0,0 +1,188 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from fastapi import HTTPException
+from app.core.config import settings
+from app.services.worker_pool import worker_pool
+
+RUNNING, DONE, CANCELLED = "running", "done", "cancelled"
+
+
+class BatchNotFound(HTTPException):
+    def __init__(self, batch_id: str):
+        super().__init__(status_code=404, detail=f"Unknown or expired batch: {batch_id}")
+
+
+class Batch:
+    """Progress and results of one batch; results are kept in completion order."""
+
+    def __init__(self, batch_id: str, items: list):
+        self.id = batch_id
+        self.items = items  # [{"index", "document", "tool"}, ...]
+        self.results = []
+        self.failed = 0
+        self.status = RUNNING
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.tasks = []
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def add_result(self, result: dict):
+        self.results.append(result)
+        if result["status"] != "ok":
+            self.failed += 1
+        if len(self.results) == len(self.items):
+            self.finish(DONE)
+        self._notify()
+
+    def finish(self, status: str):
+        if self.status == RUNNING:
+            self.status = status
+            self.finished_at = time.monotonic()
+            self._notify()
+
+    def progress(self) -> dict:
+        end = self.finished_at or time.monotonic()
+        return {
+            "batch_id": self.id,
+            "status": self.status,
+            "total": len(self.items),
+            "completed": len(self.results),
+            "failed": self.failed,
+            "elapsed": round(end - self.started_at, 3),
+        }
+
+    def snapshot(self, since: int = 0) -> dict:
+        """Progress plus the results finished after the first ``since`` (for incremental polling)."""
+        return {**self.progress(), "results": self.results[since:]}
+
+    async def follow(self):
+        """Yield results as they finish (replaying earlier ones) until the batch ends."""
+        idx = 0
+        while True:
+            while idx < len(self.results):
+                yield self.results[idx]
+                idx += 1
+            if self.status != RUNNING:
+                return
+            await self._changed.wait()
+
+
+class BatchManager:
+    """
+    Runs many tool generations (documents x tasks) as one background batch.
+
+    Each document is prepared once (file loading, page routing) no matter how
+    many tasks use it, with at most ``extract_concurrency`` documents being
+    prepared at a time. Prepared items then go through the LLM stage with at
+    most ``concurrency`` completions in flight, so extraction of later
+    documents overlaps generation for earlier ones. Calls shed with a 503
+    (quota, open breakers, busy worker pool) are retried after their
+    Retry-After, up to ``max_retries`` times. Batches are kept in memory; the
+    ``max_kept`` most recent finished ones stay queryable.
+    """
+
+    def __init__(self, concurrency: int, extract_concurrency: int, max_kept: int, max_retries: int = 3,
+                 max_retry_wait: float = 30.0):
+        self.concurrency = concurrency
+        self.extract_concurrency = extract_concurrency
+        self.max_kept = max_kept
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
+        self.batches = OrderedDict()
+
+    def submit(self, documents: list, tasks: list, prepare, execute, concurrency: int = None) -> Batch:
+        """
+        Start a batch over every (document, task) pair and return it immediately.
+
+        ``documents`` are ``(label, source)`` pairs and ``tasks`` are ``(tool, params)``
+        pairs; ``prepare(source)`` loads one document and
+        ``execute(tool, params, prepared)`` runs one task on it, returning the
+        tool's response body.
+        """
+        items = [
+            {"index": len(tasks) * d + t, "document": label, "tool": tool}
+            for d, (label, _) in enumerate(documents) for t, (tool, _) in enumerate(tasks)
+        ]
+        batch = Batch(uuid.uuid4().hex, items)
+        llm_slots = asyncio.Semaphore(min(concurrency or self.concurrency, self.concurrency))
+        extract_slots = asyncio.Semaphore(self.extract_concurrency)
+
+        async def load(source):
+            async with extract_slots:
+                return await prepare(source)
+
+        prepared = [asyncio.create_task(load(source)) for _, source in documents]
+        batch.tasks.extend(prepared)
+        for item in items:
+            document = prepared[item["index"] // len(tasks)]
+            task = tasks[item["index"] % len(tasks)]
+            batch.tasks.append(asyncio.create_task(self._run_item(batch, item, document, task, execute, llm_slots)))
+
+        self.batches[batch.id] = batch
+        self._evict()
+        return batch
+
+    async def _run_item(self, batch: Batch, item: dict, document: asyncio.Task, task, execute, llm_slots):
+        started = time.monotonic()
+        try:
+            # Shielded: the document is shared by every task that uses it
+            prepared = await asyncio.shield(document)
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with llm_slots:
+                        body = await execute(*task, prepared)
+                    break
+                except HTTPException as e:
+                    retry_after = (e.headers or {}).get("Retry-After")
+                    if e.status_code != 503 or attempt == self.max_retries:
+                        raise
+                    await asyncio.sleep(min(float(retry_after or 1), self.max_retry_wait))
+            result = {**item, "status": "ok", "result": body}
+        except asyncio.CancelledError:
+            raise
+        except HTTPException as e:
+            result = {**item, "status": "error", "error": {"status_code": e.status_code, "detail": e.detail}}
+        except Exception as e:
+            print(f"ERROR: Batch item {item['index']} failed: {e}")
+            result = {**item, "status": "error", "error": {"status_code": 500, "detail": str(e)}}
+        result["elapsed"] = round(time.monotonic() - started, 3)
+        batch.add_result(result)
+
+    def get(self, batch_id: str) -> Batch:
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            raise BatchNotFound(batch_id)
+        return batch
+
+    def cancel(self, batch_id: str) -> Batch:
+        batch = self.get(batch_id)
+        for task in batch.tasks:
+            task.cancel()
+        batch.finish(CANCELLED)
+        return batch
+
+    def _evict(self):
+        finished = [b.id for b in self.batches.values() if b.status != RUNNING]
+        for batch_id in finished[:max(0, len(finished) - self.max_kept)]:
+            del self.batches[batch_id]
+
+    def stats(self) -> dict:
+        running = [b for b in self.batches.values() if b.status == RUNNING]
+        return {
+            "running": len(running),
+            "kept": len(self.batches),
+            "pending_items": sum(len(b.items) - len(b.results) for b in running),
+        }
+
+
+batch_manager = BatchManager(
+    concurrency=settings.BATCH_CONCURRENCY,
+    extract_concurrency=worker_pool.max_workers,
+    max_kept=settings.BATCH_MAX_KEPT,
+)
@@ -0,0 +1,333 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+from app.core.config import settings
+from app.services.metrics import metrics
+
+
+class LRUCache:
+    """
+    In-process LRU cache with a per-entry TTL and both entry-count and byte bounds.
+    Safe to share between the event loop and worker threads.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def sizeof(value: Any) -> int:
+        if isinstance(value, str):
+            return len(value)
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return len(value)
+        if isinstance(value, (list, tuple)):
+            return sum(LRUCache.sizeof(v) for v in value)
+        return 64
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, size: int = None):
+        size = self.sizeof(value) if size is None else size
+        if size > self.max_bytes:
+            return  # Never let one huge entry flush the whole cache
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class DiskCacheTier:
+    """
+    Shared tier backed by one JSON file per key; usable by several workers on one host.
+
+    The directory is bounded by total size and entry count. Every
+    ``SWEEP_INTERVAL`` seconds or ``SWEEP_WRITES`` writes, a worker removes
+    expired entries and then the least recently used ones until both bounds hold.
+    """
+
+    SWEEP_INTERVAL = 60
+    SWEEP_WRITES = 100
+
+    def __init__(self, directory: str, ttl_seconds: float, max_bytes: int, max_entries: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._writes = 0
+        self._swept_at = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry["expires_at"] < time.time():
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(self._path(key))  # mark as recently used
+        except OSError:
+            pass
+        return entry["value"]
+
+    def _write(self, key: str, value: str):
+        # Write to a temp file and rename so other workers never see a partial entry
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"expires_at": time.time() + self.ttl_seconds, "value": value}, f)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self._writes += 1
+            due = self._writes >= self.SWEEP_WRITES or time.time() - self._swept_at > self.SWEEP_INTERVAL
+            if due:
+                self._writes, self._swept_at = 0, time.time()
+        if due:
+            self._evict()
+
+    def _evict(self):
+        """Drop expired entries (and temp files left by crashed writers), then the least recently used."""
+        now = time.time()
+        entries, total = [], 0
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # removed by another worker
+            age = now - stat.st_mtime  # last write or hit, so entries this old have expired
+            if entry.name.endswith(".tmp"):
+                if age > self.SWEEP_INTERVAL:
+                    self._remove(entry.path)
+            elif entry.name.endswith(".json"):
+                if age > self.ttl_seconds:
+                    self._remove(entry.path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for count, (_, size, path) in enumerate(entries):
+            if total <= self.max_bytes and len(entries) - count <= self.max_entries:
+                break
+            self._remove(path)
+            total -= size
+            self.evictions += 1
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, value: str):
+        await asyncio.to_thread(self._write, key, value)
+
+
+class RedisCacheTier:
+    """Shared tier backed by Redis (or any Redis-compatible server). Requires the `redis` package."""
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "edugen:response:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise Exception("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self.client = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    async def set(self, key: str, value: str):
+        await self.client.set(self.prefix + key, value, ex=int(self.ttl_seconds))
+
+
+class ResponseCache:
+    """
+    Content-addressed cache for LLM responses.
+
+    Keys are a SHA-256 over the formatted prompt, the model, the raw bytes of
+    any attached files and the generation parameters, so identical requests
+    hit regardless of which client sent them. Lookups go to the in-process
+    LRU first and then to the optional shared tier (disk or Redis).
+    """
+
+    def __init__(self, memory: LRUCache, shared=None):
+        self.memory = memory
+        self.shared = shared
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def make_key(prompt: str, model: str, files: Iterable[tuple] = (), params: dict = None) -> str:
+        digest = hashlib.sha256()
+        digest.update(json.dumps({"prompt": prompt, "model": model, "params": params or {}}, sort_keys=True).encode("utf-8"))
+        for file_bytes, file_type in files:
+            digest.update(file_type.encode("utf-8"))
+            digest.update(hashlib.sha256(file_bytes).digest())
+        return digest.hexdigest()
+
+    async def get(self, key: str, bypass: bool = False) -> Optional[str]:
+        if bypass or not settings.RESPONSE_CACHE_ENABLED:
+            self.bypassed += 1
+            return None
+        value = self.memory.get(key)
+        if value is not None or self.shared is None:
+            return value
+        try:
+            value = await self.shared.get(key)
+        except Exception as e:
+            print(f"Response cache shared tier read failed: {e}")
+            value = None
+        if value is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value: str):
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return
+        self.memory.set(key, value)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value)
+            except Exception as e:
+                print(f"Response cache shared tier write failed: {e}")
+
+    def stats(self) -> dict:
+        stats = {"enabled": settings.RESPONSE_CACHE_ENABLED, "bypassed": self.bypassed, "memory": self.memory.stats()}
+        if self.shared is not None:
+            stats["shared"] = {
+                "backend": settings.RESPONSE_CACHE_BACKEND,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+            }
+            if isinstance(self.shared, DiskCacheTier):
+                stats["shared"]["evictions"] = self.shared.evictions
+        return stats
+
+
+class ArtifactCache(LRUCache):
+    """
+    Cache for preprocessing results (extracted text, rendered page images),
+    keyed by the SHA-256 of the file bytes plus the kind of artifact, so the
+    same document sent to several tools is only parsed and rendered once.
+    """
+
+    @staticmethod
+    def digest(file_bytes) -> str:
+        return hashlib.sha256(file_bytes).hexdigest()
+
+    @staticmethod
+    def make_key(digest: str, kind: str, *variant) -> str:
+        return ":".join([digest, kind, *map(str, variant)])
+
+
+def _build_shared_tier():
+    backend = settings.RESPONSE_CACHE_BACKEND
+    if backend == "disk":
+        return DiskCacheTier(settings.RESPONSE_CACHE_DIR, settings.RESPONSE_CACHE_TTL_SECONDS,
+                             max_bytes=settings.RESPONSE_CACHE_DIR_MAX_BYTES,
+                             max_entries=settings.RESPONSE_CACHE_DIR_MAX_ENTRIES)
+    if backend == "redis":
+        return RedisCacheTier(settings.RESPONSE_CACHE_REDIS_URL, settings.RESPONSE_CACHE_TTL_SECONDS)
+    return None
+
+
+response_cache = ResponseCache(
+    memory=LRUCache(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+        ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    ),
+    shared=_build_shared_tier(),
+)
+
+artifact_cache = ArtifactCache(
+    max_entries=settings.ARTIFACT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.ARTIFACT_CACHE_MAX_BYTES,
+    ttl_seconds=settings.ARTIFACT_CACHE_TTL_SECONDS,
+)
+
+
+@metrics.collector("edugen_cache_lookups_total", "counter", "Cache lookups by cache and result", ("cache", "result"))
+def _cache_lookups():
+    samples = []
+    for name, cache in (("response", response_cache.memory), ("artifact", artifact_cache)):
+        samples += [((name, "hit"), cache.hits), ((name, "miss"), cache.misses)]
+    if response_cache.shared is not None:
+        samples += [(("response_shared", "hit"), response_cache.shared_hits),
+                    (("response_shared", "miss"), response_cache.shared_misses)]
+    return samples + [(("response", "bypass"), response_cache.bypassed)]
+
+
+@metrics.collector("edugen_cache_bytes", "gauge", "Bytes held by each in-process cache", ("cache",))
+def _cache_bytes():
+    return [(("response",), response_cache.memory.stats()["bytes"]), (("artifact",), artifact_cache.stats()["bytes"])]
@@ -0,0 +1,197 @@
+import time
+from collections import deque
+from fastapi import HTTPException
+from app.core.config import settings
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class ModelsUnavailable(HTTPException):
+    """Raised without calling Groq when every candidate model's breaker is open."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail="All AI models are temporarily unavailable. Please retry shortly.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class CircuitBreaker:
+    """
+    Breaker for one model, fed with the outcome and latency of every call.
+
+    Calls are kept in a rolling ``window_seconds`` window; calls slower than
+    ``slow_call_seconds`` count as failures. Once the window holds at least
+    ``min_requests`` calls and the failure rate reaches ``error_rate`` the
+    breaker opens. Rate-limit and decommissioned errors open it at once.
+    After the cool-down a single probe call is let through (half-open): a
+    success closes the breaker, a failure re-opens it with the cool-down doubled.
+    """
+
+    def __init__(self, window_seconds: float, min_requests: int, error_rate: float, slow_call_seconds: float,
+                 cooldown_seconds: float, max_cooldown_seconds: float, probe_timeout_seconds: float):
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.probe_timeout_seconds = probe_timeout_seconds
+
+        self.state = CLOSED
+        self.calls = deque()  # (finished_at, failed, latency)
+        self.opened_at = 0.0
+        self.current_cooldown = cooldown_seconds
+        self.probe_started_at = None
+        self.last_error = None
+        self.times_opened = 0
+
+    def _prune(self, now: float):
+        while self.calls and self.calls[0][0] < now - self.window_seconds:
+            self.calls.popleft()
+
+    def retry_in(self, now: float = None) -> float:
+        """Seconds until an open breaker lets a probe through."""
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.opened_at + self.current_cooldown - now) if self.state == OPEN else 0.0
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == OPEN:
+            if self.retry_in(now) > 0:
+                return False
+            self.state = HALF_OPEN
+            self.probe_started_at = None
+        if self.state == HALF_OPEN:
+            # One probe at a time; a probe that never reported back (e.g. cancelled) is replaced
+            if self.probe_started_at is not None and now - self.probe_started_at < self.probe_timeout_seconds:
+                return False
+            self.probe_started_at = now
+        return True
+
+    def record_success(self, latency: float):
+        if latency > self.slow_call_seconds:
+            self.record_failure(latency, f"slow call ({latency:.1f}s)")
+            return
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            self._close()
+        self.calls.append((now, False, latency))
+        self._prune(now)
+
+    def record_failure(self, latency: float, error, trip: bool = False, cooldown: float = None):
+        now = time.monotonic()
+        self.last_error = str(error)[:200]
+        self.calls.append((now, True, latency))
+        self._prune(now)
+        if self.state == HALF_OPEN:
+            self._open(now, min(self.current_cooldown * 2, self.max_cooldown_seconds))
+            return
+        failures = sum(1 for _, failed, _ in self.calls if failed)
+        if trip or (len(self.calls) >= self.min_requests and failures / len(self.calls) >= self.error_rate):
+            self._open(now, self.cooldown_seconds if cooldown is None else min(cooldown, self.max_cooldown_seconds))
+
+    def release(self):
+        """Give back a half-open probe slot whose call was abandoned (e.g. a cancelled hedge)."""
+        if self.state == HALF_OPEN:
+            self.probe_started_at = None
+
+    def latency_percentile(self, pct: float, min_samples: int = 1):
+        """Latency of successful calls in the window at percentile ``pct`` (None without enough data)."""
+        self._prune(time.monotonic())
+        latencies = sorted(latency for _, failed, latency in self.calls if not failed)
+        if len(latencies) < min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct))]
+
+    def _open(self, now: float, cooldown: float):
+        if self.state != OPEN:
+            self.times_opened += 1
+        self.state = OPEN
+        self.opened_at = now
+        self.current_cooldown = cooldown
+        self.probe_started_at = None
+
+    def _close(self):
+        self.state = CLOSED
+        self.calls.clear()
+        self.current_cooldown = self.cooldown_seconds
+        self.probe_started_at = None
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        self._prune(now)
+        latencies = sorted(latency for _, _, latency in self.calls)
+        failures = sum(1 for _, failed, _ in self.calls if failed)
+        return {
+            "state": self.state,
+            "window_calls": len(self.calls),
+            "error_rate": round(failures / len(self.calls), 4) if self.calls else 0.0,
+            "p50_latency": round(latencies[len(latencies) // 2], 3) if latencies else None,
+            "p95_latency": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else None,
+            "retry_in": round(self.retry_in(now), 1),
+            "times_opened": self.times_opened,
+            "last_error": self.last_error,
+        }
+
+
+class ModelHealth:
+    """Per-model circuit breakers used by GroqService to route around unhealthy models."""
+
+    def __init__(self, **breaker_options):
+        self.breaker_options = breaker_options
+        self.breakers = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker(**self.breaker_options)
+        return self.breakers[model]
+
+    def allow(self, model: str) -> bool:
+        """Whether ``model`` may be called now (claims the probe slot of a half-open breaker)."""
+        return self.breaker(model).allow()
+
+    def unavailable(self, models: list) -> ModelsUnavailable:
+        """The error to raise when every model in ``models`` was skipped."""
+        retry_after = min(self.breaker(m).retry_in() for m in models)
+        return ModelsUnavailable(retry_after=max(1, round(retry_after)))
+
+    def release(self, model: str):
+        self.breaker(model).release()
+
+    def record_success(self, model: str, latency: float):
+        self.breaker(model).record_success(latency)
+
+    def record_failure(self, model: str, latency: float, error: Exception):
+        error_msg = str(error).lower()
+        if any(x in error_msg for x in ["model_decommissioned", "not found"]):
+            # Won't come back on its own; keep it out of rotation for the longest cool-down
+            self.breaker(model).record_failure(latency, error, trip=True, cooldown=self.breaker_options["max_cooldown_seconds"])
+        elif any(x in error_msg for x in ["429", "rate limit"]):
+            self.breaker(model).record_failure(latency, error, trip=True, cooldown=self._retry_after(error))
+        else:
+            self.breaker(model).record_failure(latency, error)
+
+    @staticmethod
+    def _retry_after(error: Exception):
+        # Groq's 429 responses carry Retry-After; use it as the cool-down when present
+        response = getattr(error, "response", None)
+        try:
+            return float(response.headers["retry-after"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+
+    def snapshot(self) -> dict:
+        return {model: breaker.snapshot() for model, breaker in self.breakers.items()}
+
+
+model_health = ModelHealth(
+    window_seconds=settings.MODEL_BREAKER_WINDOW_SECONDS,
+    min_requests=settings.MODEL_BREAKER_MIN_REQUESTS,
+    error_rate=settings.MODEL_BREAKER_ERROR_RATE,
+    slow_call_seconds=settings.MODEL_BREAKER_SLOW_CALL_SECONDS,
+    cooldown_seconds=settings.MODEL_BREAKER_COOLDOWN_SECONDS,
+    max_cooldown_seconds=settings.MODEL_BREAKER_MAX_COOLDOWN_SECONDS,
+    probe_timeout_seconds=settings.GROQ_TIMEOUT_SECONDS,
+)
@@ -1,173 +1,434 @@
 from fastapi import UploadFile
-import PyPDF2
+import asyncio
 import io
+import mmap
+import os
+import shutil
 import base64
-from PIL import Image
-import pytesseract
-import fitz  # PyMuPDF
+import threading
+import time
+from app.services.worker_pool import worker_pool, WorkerPoolSaturated
+from app.services.cache import artifact_cache
+from app.services.metrics import metrics
+from app.services.image_encoder import image_encoder, pixmap_image
+
+# PyMuPDF is not thread-safe: on a thread pool every call into it (open, render, close) is
+# serialized here. Page runs of one PDF still fan out across the threads when they have
+# unlocked work (PyPDF2 text, Tesseract), which then overlaps. In a process pool each
+# worker has its own lock, so it is never contended.
+PYMUPDF_LOCK = threading.Lock()
+
+class BufferReader(io.RawIOBase):
+    """
+    Seekable read-only file over a bytes-like buffer (bytes, mmap, memoryview).
+
+    Unlike ``io.BytesIO(buffer)`` it never copies the whole buffer, and each
+    instance keeps its own position, so several page runs can read the same
+    mapped upload concurrently.
+    """
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        else:
+            self._pos = len(self._view) + offset
+        return self._pos
+
+    def tell(self):
+        return self._pos
 
 class FileProcessor:
-    """Service for processing uploaded assignment files"""
-    
+    """Service for processing uploaded assignment files
+
+    The async methods are safe to call from request handlers: PDF parsing,
+    page rendering, JPEG encoding and OCR run on the shared ``worker_pool``
+    so they never block the event loop. The ``_sync`` helpers are the
+    plain CPU-bound implementations executed on the pool.
+
+    ``file_bytes`` arguments may be ``bytes`` or any buffer (e.g. the mmap
+    returned by :meth:`upload_buffer`); they are read without being copied.
+    """
+
+    IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/jpg', 'image/webp']
+    # A PDF page is sent as text when its text layer has at least this many characters...
+    TEXT_LAYER_MIN_CHARS = 50
+    # ...and embedded images cover less than this fraction of the page
+    IMAGE_HEAVY_COVERAGE = 0.5
+
+    # --- CPU-bound helpers (run on worker_pool) ---
+    # PyMuPDF, PyPDF2, Pillow and pytesseract are imported inside the helpers
+    # that use them, so only the first document pays for loading them and
+    # chat-only processes (e.g. a serverless cold start) never do.
+
     @staticmethod
-    async def extract_text_from_pdf(file: UploadFile) -> str:
-        """Extract text from PDF file"""
-        try:
-            content = await file.read()
-            pdf_file = io.BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
-        except Exception as e:
-            raise Exception(f"Error extracting text from PDF: {str(e)}")
-    
+    def _configure_tesseract():
+        import pytesseract
+        # Check for Tesseract in common Windows paths if not in PATH
+        if not shutil.which("tesseract"):
+            possible_paths = [
+                r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+                r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+                r"C:\Users\MANAV\AppData\Local\Tesseract-OCR\tesseract.exe"
+            ]
+            for path in possible_paths:
+                if os.path.exists(path):
+                    pytesseract.pytesseract.tesseract_cmd = path
+                    break
+
     @staticmethod
-    async def extract_text_from_image(file: UploadFile) -> str:
-        """Extract text from image using OCR"""
-        try:
-            # Check for Tesseract in common Windows paths if not in PATH
-            import os
-            import shutil
-            
-            if not shutil.which("tesseract"):
-                possible_paths = [
-                    r"C:\Program Files\Tesseract-OCR\tesseract.exe",
-                    r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
-                    r"C:\Users\MANAV\AppData\Local\Tesseract-OCR\tesseract.exe"
-                ]
-                for path in possible_paths:
-                    if os.path.exists(path):
-                        pytesseract.pytesseract.tesseract_cmd = path
-                        break
-            
-            content = await file.read()
-            image = Image.open(io.BytesIO(content))
-            
-            # Use pytesseract for OCR
-            try:
-                text = pytesseract.image_to_string(image)
-                return text.strip()
-            except pytesseract.TesseractNotFoundError:
-                raise Exception(
-                    "Tesseract OCR is not installed or not found in PATH. "
-                    "Please install Tesseract OCR from https://github.com/UB-Mannheim/tesseract/wiki "
-                    "and add it to your System PATH, or install it to C:\\Program Files\\Tesseract-OCR"
-                )
-            
-        except Exception as e:
-            raise Exception(f"Error extracting text from image: {str(e)}")
-    
+    def _pdf_page_count_sync(file_bytes: bytes) -> int:
+        import fitz  # PyMuPDF
+        with PYMUPDF_LOCK, fitz.open(stream=memoryview(file_bytes), filetype="pdf") as doc:
+            return len(doc)
+
     @staticmethod
-    async def extract_text_from_txt(file: UploadFile) -> str:
-        """Extract text from plain text file"""
+    def _pdf_pages_sync(file_bytes: bytes, page_numbers: list[int], render: bool, ocr: bool, text: bool) -> list[dict]:
+        """
+        Process one contiguous run of pages; each worker opens its own document handle.
+        Each result carries the seconds spent per stage under ``timings`` (recorded by the caller,
+        since a process worker cannot update the parent's metrics).
+        """
+        import fitz  # PyMuPDF
+        import PyPDF2
+        import pytesseract
+        results = []
+        with PYMUPDF_LOCK:
+            doc = fitz.open(stream=memoryview(file_bytes), filetype="pdf")
+        reader = PyPDF2.PdfReader(BufferReader(file_bytes)) if text else None
+        if ocr:
+            FileProcessor._configure_tesseract()
         try:
-            content = await file.read()
-            text = content.decode('utf-8')
-            return text.strip()
-        except Exception as e:
-            raise Exception(f"Error reading text file: {str(e)}")
-    
+            for page_num in page_numbers:
+                result = {"page": page_num, "image": None, "text": None, "timings": {}}
+                timings = result["timings"]
+                if text:
+                    started = time.perf_counter()
+                    try:
+                        result["text"] = reader.pages[page_num].extract_text() or ""
+                    except Exception as e:
+                        print(f"Error extracting text from page {page_num}: {e}")
+                        result["text"] = ""
+                    timings["pdf_text"] = time.perf_counter() - started
+                needs_ocr = ocr and not (result["text"] or "").strip()
+                if render:
+                    with PYMUPDF_LOCK:
+                        data = image_encoder.encode_pdf_page(doc.load_page(page_num), timings)
+                    result["image"] = FileProcessor._to_base64(data)
+                if needs_ocr:
+                    started = time.perf_counter()
+                    with PYMUPDF_LOCK:
+                        pix = doc.load_page(page_num).get_pixmap(matrix=fitz.Matrix(2, 2)) # 2x zoom for OCR accuracy
+                        with pixmap_image(pix) as shared:
+                            img = shared.copy()  # owns its pixels, so Tesseract runs without the lock
+                        del pix
+                    timings["pdf_render"] = timings.get("pdf_render", 0.0) + time.perf_counter() - started
+                    started = time.perf_counter()
+                    try:
+                        result["text"] = pytesseract.image_to_string(img).strip()
+                    except Exception as e:
+                        print(f"Error running OCR on page {page_num}: {e}")
+                        result["text"] = ""
+                    timings["ocr"] = time.perf_counter() - started
+                results.append(result)
+        finally:
+            with PYMUPDF_LOCK:
+                doc.close()
+        return results
+
     @staticmethod
-    async def process_file(file: UploadFile) -> str:
-        """Process uploaded file and extract text based on file type"""
-        file_type = file.content_type
-        
-        if file_type == 'application/pdf':
-            return await FileProcessor.extract_text_from_pdf(file)
-        elif file_type in ['image/jpeg', 'image/png', 'image/jpg']:
-            return await FileProcessor.extract_text_from_image(file)
-        elif file_type == 'text/plain':
-            return await FileProcessor.extract_text_from_txt(file)
-        else:
-            raise Exception(f"Unsupported file type: {file_type}")
+    def _pdf_route_sync(file_bytes: bytes, page_numbers: list[int]) -> list[dict]:
+        """Classify pages: text-layer pages are sent as text, scanned or image-heavy pages are rasterised."""
+        import fitz  # PyMuPDF
+        results = []
+        with PYMUPDF_LOCK, fitz.open(stream=memoryview(file_bytes), filetype="pdf") as doc:
+            for page_num in page_numbers:
+                page = doc.load_page(page_num)
+                text = page.get_text("text").strip()
+                page_area = abs(page.rect) or 1
+                image_area = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+                raster = (len(text) < FileProcessor.TEXT_LAYER_MIN_CHARS
+                          or image_area / page_area >= FileProcessor.IMAGE_HEAVY_COVERAGE)
+                results.append({"page": page_num, "text": text, "raster": raster})
+        return results
+
+    @staticmethod
+    def _ocr_sync(file_bytes: bytes) -> str:
+        import pytesseract
+        from PIL import Image
+        FileProcessor._configure_tesseract()
+        image = Image.open(BufferReader(file_bytes))
+        return pytesseract.image_to_string(image).strip()
+
+    @staticmethod
+    def _render_image_sync(file_bytes: bytes) -> list[str]:
+        from PIL import Image
+        image = Image.open(BufferReader(file_bytes))
+        return [FileProcessor._image_to_base64(image)]
+
+    # --- Async API ---
+
+    @staticmethod
+    async def upload_buffer(file: UploadFile):
+        """
+        Return the contents of a multipart upload without extra copies.
+
+        Starlette spools uploads larger than 1 MB to a temporary file; those
+        are memory-mapped read-only so the bytes stay in the page cache
+        instead of the Python heap. Small in-memory uploads are read as bytes.
+        The mapping is released when the last reference to it is dropped.
+        """
+        spooled = file.file
+        if not getattr(spooled, "_rolled", True):
+            return await file.read()
+        size = os.fstat(spooled.fileno()).st_size
+        if size == 0:
+            return b""
+        return mmap.mmap(spooled.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _image_to_base64(image: "Image.Image") -> str:
+        """Encode for the vision model (see ``ImageEncoder`` for sizing, cropping and the byte budget)."""
+        return FileProcessor._to_base64(image_encoder.encode(image))
 
     @staticmethod
-    def _image_to_base64(image: Image.Image) -> str:
-        buffered = io.BytesIO()
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        image.save(buffered, format="JPEG", quality=85)
-        return base64.b64encode(buffered.getvalue()).decode("utf-8")
+    def _to_base64(data) -> str:
+        """Base64 of the encoder's output buffer, read in place (no ``getvalue()`` copy first)."""
+        return base64.b64encode(data).decode("ascii")
+
+    @staticmethod
+    async def file_digest(file_bytes) -> str:
+        """SHA-256 of a file; large buffers are hashed off the event loop (hashlib releases the GIL)."""
+        if len(file_bytes) < 1024 * 1024:
+            return artifact_cache.digest(file_bytes)
+        return await asyncio.to_thread(artifact_cache.digest, file_bytes)
 
     @staticmethod
     async def extract_text_from_bytes(file_bytes: bytes, file_type: str) -> str:
-        """Extract text from file bytes based on file type"""
+        """Extract text from file bytes based on file type (cached by file digest)"""
+        key = artifact_cache.make_key(await FileProcessor.file_digest(file_bytes), "text", file_type)
+        text = artifact_cache.get(key)
+        if text is None:
+            text = await FileProcessor._extract_text_from_bytes(file_bytes, file_type)
+            if text and text != "[Image Text Extraction Failed]":
+                artifact_cache.set(key, text)
+        return text
+
+    @staticmethod
+    async def _extract_text_from_bytes(file_bytes: bytes, file_type: str) -> str:
         try:
             if file_type == 'application/pdf':
                 try:
-                    import PyPDF2
-                    pdf_file = io.BytesIO(file_bytes)
-                    pdf_reader = PyPDF2.PdfReader(pdf_file)
-                    text = ""
-                    for page in pdf_reader.pages:
-                        extracted = page.extract_text()
-                        if extracted:
-                            text += extracted + "\n"
-                    return text.strip()
+                    # Text layer per page in parallel; scanned pages fall back to OCR
+                    pages = await FileProcessor.process_pdf_pages(file_bytes, render=False, text=True, ocr=True)
+                    return "\n".join(page["text"] for page in pages if page["text"]).strip()
+                except WorkerPoolSaturated:
+                    raise
                 except Exception as e:
-                    # Fallback to PyMuPDF if PyPDF2 fails (optional but good)
-                    return "" 
-            
-            elif file_type in ['image/jpeg', 'image/png', 'image/jpg', 'image/webp']:
-                 # Use existing image extraction logic (needs refactoring to share code)
-                 # For now, duplicate inner logic of extract_text_from_image but adapting for bytes
-                 image = Image.open(io.BytesIO(file_bytes))
+                    print(f"Error extracting text from PDF pages: {e}")
+                    return ""
+
+            elif file_type in FileProcessor.IMAGE_TYPES:
                  try:
-                    import pytesseract
-                    # Ensure tesseract path is set (copy logic from extract_text_from_image if needed, 
-                    # but simpler to assume it's set or rely on env)
-                    # For safety, let's just try basic OCR
-                    text = pytesseract.image_to_string(image)
-                    return text.strip()
+                    with metrics.timed("ocr"):
+                        return await worker_pool.run(FileProcessor._ocr_sync, file_bytes)
+                 except WorkerPoolSaturated:
+                     raise
                  except Exception:
                      return "[Image Text Extraction Failed]"
 
             elif file_type == 'text/plain':
-                return file_bytes.decode('utf-8').strip()
-            
+                return str(file_bytes, 'utf-8').strip()
+
             return ""
+        except WorkerPoolSaturated:
+            raise
         except Exception as e:
             print(f"Error extracting text from bytes: {e}")
             return ""
 
     @staticmethod
-    def process_file_to_base64_images(file_bytes: bytes, file_type: str) -> list[str]:
+    async def _map_page_runs(fn, file_bytes, page_numbers: list[int], *args, locked: bool = False) -> list:
+        """
+        Split pages into one contiguous run per worker, run ``fn`` on each, and flatten in order.
+        ``locked`` says ``fn`` does all its work under ``PYMUPDF_LOCK``; on a thread pool such
+        a document is processed as a single run, since more runs would only add document opens.
+        """
+        if not page_numbers:
+            return []
+        serial = locked and worker_pool.kind == "thread"
+        num_runs = 1 if serial else min(len(page_numbers), worker_pool.max_workers)
+        run_size = -(-len(page_numbers) // num_runs) # ceil division
+        runs = [page_numbers[start:start + run_size] for start in range(0, len(page_numbers), run_size)]
+
+        results = await asyncio.gather(*[worker_pool.run(fn, file_bytes, pages, *args) for pages in runs])
+        return [page for run in results for page in run]
+
+    @staticmethod
+    async def process_pdf_pages(file_bytes: bytes, max_pages: int = None, render: bool = True,
+                                ocr: bool = False, text: bool = False, pages: list[int] = None) -> list[dict]:
+        """
+        Process PDF pages on the worker pool.
+
+        Pages are split into one contiguous run per worker and each run opens
+        its own document. On a thread pool, rendering is serialized (see
+        ``PYMUPDF_LOCK``) while OCR and text extraction overlap, so a render-only
+        call is a single run (see :meth:`_map_page_runs`). Results come back in page order as dicts of
+        ``{"page", "image", "text"}``. ``render`` produces base64 images (JPEG or PNG),
+        ``text`` reads the PDF text layer and ``ocr`` runs Tesseract on pages
+        whose text layer is empty. ``pages`` selects specific page numbers.
+        """
+        if pages is None:
+            page_count = await worker_pool.run(FileProcessor._pdf_page_count_sync, file_bytes)
+            if max_pages is not None:
+                page_count = min(page_count, max_pages)
+            pages = list(range(page_count))
+        results = await FileProcessor._map_page_runs(FileProcessor._pdf_pages_sync, file_bytes, pages, render, ocr, text,
+                                                     locked=not (ocr or text))
+        for page in results:
+            for stage, seconds in page.pop("timings").items():
+                metrics.record_stage(stage, seconds)
+        return results
+
+    @staticmethod
+    async def _analyze_file(file_bytes, file_type: str) -> list[dict]:
+        """Per-page routing analysis for one file (cached by file digest)."""
+        if file_type == 'application/pdf':
+            key = artifact_cache.make_key(await FileProcessor.file_digest(file_bytes), "route")
+            pages = artifact_cache.get(key)
+            if pages is None:
+                with metrics.timed("pdf_route"):
+                    page_count = await worker_pool.run(FileProcessor._pdf_page_count_sync, file_bytes)
+                    pages = await FileProcessor._map_page_runs(
+                        FileProcessor._pdf_route_sync, file_bytes, list(range(page_count)), locked=True)
+                artifact_cache.set(key, pages, size=sum(len(p["text"]) for p in pages) + 64 * len(pages))
+            return pages
+        if file_type in FileProcessor.IMAGE_TYPES:
+            return [{"page": 0, "text": "", "raster": True}]
+        return [{"page": 0, "text": await FileProcessor.extract_text_from_bytes(file_bytes, file_type), "raster": False}]
+
+    @staticmethod
+    async def route_documents(files: list, max_images: int = 5) -> dict:
         """
-        Convert file bytes (PDF or Image) to a list of Base64 strings.
+        Text-first routing for a set of ``(file_bytes, file_type)`` pairs.
+
+        Pages with a usable text layer are returned as text for the text
+        model. Scanned or image-heavy pages (and image files) are rasterised
+        for the vision model, up to ``max_images`` across all files; any
+        further ones are OCR'd instead of being dropped.
+
+        Returns ``{"text": str, "images": [base64 JPEG or PNG, ...], "stats": {...}}``;
+        the result is cached per set of file digests.
+        """
+        digests = await asyncio.gather(*[FileProcessor.file_digest(b) for b, _ in files])
+        file_set = ":".join(f"{digest}/{file_type}" for digest, (_, file_type) in zip(digests, files))
+        key = artifact_cache.make_key(artifact_cache.digest(file_set.encode()), "routed", max_images)
+        routed = artifact_cache.get(key)
+        if routed is None:
+            routed = await FileProcessor._route_documents(files, max_images)
+            artifact_cache.set(key, routed, size=len(routed["text"]) + sum(len(img) for img in routed["images"]))
+        return routed
+
+    @staticmethod
+    async def _route_documents(files: list, max_images: int) -> dict:
+        analyses = await asyncio.gather(*[FileProcessor._analyze_file(b, t) for b, t in files])
+
+        budget = max_images
+        tasks = []
+        for (file_bytes, file_type), pages in zip(files, analyses):
+            raster = [p["page"] for p in pages if p["raster"]]
+            to_render, overflow = raster[:budget], raster[budget:]
+            budget -= len(to_render)
+            tasks.append(FileProcessor._rasterise(file_bytes, file_type, pages, to_render, overflow))
+        rasterised = await asyncio.gather(*tasks)
+
+        sections, images = [], []
+        stats = {"text_pages": 0, "image_pages": 0, "ocr_pages": 0}
+        for (file_bytes, file_type), pages, (page_images, ocr_text) in zip(files, analyses, rasterised):
+            lines = []
+            for page in pages:
+                if page["page"] in page_images:
+                    images.append(page_images[page["page"]])
+                    stats["image_pages"] += 1
+                    continue
+                text = ocr_text.get(page["page"], page["text"])
+                if page["page"] in ocr_text:
+                    stats["ocr_pages"] += 1
+                else:
+                    stats["text_pages"] += 1
+                if text:
+                    lines.append(f"[Page {page['page'] + 1}]\n{text}" if len(pages) > 1 else text)
+            if lines:
+                sections.append(f"--- FILE CONTENT ({file_type}) ---\n" + "\n\n".join(lines))
+        return {"text": "\n\n".join(sections), "images": images, "stats": stats}
+
+    @staticmethod
+    async def _rasterise(file_bytes, file_type: str, pages: list[dict], to_render: list[int], overflow: list[int]) -> tuple:
+        """Render the selected pages; OCR scanned pages that did not fit in the image budget."""
+        scanned_overflow = [n for n in overflow if not pages[n]["text"]]
+        if file_type == 'application/pdf':
+            rendered, ocred = await asyncio.gather(
+                FileProcessor.process_pdf_pages(file_bytes, pages=to_render, render=True),
+                FileProcessor.process_pdf_pages(file_bytes, pages=scanned_overflow, render=False, ocr=True),
+            )
+            return ({p["page"]: p["image"] for p in rendered},
+                    {p["page"]: p["text"] for p in ocred})
+        if file_type in FileProcessor.IMAGE_TYPES:
+            if to_render:
+                images = await FileProcessor.process_file_to_base64_images(file_bytes, file_type)
+                if images:
+                    return {0: images[0]}, {}
+                # Could not be encoded (e.g. a corrupt image): fall back to OCR, which is empty if it can't be read either
+            return {}, {0: await FileProcessor.extract_text_from_bytes(file_bytes, file_type)}
+        return {}, {}
+
+    @staticmethod
+    async def process_file_to_base64_images(file_bytes: bytes, file_type: str) -> list[str]:
+        """
+        Convert file bytes (PDF or Image) to a list of Base64 strings (cached by file digest).
         Returns: List of base64 encoded strings (VDom content).
         """
-        images_base64 = []
-        
+        key = artifact_cache.make_key(await FileProcessor.file_digest(file_bytes), "images", file_type)
+        images = artifact_cache.get(key)
+        if images is None:
+            images = await FileProcessor._process_file_to_base64_images(file_bytes, file_type)
+            if images:
+                artifact_cache.set(key, images)
+        return images
+
+    @staticmethod
+    async def _process_file_to_base64_images(file_bytes: bytes, file_type: str) -> list[str]:
         try:
             if file_type == 'application/pdf':
-                # Open PDF from bytes
-                doc = fitz.open(stream=file_bytes, filetype="pdf")
-                
                 # Limit to first 5 pages to avoid token explosion
-                for page_num in range(min(len(doc), 5)):
-                    page = doc.load_page(page_num)
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2)) # 2x zoom for clarity
-                    
-                    # Convert to PIL Image
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    images_base64.append(FileProcessor._image_to_base64(img))
-                    
-                doc.close()
-                
-            elif file_type in ['image/jpeg', 'image/png', 'image/jpg', 'image/webp']:
-                image = Image.open(io.BytesIO(file_bytes))
-                # Resize if too large
-                if image.width > 2000 or image.height > 2000:
-                    image.thumbnail((2000, 2000))
-                    
-                images_base64.append(FileProcessor._image_to_base64(image))
-                
-            return images_base64
-            
+                pages = await FileProcessor.process_pdf_pages(file_bytes, max_pages=5)
+                return [page["image"] for page in pages]
+
+            elif file_type in FileProcessor.IMAGE_TYPES:
+                with metrics.timed("image_render"):
+                    return await worker_pool.run(FileProcessor._render_image_sync, file_bytes)
+
+            return []
+
+        except WorkerPoolSaturated:
+            raise
         except Exception as e:
             print(f"Error processing file to images: {e}")
             return []
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import re
+import tempfile
+import time
+from fastapi import HTTPException, UploadFile
+from app.core.config import settings
+
+FILE_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class FileStore:
+    """
+    Upload-once storage for documents, addressed by the SHA-256 of their bytes.
+
+    Files live in a directory shared by every worker on the host, so a
+    ``file_id`` returned by one worker can be used on any other. Reads are
+    memory-mapped. The store is bounded by total size and age; the least
+    recently used files are evicted first.
+    """
+
+    STALE_TMP_SECONDS = 3600  # an upload still being written is never this old
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, file_id: str) -> tuple:
+        if not FILE_ID_PATTERN.match(file_id):
+            raise HTTPException(status_code=400, detail=f"Invalid file_id: {file_id}")
+        base = os.path.join(self.directory, file_id)
+        return base + ".bin", base + ".json"
+
+    def _put_sync(self, source, file_type: str, filename: str) -> dict:
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while chunk := source.read(1024 * 1024):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        file_id = digest.hexdigest()
+        data_path, meta_path = self._paths(file_id)
+        meta = {"file_id": file_id, "file_type": file_type, "filename": filename, "size": size}
+        os.replace(tmp_path, data_path)  # Same content, same name: re-uploads are idempotent
+        # Metadata last, through its own temp file: a file is visible to open() once it is complete
+        fd, tmp_meta_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta_path, meta_path)
+        self._evict(keep=file_id)
+        return meta
+
+    def _evict(self, keep: str = None):
+        now = time.time()
+        entries, total = [], 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                # Left by a failed or crashed upload; live ones are rewritten within seconds
+                try:
+                    if now - entry.stat().st_mtime > self.STALE_TMP_SECONDS:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+                continue
+            if not entry.name.endswith(".bin"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # removed by another worker
+            file_id = entry.name[:-4]
+            if now - stat.st_mtime > self.ttl_seconds and file_id != keep:
+                self._delete_sync(file_id)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file_id))
+            total += stat.st_size
+        for _, size, file_id in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if file_id != keep:
+                self._delete_sync(file_id)
+                total -= size
+
+    def _open_sync(self, file_id: str) -> tuple:
+        data_path, meta_path = self._paths(file_id)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            os.utime(data_path)  # mark as recently used
+            with open(data_path, "rb") as f:
+                if meta["size"] == 0:
+                    return b"", meta["file_type"]
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), meta["file_type"]
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Unknown or expired file_id: {file_id}")
+
+    def _meta_sync(self, file_id: str) -> dict:
+        _, meta_path = self._paths(file_id)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Unknown or expired file_id: {file_id}")
+
+    def _delete_sync(self, file_id: str):
+        for path in self._paths(file_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def put(self, file: UploadFile) -> dict:
+        """Store a multipart upload; returns its metadata including ``file_id``."""
+        await file.seek(0)
+        return await asyncio.to_thread(self._put_sync, file.file, file.content_type, file.filename)
+
+    async def open(self, file_id: str) -> tuple:
+        """Return ``(buffer, file_type)`` for a stored file."""
+        return await asyncio.to_thread(self._open_sync, file_id)
+
+    async def meta(self, file_id: str) -> dict:
+        return await asyncio.to_thread(self._meta_sync, file_id)
+
+    async def delete(self, file_id: str):
+        await asyncio.to_thread(self._delete_sync, file_id)
+
+
+file_store = FileStore(
+    directory=settings.FILE_STORE_DIR or os.path.join(tempfile.gettempdir(), "edugen-files"),
+    max_bytes=settings.FILE_STORE_MAX_BYTES,
+    ttl_seconds=settings.FILE_STORE_TTL_SECONDS,
+)
@@ -1,9 +1,30 @@
-from groq import Groq
+import asyncio
+import time
 from app.core.config import settings
+from app.services.token_budget import token_budget, PromptTooLarge
+from app.services.circuit_breaker import model_health
+from app.services.hedging import hedger
+from app.services.rate_limiter import rate_limiter, RateLimited
+from app.services.single_flight import single_flight
+from app.services.metrics import metrics, upstream_seconds, upstream_tokens, upstream_in_flight, model_fallbacks
+
+class ModelAttemptFailed(Exception):
+    """A single model's completion failed; `fall_back` says whether another model may be tried."""
+
+    def __init__(self, error: Exception, fall_back: bool):
+        super().__init__(str(error))
+        self.error = error
+        self.fall_back = fall_back
 
 class GroqService:
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        # The Groq SDK and its HTTP client are created on first use (see
+        # `client`), so importing the app stays cheap on a cold start.
+        self.http_client = None
+        self._client = None
+        # Sampling parameters sent with every completion (also part of cache keys).
+        # max_tokens is the upper bound; each call lowers it to what fits next to its prompt.
+        self.generation_params = {"max_tokens": settings.GROQ_MAX_OUTPUT_TOKENS, "temperature": 0.7}
         # List of models to try in order of preference
         self.fallback_models = [
             "llama-3.3-70b-versatile",
@@ -12,44 +33,316 @@ class GroqService:
             "gemma2-9b-it"
         ]
 
-    async def get_chat_response(self, messages: list, model: str = None):
+    @property
+    def client(self):
+        """
+        The AsyncGroq client, built on first access. One pooled HTTP client is
+        shared by every request on this worker, so concurrent completions
+        overlap their network waits instead of blocking the event loop one
+        after another.
+        """
+        if self._client is None:
+            import httpx
+            from groq import AsyncGroq
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                timeout=settings.GROQ_TIMEOUT_SECONDS,
+            )
+            self._client = AsyncGroq(
+                api_key=settings.GROQ_API_KEY,
+                base_url=settings.GROQ_BASE_URL,
+                max_retries=settings.GROQ_MAX_RETRIES,
+                http_client=self.http_client,
+            )
+        return self._client
+
+    async def aclose(self):
+        """Release the pooled connections (called on app shutdown)."""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client, self._client = None, None
+
+    def _models_to_try(self, model: str = None) -> list:
         # If a specific model is requested, try it first. Otherwise start with default.
-        models_to_try = [model] + [m for m in self.fallback_models if m != model] if model else self.fallback_models
+        return [model] + [m for m in self.fallback_models if m != model] if model else self.fallback_models
+
+    def _plan(self, messages: list, model: str = None) -> tuple:
+        """
+        Estimate the prompt size and keep only the models whose context can hold it,
+        so oversized prompts fail fast instead of being rejected by every fallback.
+        Returns (models, estimate).
+        """
+        estimate = token_budget.estimate_messages(messages)
+        candidates = self._models_to_try(model)
+        models = [m for m in candidates if token_budget.fits(m, estimate["prompt_tokens"])]
+        if not models:
+            largest = max(token_budget.limits(m)["context"] for m in candidates)
+            raise PromptTooLarge(estimate["prompt_tokens"], largest)
+        if len(models) < len(candidates):
+            print(f"DEBUG: Skipping models too small for ~{estimate['prompt_tokens']} prompt tokens: "
+                  f"{[m for m in candidates if m not in models]}")
+        return models, estimate
+
+    def _params(self, model: str, estimate: dict) -> dict:
+        max_tokens = token_budget.max_tokens(model, estimate["prompt_tokens"], self.generation_params["max_tokens"])
+        return {**self.generation_params, "max_tokens": max_tokens}
+
+    def _record_failure(self, current_model: str, started: float, error: Exception) -> bool:
+        """Feed a failed attempt to the model's circuit breaker and metrics; returns whether to fall back."""
+        latency = time.monotonic() - started
+        upstream_seconds.observe(latency, model=current_model, outcome="error")
+        if not self._should_fall_back(current_model, error):
+            # The model answered (e.g. 400 for a bad request), so it is healthy
+            model_health.record_success(current_model, latency)
+            return False
+        model_health.record_failure(current_model, latency, error)
+        model_fallbacks.inc(model=current_model)
+        return True
+
+    @staticmethod
+    def _should_fall_back(current_model: str, error: Exception) -> bool:
+        """Decide whether a failed attempt should move on to the next model."""
+        error_msg = str(error).lower()
+        print(f"Groq API Error on {current_model}: {error}")
+
+        # Check for rate limit, overload, OR decommissioned models
+        if any(x in error_msg for x in ["429", "rate limit", "overloaded", "model_decommissioned", "not found"]):
+            print(f"⚠️ Issue with {current_model} ({error_msg}). Switching to next model...")
+            return True # Try next model in loop
+
+        # Handle specific Vision model failures by falling back to text-only processing
+        if "vision" in current_model and ("vision" not in error_msg):
+             # If it's NOT a vision error but some other crash, try next model
+             return True
+
+        # Simple fallback for now: just try next. If it's a 400 error (bad request), stop.
+        if "400" in error_msg and "model_decommissioned" not in error_msg:
+            return False # Don't retry real bad requests (like invalid parameters)
+        return True
+
+    @staticmethod
+    async def _reserve(current_model: str, estimate: dict, params: dict) -> int:
+        """
+        Admit a call against the model's RPM/TPM quota (may queue). Returns the
+        tokens reserved; a shed call becomes a fall-back-able attempt failure.
+        """
+        try:
+            return await rate_limiter.acquire(current_model, estimate["prompt_tokens"] + params["max_tokens"])
+        except RateLimited as e:
+            print(f"DEBUG: {current_model} quota saturated, shedding")
+            model_health.release(current_model)
+            raise ModelAttemptFailed(e, fall_back=True)
+        except asyncio.CancelledError:
+            model_health.release(current_model)
+            raise
+
+    async def _attempt(self, current_model: str, messages: list, estimate: dict) -> tuple:
+        """One completion on one model, with the outcome fed to its circuit breaker. Returns (text, meta)."""
+        params = self._params(current_model, estimate)
+        reserved = await self._reserve(current_model, estimate, params)
+        started = time.monotonic()
+        try:
+            print(f"DEBUG: Attempting with model: {current_model}")
+            with upstream_in_flight.track(model=current_model), metrics.timed("llm"):
+                chat_completion = await self.client.chat.completions.create(
+                    messages=messages,
+                    model=current_model,
+                    **params,
+                )
+        except asyncio.CancelledError:
+            model_health.release(current_model) # lost a hedge race; not a failure
+            rate_limiter.refund(current_model, reserved)
+            raise
+        except Exception as e:
+            rate_limiter.refund(current_model, reserved)
+            raise ModelAttemptFailed(e, self._record_failure(current_model, started, e))
+
+        latency = time.monotonic() - started
+        model_health.record_success(current_model, latency)
+        upstream_seconds.observe(latency, model=current_model, outcome="ok")
+        meta = {**estimate, "model": current_model, "max_tokens": params["max_tokens"]}
+        if chat_completion.usage is not None:
+            meta["usage"] = {
+                "prompt_tokens": chat_completion.usage.prompt_tokens,
+                "completion_tokens": chat_completion.usage.completion_tokens,
+            }
+            upstream_tokens.inc(chat_completion.usage.prompt_tokens, model=current_model, kind="prompt")
+            upstream_tokens.inc(chat_completion.usage.completion_tokens, model=current_model, kind="completion")
+            rate_limiter.refund(current_model, reserved - chat_completion.usage.total_tokens)
+        return chat_completion.choices[0].message.content, meta
+
+    @staticmethod
+    def _next_allowed(models: list):
+        """Pop models off the front of `models` until one whose circuit allows a call."""
+        while models:
+            current_model = models.pop(0)
+            if model_health.allow(current_model):
+                return current_model
+            print(f"DEBUG: Skipping {current_model}: circuit open")
+        return None
+
+    async def _hedged_attempt(self, primary: str, remaining: list, messages: list, estimate: dict, endpoint: str) -> tuple:
+        """
+        Run `primary`; if it hasn't answered by its hedge deadline and the
+        endpoint's budget allows, race the next healthy model from `remaining`.
+        The first successful answer wins and the other call is cancelled.
+        The request was already admitted to the endpoint's budget by the caller.
+        """
+        primary_task = asyncio.create_task(self._attempt(primary, messages, estimate))
+        tasks = [primary_task]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedger.deadline(primary))
+            if done or not remaining or not hedger.try_hedge(endpoint):
+                return await primary_task
+            backup = self._next_allowed(remaining)
+            if backup is None:
+                return await primary_task
+
+            print(f"DEBUG: Hedging {primary} with {backup}")
+            backup_task = asyncio.create_task(self._attempt(backup, messages, estimate))
+            tasks.append(backup_task)
+            pending, failure = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        hedger.record_winner(endpoint, backup_won=task is backup_task)
+                        return task.result()
+                    failure = task.exception()
+                    if not isinstance(failure, ModelAttemptFailed) or not failure.fall_back:
+                        raise failure
+            raise failure
+        finally:
+            for task in tasks:
+                task.cancel() # the loser (or both, if the caller was cancelled); no-op once done
+
+    async def get_chat_completion(self, messages: list, model: str = None, hedge: str = None) -> tuple:
+        """
+        Like get_chat_response, but returns (text, meta) where meta holds the
+        pre-dispatch token estimate, the model used and its max_tokens, plus
+        Groq's reported usage when available.
+
+        `hedge` names the calling endpoint; when hedging is enabled the call
+        may race a backup model, counted against that endpoint's hedge budget.
+        Concurrent identical calls share one upstream completion (meta then
+        has `coalesced: true` for all but the first caller).
+        """
+        key = single_flight.make_key(messages, model, self.generation_params)
+        (response_text, meta), coalesced = await single_flight.do(
+            key, lambda: self._get_chat_completion(messages, model, hedge))
+        return response_text, {**meta, "coalesced": True} if coalesced else meta
+
+    async def _get_chat_completion(self, messages: list, model: str = None, hedge: str = None) -> tuple:
+        models, estimate = self._plan(messages, model)
+        remaining = list(models)
+        last_exception = None
+        if hedge and hedger.enabled:
+            hedger.admit(hedge)  # once per request, not per fallback attempt
+
+        while (current_model := self._next_allowed(remaining)) is not None:
+            try:
+                if hedge and hedger.enabled:
+                    return await self._hedged_attempt(current_model, remaining, messages, estimate, hedge)
+                return await self._attempt(current_model, messages, estimate)
+            except ModelAttemptFailed as failure:
+                last_exception = failure.error
+                if not failure.fall_back:
+                    raise failure.error
         
+        # If all models fail, raise the last exception
+        print("❌ All models failed.")
+        raise last_exception or model_health.unavailable(models)
+
+    async def get_chat_response(self, messages: list, model: str = None, hedge: str = None):
+        response_text, _ = await self.get_chat_completion(messages, model=model, hedge=hedge)
+        return response_text
+
+    async def stream_chat_response(self, messages: list, model: str = None, meta: dict = None):
+        """
+        Yield completion text as it arrives from Groq.
+
+        A model only counts as failed if it errors before producing its first
+        token; in that case the next fallback model is tried exactly like
+        get_chat_response. Once a token has been yielded the stream is
+        committed to that model and later errors propagate to the caller.
+        If ``meta`` is given it is filled with the token estimate and chosen model.
+        Concurrent identical streams share one upstream stream.
+        """
+        key = single_flight.make_key(messages, model, {**self.generation_params, "stream": True})
+        async for token in single_flight.stream(key, lambda shared_meta: self._stream_chat_response(messages, model, shared_meta), meta):
+            yield token
+
+    async def _stream_chat_response(self, messages: list, model: str = None, meta: dict = None):
+        models, estimate = self._plan(messages, model)
         last_exception = None
 
-        for current_model in models_to_try:
+        for current_model in models:
+            if not model_health.allow(current_model):
+                print(f"DEBUG: Skipping {current_model}: circuit open")
+                continue
+            params = self._params(current_model, estimate)
+            try:
+                reserved = await self._reserve(current_model, estimate, params)
+            except ModelAttemptFailed as failure:
+                last_exception = failure.error
+                continue
+            started = time.monotonic()
+            upstream_in_flight.inc(model=current_model)
             try:
-                print(f"DEBUG: Attempting with model: {current_model}")
-                chat_completion = self.client.chat.completions.create(
+                print(f"DEBUG: Streaming with model: {current_model}")
+                stream = await self.client.chat.completions.create(
                     messages=messages,
                     model=current_model,
-                    max_tokens=8000,
-                    temperature=0.7,
+                    **params,
+                    stream=True,
                 )
-                return chat_completion.choices[0].message.content
-            
-            except Exception as e:
-                error_msg = str(e).lower()
+                chunks = stream.__aiter__()
+                first_token = await self._next_token(chunks)
+                first_token_latency = time.monotonic() - started
+                model_health.record_success(current_model, first_token_latency)
+                upstream_seconds.observe(first_token_latency, model=current_model, outcome="ok")
+                metrics.record_stage("llm_first_token", first_token_latency)
+            except BaseException as e:
+                upstream_in_flight.dec(model=current_model)
+                rate_limiter.refund(current_model, reserved)
+                if not isinstance(e, Exception):
+                    model_health.release(current_model) # cancelled before the first token; not a failure
+                    raise
                 last_exception = e
-                print(f"Groq API Error on {current_model}: {e}")
-                
-                # Check for rate limit, overload, OR decommissioned models
-                if any(x in error_msg for x in ["429", "rate limit", "overloaded", "model_decommissioned", "not found"]):
-                    print(f"⚠️ Issue with {current_model} ({error_msg}). Switching to next model...")
-                    continue # Try next model in loop
-                
-                # Handle specific Vision model failures by falling back to text-only processing
-                if "vision" in current_model and ("vision" not in error_msg):
-                     # If it's NOT a vision error but some other crash, try next model
-                     continue
-                
-                # Simple fallback for now: just try next. If it's a 400 error (bad request), stop.
-                if "400" in error_msg and "model_decommissioned" not in error_msg:
-                    raise e # Don't retry real bad requests (like invalid parameters)
-        
-        # If all models fail, raise the last exception
+                if not self._record_failure(current_model, started, e):
+                    raise e
+                continue
+
+            if meta is not None:
+                meta.update(estimate, model=current_model, max_tokens=params["max_tokens"])
+            produced = 0 # roughly one token per delta
+            try:
+                if first_token is None:
+                    return # Model finished without producing any content
+                produced = 1
+                yield first_token
+                while (token := await self._next_token(chunks)) is not None:
+                    produced += 1
+                    yield token
+            finally:
+                upstream_in_flight.dec(model=current_model)
+                upstream_tokens.inc(estimate["prompt_tokens"], model=current_model, kind="prompt")
+                upstream_tokens.inc(produced, model=current_model, kind="completion")
+                rate_limiter.refund(current_model, reserved - estimate["prompt_tokens"] - produced)
+            return
+
         print("❌ All models failed.")
-        raise last_exception
+        raise last_exception or model_health.unavailable(models)
+
+    @staticmethod
+    async def _next_token(chunks):
+        """Return the next non-empty content delta, or None when the stream ends."""
+        async for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                return chunk.choices[0].delta.content
+        return None
 
 groq_service = GroqService()
@@ -0,0 +1,90 @@
+from app.core.config import settings
+from app.services.circuit_breaker import model_health
+
+
+class HedgeBudget:
+    """
+    Token bucket bounding the share of hedged requests: every eligible request
+    adds ``ratio`` tokens and every hedge spends one, so over time at most
+    ``ratio`` of the endpoint's requests send a second completion.
+    """
+
+    def __init__(self, ratio: float, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = min(1.0, burst)
+
+    def deposit(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class Hedger:
+    """
+    Policy and bookkeeping for hedged completions in GroqService.
+
+    The hedge deadline for a model is the ``percentile`` of its recent
+    successful latencies (from its circuit breaker window), floored at
+    ``min_delay``. Each endpoint has its own :class:`HedgeBudget`.
+    """
+
+    def __init__(self, enabled: bool, percentile: float, min_delay: float, default_delay: float,
+                 default_budget: float, budgets: dict):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.default_budget = default_budget
+        self.budgets = budgets
+        self._buckets = {}
+        self._stats = {}
+
+    def deadline(self, model: str) -> float:
+        latency = model_health.breaker(model).latency_percentile(self.percentile, min_samples=settings.MODEL_BREAKER_MIN_REQUESTS)
+        return self.default_delay if latency is None else max(self.min_delay, latency)
+
+    def _endpoint_stats(self, endpoint: str) -> dict:
+        return self._stats.setdefault(endpoint, {"requests": 0, "hedged": 0, "primary_wins": 0, "backup_wins": 0, "over_budget": 0})
+
+    def admit(self, endpoint: str):
+        """Count an eligible request and top up the endpoint's budget."""
+        if endpoint not in self._buckets:
+            self._buckets[endpoint] = HedgeBudget(self.budgets.get(endpoint, self.default_budget))
+        self._buckets[endpoint].deposit()
+        self._endpoint_stats(endpoint)["requests"] += 1
+
+    def try_hedge(self, endpoint: str) -> bool:
+        stats = self._endpoint_stats(endpoint)
+        if not self._buckets[endpoint].try_spend():
+            stats["over_budget"] += 1
+            return False
+        stats["hedged"] += 1
+        return True
+
+    def record_winner(self, endpoint: str, backup_won: bool):
+        self._endpoint_stats(endpoint)["backup_wins" if backup_won else "primary_wins"] += 1
+
+    def stats(self) -> dict:
+        endpoints = {}
+        for endpoint, stats in self._stats.items():
+            endpoints[endpoint] = {
+                **stats,
+                "hedge_rate": round(stats["hedged"] / stats["requests"], 4) if stats["requests"] else 0.0,
+                "backup_win_rate": round(stats["backup_wins"] / stats["hedged"], 4) if stats["hedged"] else 0.0,
+            }
+        return {"enabled": self.enabled, "percentile": self.percentile, "endpoints": endpoints}
+
+
+hedger = Hedger(
+    enabled=settings.GROQ_HEDGE_ENABLED,
+    percentile=settings.GROQ_HEDGE_PERCENTILE,
+    min_delay=settings.GROQ_HEDGE_MIN_DELAY_SECONDS,
+    default_delay=settings.GROQ_HEDGE_DEFAULT_DELAY_SECONDS,
+    default_budget=settings.GROQ_HEDGE_BUDGET,
+    budgets=settings.GROQ_HEDGE_BUDGETS,
+)
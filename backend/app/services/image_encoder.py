@@ -0,0 +1,266 @@
+import io
+import time
+from contextlib import contextmanager
+from app.core.config import settings
+
+# Pillow and PyMuPDF are imported inside the functions, like in file_processor.py,
+# so importing this module does not load them.
+
+ANALYSIS_SIDE = 800  # long side of the preview used to measure a page (margins, colour, text lines)
+CONTENT_CONTRAST = 40  # grey levels a pixel must differ from the background to count as content
+INK_ROW_FRACTION = 0.01  # a preview row is part of a text line when this much of it is content
+TEXT_LINE_PIXELS = 18  # height a typical line of text should keep in the output image
+COLOUR_SATURATION = 64  # HSV saturation above which a pixel counts as coloured...
+COLOUR_FRACTION = 0.001  # ...and pages with fewer coloured pixels than this are sent in grayscale
+FLAT_FRACTION = 0.6  # pages with this much exact background are digital-born and also tried as palette PNG
+PNG_GRAY_LEVELS = 16
+PNG_COLOURS = 32
+MARGIN_PAD = 0.02  # kept around the content box, as a fraction of the page's long side
+MAX_PDF_ZOOM = 2.0  # never render a PDF page sharper than the fixed 2x zoom used before
+QUALITY_STEP = 5  # granularity of the quality search
+DOWNSCALE_STEP = 0.8  # shrink factor when even min_quality is over the budget
+
+
+class ImageEncoder:
+    """
+    Encoder for the images sent to the vision model (JPEG, or PNG for flat pages).
+
+    With ``adaptive`` on, every page is first measured on a small preview:
+    blank margins are cropped, pages without colour are encoded in grayscale
+    and the output resolution follows the text density (small print keeps up
+    to ``max_side`` pixels, sparse slides drop towards ``min_side``). Flat,
+    digital-born pages are also encoded as a 16-grey or 32-colour PNG, which
+    keeps text sharp and is several times smaller than JPEG; it is used when
+    it fits in ``max_bytes`` and beats JPEG. Otherwise the JPEG quality is
+    lowered, and the image shrunk if needed, until it fits in ``max_bytes``;
+    it never goes below ``min_side`` or ``min_quality``, so legibility wins
+    over the budget. PDF pages are rendered straight at the chosen zoom and
+    clip instead of being resampled afterwards.
+
+    With ``adaptive`` off, pages are rendered at 2x and images capped at
+    2000px, both as RGB JPEG at ``max_quality`` (the original behaviour).
+    """
+
+    def __init__(self, adaptive: bool, max_side: int, min_side: int, max_bytes: int,
+                 max_quality: int, min_quality: int):
+        self.adaptive = adaptive
+        self.max_side = max_side
+        self.min_side = min(min_side, max_side)
+        self.max_bytes = max_bytes
+        self.max_quality = max_quality
+        self.min_quality = min(min_quality, max_quality)
+
+    def analyze(self, preview) -> dict:
+        """
+        Measure a page from a small RGB (or L) preview.
+
+        Returns ``{"box": (left, top, right, bottom) as fractions of the page or None
+        if it is blank, "grayscale": bool, "flat": bool, "line_height": typical text line
+        height as a fraction of the long side, or None if no lines of text were found}``.
+        """
+        from PIL import Image, ImageChops
+
+        gray = preview.convert("L")
+        histogram = gray.histogram()
+        background = histogram.index(max(histogram))
+        content = ImageChops.difference(gray, Image.new("L", gray.size, background))
+        content = content.point(lambda v: 255 if v > CONTENT_CONTRAST else 0)
+        bbox = content.getbbox()
+        if bbox is None:
+            return {"box": None, "grayscale": True, "flat": True, "line_height": None}
+
+        width, height = gray.size
+        pad = MARGIN_PAD * max(width, height)
+        box = (max(0.0, (bbox[0] - pad) / width), max(0.0, (bbox[1] - pad) / height),
+               min(1.0, (bbox[2] + pad) / width), min(1.0, (bbox[3] + pad) / height))
+
+        # Text density: the typical height of a line of text, from the runs of rows that contain content
+        rows = content.crop(bbox).resize((1, bbox[3] - bbox[1]), Image.BOX).getdata()
+        runs, run = [], 0
+        for value in list(rows) + [0]:
+            if value > INK_ROW_FRACTION * 255:
+                run += 1
+            elif run:
+                runs.append(run)
+                run = 0
+        runs = sorted(r for r in runs if r < height / 4)  # taller runs are pictures, not lines of text
+        line_height = runs[len(runs) // 2] / max(width, height) if runs else None
+
+        grayscale = True
+        if preview.mode not in ("L", "1"):
+            saturation = preview.convert("RGB").convert("HSV").getchannel("S")
+            coloured = saturation.point(lambda v: 255 if v > COLOUR_SATURATION else 0).histogram()[255]
+            grayscale = coloured < COLOUR_FRACTION * width * height
+        flat = histogram[background] >= FLAT_FRACTION * width * height
+        return {"box": box, "grayscale": grayscale, "flat": flat, "line_height": line_height}
+
+    def target_side(self, line_height) -> int:
+        """Long side in pixels that keeps lines of ``line_height`` (a fraction of the long side) legible."""
+        if not line_height:
+            return self.min_side  # no text lines: a picture or a blank page
+        return int(min(self.max_side, max(self.min_side, TEXT_LINE_PIXELS / line_height)))
+
+    def encode(self, image) -> memoryview:
+        """Encoded bytes for a decoded image (an upload, or a page rendered elsewhere)."""
+        if not self.adaptive:
+            if image.width > 2000 or image.height > 2000:
+                image.thumbnail((2000, 2000))
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            return self._encoded(self._jpeg, image, self.max_quality)
+
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        factor = max(image.size) // ANALYSIS_SIDE
+        preview = image.reduce(factor) if factor > 1 else image
+        analysis = self.analyze(preview)
+        if analysis["box"] is not None:
+            left, top, right, bottom = analysis["box"]
+            image = image.crop((int(left * image.width), int(top * image.height),
+                                int(right * image.width + 0.5), int(bottom * image.height + 0.5)))
+        if analysis["grayscale"] and image.mode != "L":
+            image = image.convert("L")
+        side = self.target_side(analysis["line_height"])
+        if max(image.size) > side:
+            image.thumbnail((side, side))
+        return self._fit(image, analysis["flat"])
+
+    def render_pdf_page(self, page) -> tuple:
+        """Render a PyMuPDF page at the zoom, clip and colourspace chosen for it; returns ``(pixmap, flat)``."""
+        import fitz  # PyMuPDF
+
+        if not self.adaptive:
+            return page.get_pixmap(matrix=fitz.Matrix(2, 2)), False  # 2x zoom for clarity
+        rect = page.rect
+        preview_zoom = ANALYSIS_SIDE / max(rect.width, rect.height, 1)
+        with pixmap_image(page.get_pixmap(matrix=fitz.Matrix(preview_zoom, preview_zoom))) as preview:
+            analysis = self.analyze(preview)
+        clip = rect
+        if analysis["box"] is not None:
+            left, top, right, bottom = analysis["box"]
+            clip = fitz.Rect(rect.x0 + left * rect.width, rect.y0 + top * rect.height,
+                             rect.x0 + right * rect.width, rect.y0 + bottom * rect.height)
+        side = self.target_side(analysis["line_height"])
+        zoom = min(MAX_PDF_ZOOM, side / max(clip.width, clip.height, 1))
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip,
+                              colorspace=fitz.csGRAY if analysis["grayscale"] else fitz.csRGB)
+        return pix, analysis["flat"]
+
+    def encode_pdf_page(self, page, timings: dict = None) -> memoryview:
+        """
+        Encoded bytes for a PyMuPDF page. Adds ``pdf_render`` and ``jpeg_encode``
+        seconds to ``timings``.
+
+        The encoder reads the pixmap's samples in place (see :func:`pixmap_image`)
+        instead of copying them out with ``pix.samples``.
+        """
+        started = time.perf_counter()
+        pix, flat = self.render_pdf_page(page)
+        if timings is not None:
+            timings["pdf_render"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with pixmap_image(pix) as image:
+            del pix  # pixmap_image keeps it while shared; an unpacked RGB pixmap is freed before encoding
+            data = self._fit(image, flat) if self.adaptive else self._encoded(self._jpeg, image, self.max_quality)
+        if timings is not None:
+            timings["jpeg_encode"] = time.perf_counter() - started
+        return data
+
+    def _fit(self, image, flat: bool) -> memoryview:
+        """
+        The palette PNG of a flat page if it fits and beats JPEG; otherwise the highest
+        quality (in ``QUALITY_STEP`` steps, found by bisection) whose JPEG fits in
+        ``max_bytes``. If even ``min_quality`` does not fit, shrink the image and search again.
+
+        Candidates are written into two reused buffers (the best fit so far and
+        a scratch one), and the winner is returned as a view, without a copy.
+        """
+        best, scratch = io.BytesIO(), io.BytesIO()
+        qualities = list(range(self.min_quality, self.max_quality, QUALITY_STEP))
+        while True:
+            size = self._jpeg(image, self.max_quality, best)
+            if flat and self._png(image, scratch) <= min(size, self.max_bytes):
+                return scratch.getbuffer()
+            if size <= self.max_bytes:
+                return best.getbuffer()
+            smallest, found, low, high = best, False, 0, len(qualities) - 1
+            while low <= high:
+                mid = (low + high) // 2
+                if self._jpeg(image, qualities[mid], scratch) <= self.max_bytes:
+                    best, scratch, found, low = scratch, best, True, mid + 1
+                else:
+                    smallest, high = scratch, mid - 1  # failures only move to lower qualities
+            if found:
+                return best.getbuffer()
+            side = int(max(image.size) * DOWNSCALE_STEP)
+            if side < self.min_side:
+                return smallest.getbuffer()  # legibility wins over the budget
+            scale = side / max(image.size)
+            image = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))),
+                                 reducing_gap=3.0)
+
+    @staticmethod
+    def _encoded(encode, image, *args) -> memoryview:
+        buffered = io.BytesIO()
+        encode(image, *args, buffered)
+        return buffered.getbuffer()
+
+    @staticmethod
+    def _jpeg(image, quality: int, buffered: io.BytesIO) -> int:
+        """Write a JPEG over the start of ``buffered`` (keeping its allocation); returns its size."""
+        buffered.seek(0)
+        image.save(buffered, format="JPEG", quality=quality)
+        buffered.truncate()
+        return buffered.tell()
+
+    @staticmethod
+    def _png(image, buffered: io.BytesIO) -> int:
+        """Write a 16-grey or 32-colour PNG over the start of ``buffered``; returns its size."""
+        if image.mode == "L":
+            step = 255 / (PNG_GRAY_LEVELS - 1)
+            image = image.point([round(round(v / step) * step) for v in range(256)])
+        else:
+            from PIL import Image
+            image = image.quantize(PNG_COLOURS, method=Image.Quantize.FASTOCTREE)
+        buffered.seek(0)
+        image.save(buffered, format="PNG")
+        buffered.truncate()
+        return buffered.tell()
+
+
+@contextmanager
+def pixmap_image(pix):
+    """
+    A Pillow image over a PyMuPDF pixmap's samples, without the ``pix.samples`` copy.
+
+    Grayscale pixmaps are shared in place (read-only) and kept alive here
+    until the image is closed on exit. RGB is unpacked once, since Pillow
+    stores it as 4 bytes per pixel, and the pixmap is no longer needed: the
+    caller may drop its reference inside the block to free it early.
+    """
+    from PIL import Image
+
+    mode = "L" if pix.n == 1 else "RGB"
+    image = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride, 1)
+    if mode == "RGB":
+        del pix
+    try:
+        yield image
+    finally:
+        image.close()
+
+
+def mime_type(image_b64: str) -> str:
+    """MIME type of a base64 image produced by the encoder (PNG or JPEG)."""
+    return "image/png" if image_b64.startswith("iVBORw0KGgo") else "image/jpeg"
+
+
+image_encoder = ImageEncoder(
+    adaptive=settings.VISION_IMAGE_ADAPTIVE,
+    max_side=settings.VISION_IMAGE_MAX_SIDE,
+    min_side=settings.VISION_IMAGE_MIN_SIDE,
+    max_bytes=settings.VISION_IMAGE_MAX_BYTES,
+    max_quality=settings.VISION_IMAGE_MAX_QUALITY,
+    min_quality=settings.VISION_IMAGE_MIN_QUALITY,
+)
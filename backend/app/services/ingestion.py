@@ -0,0 +1,124 @@
+import asyncio
+import base64
+import binascii
+import codecs
+from typing import List
+from fastapi import HTTPException, UploadFile
+from app.services.file_processor import file_processor
+from app.services.file_store import file_store
+from app.services.metrics import metrics
+from app.services.profiling import note_inputs
+
+# Leading bytes of the formats the file processor understands
+MAGIC_NUMBERS = [
+    (b"%PDF-", "application/pdf"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+]
+TYPE_ALIASES = {"image/jpg": "image/jpeg"}
+TEXT_SNIFF_BYTES = 4096
+LARGE_BASE64 = 1024 * 1024  # inline uploads bigger than this are decoded off the event loop
+
+
+def sniff_type(file_bytes, declared: str = None) -> str:
+    """
+    The MIME type of a file from its leading bytes (PDF, JPEG, PNG, WebP or
+    UTF-8 text). The client-declared type is only used when the content is
+    not recognised, so a mislabelled upload is still processed correctly.
+    """
+    head = bytes(file_bytes[:16])
+    for magic, file_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return file_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    sample = bytes(file_bytes[:TEXT_SNIFF_BYTES])
+    if sample and b"\x00" not in sample:
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)  # tolerates a cut-off last character
+            return "text/plain"
+        except UnicodeDecodeError:
+            pass
+    declared = (declared or "application/octet-stream").lower()
+    return TYPE_ALIASES.get(declared, declared)
+
+
+class IngestionPipeline:
+    """
+    Single entry point for the documents attached to a tool request.
+
+    Inline base64 data, multipart uploads and stored ``file_ids`` all come out
+    as ``(buffer, mime type)`` pairs with the type sniffed from the content.
+    Text extraction and page routing go through :class:`FileProcessor`, so
+    its caching and worker pool apply to every endpoint; files are processed
+    concurrently and the output is assembled in one pass.
+    """
+
+    @staticmethod
+    def _decode_sync(file_b64: str) -> bytes:
+        return base64.b64decode(file_b64.split(',', 1)[1] if ',' in file_b64 else file_b64)
+
+    async def _decode_one(self, file_b64: str) -> bytes:
+        if len(file_b64) > LARGE_BASE64:
+            return await asyncio.to_thread(self._decode_sync, file_b64)
+        return self._decode_sync(file_b64)
+
+    async def decode(self, files_data: List[str], file_types: List[str]) -> list:
+        """Decode base64 uploads (optionally data-URL prefixed) into (bytes, mime type) pairs."""
+        if len(file_types) < len(files_data):
+            raise HTTPException(status_code=400, detail="Invalid files_data/file_types: missing file type")
+        try:
+            with metrics.timed("decode"):
+                decoded = await asyncio.gather(*[self._decode_one(data) for data in files_data])
+        except binascii.Error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid files_data/file_types: {e}")
+        files = [(data, sniff_type(data, file_type)) for data, file_type in zip(decoded, file_types)]
+        note_inputs(files)
+        return files
+
+    async def from_uploads(self, files: List[UploadFile]) -> list:
+        """Multipart uploads as (buffer, mime type) pairs; large files are memory-mapped, not copied."""
+        buffers = [await file_processor.upload_buffer(file) for file in files]
+        uploads = [(buffer, sniff_type(buffer, file.content_type)) for buffer, file in zip(buffers, files)]
+        note_inputs(uploads)
+        return uploads
+
+    async def from_file_ids(self, file_ids: List[str]) -> list:
+        """Files uploaded once via POST /tools/files, as (buffer, mime type) pairs."""
+        opened = await asyncio.gather(*[file_store.open(file_id) for file_id in file_ids])
+        files = [(buffer, sniff_type(buffer, file_type)) for buffer, file_type in opened]
+        note_inputs(files)
+        return files
+
+    async def from_request(self, request) -> list:
+        """All files of a JSON tool request: inline base64 `files_data` plus stored `file_ids`."""
+        inline, stored = await asyncio.gather(
+            self.decode(request.files_data, request.file_types), self.from_file_ids(request.file_ids))
+        return inline + stored
+
+    async def _file_text(self, file_bytes, file_type: str) -> str:
+        try:
+            return await file_processor.extract_text_from_bytes(file_bytes, file_type)
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Error processing file ({file_type}): {e}")
+            return ""
+
+    async def extract_text(self, files: list, headers: bool = True) -> str:
+        """
+        Text of every file, extracted concurrently (OCR for scans and images).
+        With ``headers`` each file is introduced by a ``--- FILE CONTENT (type) ---`` line.
+        """
+        texts = await asyncio.gather(*[self._file_text(b, t) for b, t in files])
+        if not headers:
+            return "\n\n".join(text for text in texts if text)
+        return "".join(f"\n\n--- FILE CONTENT ({file_type}) ---\n{text}\n" for (_, file_type), text in zip(files, texts))
+
+    async def route(self, files: list, max_images: int) -> dict:
+        """Text-first routing for the vision-capable tools; see ``FileProcessor.route_documents``."""
+        with metrics.timed("route"):
+            return await file_processor.route_documents(files, max_images=max_images)
+
+
+ingestion = IngestionPipeline()
@@ -0,0 +1,598 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import closing
+from fastapi import HTTPException
+from app.core.config import settings
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobNotFound(HTTPException):
+    def __init__(self, job_id: str):
+        super().__init__(status_code=404, detail=f"Unknown or expired job: {job_id}")
+
+
+def new_job(kind: str, payload: dict) -> dict:
+    now = time.time()
+    return {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": QUEUED,
+        "payload": payload,
+        "result": None,
+        "error": None,
+        "attempts": 0,
+        "created_at": now,
+        "run_after": now,
+        "started_at": None,
+        "finished_at": None,
+        "lease_until": None,
+    }
+
+
+def public_view(job: dict) -> dict:
+    """A job as returned by the API (without its request payload or lease bookkeeping)."""
+    return {
+        "job_id": job["id"],
+        "tool": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+
+class MemoryJobQueue:
+    """In-process queue; jobs are lost when the process exits."""
+
+    def __init__(self, max_attempts: int):
+        self.max_attempts = max_attempts
+        self.jobs = OrderedDict()
+
+    async def put(self, job: dict):
+        self.jobs[job["id"]] = job
+
+    async def get(self, job_id: str) -> dict:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        return dict(job)
+
+    async def claim(self, lease_seconds: float):
+        """Mark the oldest runnable job as running and return it (None when idle)."""
+        now = time.time()
+        for job in self.jobs.values():
+            if job["status"] == QUEUED and job["run_after"] <= now:
+                job.update(status=RUNNING, attempts=job["attempts"] + 1, started_at=now, lease_until=now + lease_seconds)
+                return dict(job)
+        return None
+
+    async def heartbeat(self, job_id: str, lease_seconds: float) -> bool:
+        """Extend a running job's lease; False if it was cancelled meanwhile."""
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] != RUNNING:
+            return False
+        job["lease_until"] = time.time() + lease_seconds
+        return True
+
+    async def finish(self, job_id: str, status: str, result=None, error=None):
+        job = self.jobs.get(job_id)
+        if job is not None and job["status"] == RUNNING:
+            job.update(status=status, result=result, error=error, finished_at=time.time(), lease_until=None)
+
+    async def retry(self, job_id: str, delay: float, error=None):
+        """Put a running job back in the queue, or fail it once it used up its attempts."""
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] != RUNNING:
+            return
+        if job["attempts"] >= self.max_attempts:
+            await self.finish(job_id, FAILED, error=error)
+        else:
+            job.update(status=QUEUED, run_after=time.time() + delay, lease_until=None)
+
+    async def release(self, job_id: str):
+        """Hand a running job back to the queue without counting the attempt (its worker is shutting down)."""
+        job = self.jobs.get(job_id)
+        if job is not None and job["status"] == RUNNING:
+            job.update(status=QUEUED, attempts=job["attempts"] - 1, run_after=time.time(), lease_until=None)
+
+    async def cancel(self, job_id: str) -> dict:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        if job["status"] not in FINISHED:
+            job.update(status=CANCELLED, finished_at=time.time(), lease_until=None)
+        return dict(job)
+
+    async def purge(self, before: float):
+        for job_id in [j["id"] for j in self.jobs.values() if j["status"] in FINISHED and j["finished_at"] < before]:
+            del self.jobs[job_id]
+
+    async def counts(self) -> dict:
+        counts = {}
+        for job in self.jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+
+class SQLiteJobQueue:
+    """
+    Durable queue in a SQLite file, shared by every worker process on the host.
+
+    A claimed job holds a lease that its worker keeps renewing; if the worker
+    dies (crash, restart, serverless freeze) the lease runs out and any
+    worker picks the job up again, up to ``max_attempts`` times.
+    """
+
+    COLUMNS = ("id", "kind", "status", "payload", "result", "error", "attempts", "created_at", "run_after",
+               "started_at", "finished_at", "lease_until")
+    JSON_COLUMNS = ("payload", "result", "error")
+
+    def __init__(self, path: str, max_attempts: int):
+        self.path = path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT, status TEXT, payload TEXT, "
+                "result TEXT, error TEXT, attempts INTEGER, created_at REAL, run_after REAL, started_at REAL, "
+                "finished_at REAL, lease_until REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_runnable ON jobs (status, run_after)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: calls run on worker threads
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def _row_to_job(self, row) -> dict:
+        job = dict(zip(self.COLUMNS, row))
+        for column in self.JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job[column] is not None else None
+        return job
+
+    def _select(self, db, job_id: str):
+        row = db.execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def _put_sync(self, job: dict):
+        values = [json.dumps(job[c]) if c in self.JSON_COLUMNS and job[c] is not None else job[c] for c in self.COLUMNS]
+        with closing(self._connect()) as db:
+            db.execute(f"INSERT INTO jobs VALUES ({', '.join('?' * len(self.COLUMNS))})", values)
+
+    def _get_sync(self, job_id: str) -> dict:
+        with closing(self._connect()) as db:
+            job = self._select(db, job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        return job
+
+    def _claim_sync(self, lease_seconds: float):
+        now = time.time()
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")  # one claimer at a time across processes
+            # Jobs whose worker stopped renewing the lease are abandoned: fail or re-run them
+            db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, lease_until = NULL, error = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, now, json.dumps({"status_code": 500, "detail": "Job worker stopped responding"}),
+                 RUNNING, now, self.max_attempts),
+            )
+            db.execute("UPDATE jobs SET status = ?, lease_until = NULL WHERE status = ? AND lease_until < ?",
+                       (QUEUED, RUNNING, now))
+            row = db.execute(
+                "SELECT id FROM jobs WHERE status = ? AND run_after <= ? ORDER BY created_at LIMIT 1", (QUEUED, now)
+            ).fetchone()
+            job = None
+            if row:
+                db.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, lease_until = ? WHERE id = ?",
+                    (RUNNING, now, now + lease_seconds, row[0]),
+                )
+                job = self._select(db, row[0])
+            db.execute("COMMIT")
+            return job
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def _update_sync(self, sql: str, params: tuple) -> int:
+        with closing(self._connect()) as db:
+            return db.execute(sql, params).rowcount
+
+    def _counts_sync(self) -> dict:
+        with closing(self._connect()) as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    async def put(self, job: dict):
+        await asyncio.to_thread(self._put_sync, job)
+
+    async def get(self, job_id: str) -> dict:
+        return await asyncio.to_thread(self._get_sync, job_id)
+
+    async def claim(self, lease_seconds: float):
+        return await asyncio.to_thread(self._claim_sync, lease_seconds)
+
+    async def heartbeat(self, job_id: str, lease_seconds: float) -> bool:
+        updated = await asyncio.to_thread(
+            self._update_sync, "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ?",
+            (time.time() + lease_seconds, job_id, RUNNING))
+        return updated > 0
+
+    async def finish(self, job_id: str, status: str, result=None, error=None):
+        await asyncio.to_thread(
+            self._update_sync,
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL "
+            "WHERE id = ? AND status = ?",
+            (status, json.dumps(result) if result is not None else None,
+             json.dumps(error) if error is not None else None, time.time(), job_id, RUNNING))
+
+    async def retry(self, job_id: str, delay: float, error=None):
+        job = await self.get(job_id)
+        if job["status"] != RUNNING:
+            return
+        if job["attempts"] >= self.max_attempts:
+            await self.finish(job_id, FAILED, error=error)
+        else:
+            await asyncio.to_thread(
+                self._update_sync, "UPDATE jobs SET status = ?, run_after = ?, lease_until = NULL WHERE id = ? AND status = ?",
+                (QUEUED, time.time() + delay, job_id, RUNNING))
+
+    async def release(self, job_id: str):
+        await asyncio.to_thread(
+            self._update_sync,
+            "UPDATE jobs SET status = ?, attempts = attempts - 1, run_after = ?, lease_until = NULL "
+            "WHERE id = ? AND status = ?",
+            (QUEUED, time.time(), job_id, RUNNING))
+
+    async def cancel(self, job_id: str) -> dict:
+        await asyncio.to_thread(
+            self._update_sync,
+            "UPDATE jobs SET status = ?, finished_at = ?, lease_until = NULL WHERE id = ? AND status IN (?, ?)",
+            (CANCELLED, time.time(), job_id, QUEUED, RUNNING))
+        return await self.get(job_id)
+
+    async def purge(self, before: float):
+        await asyncio.to_thread(
+            self._update_sync, "DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished_at < ?", (*FINISHED, before))
+
+    async def counts(self) -> dict:
+        return await asyncio.to_thread(self._counts_sync)
+
+
+class RedisJobQueue:
+    """
+    Durable queue in Redis, shared by API and worker processes on any host.
+    Requires the `redis` package.
+
+    Each job is a hash; sorted sets index the queued jobs (by ``run_after``),
+    the running ones (by ``lease_until``) and the finished ones per status
+    (by ``finished_at``). Every state change is a Lua script, so claims are
+    atomic across workers. Leases work as in :class:`SQLiteJobQueue`.
+    """
+
+    FIELDS = SQLiteJobQueue.COLUMNS
+    NUMBER_FIELDS = ("created_at", "run_after", "started_at", "finished_at", "lease_until")
+    JSON_FIELDS = ("payload", "result", "error")
+
+    CLAIM = """
+        local prefix, now = ARGV[1], tonumber(ARGV[2])
+        -- Jobs whose worker stopped renewing the lease are abandoned: fail or re-run them
+        for _, id in ipairs(redis.call('ZRANGEBYSCORE', prefix .. 'running', '-inf', '(' .. ARGV[2])) do
+            local key = prefix .. 'job:' .. id
+            redis.call('ZREM', prefix .. 'running', id)
+            if redis.call('EXISTS', key) == 1 then
+                redis.call('HDEL', key, 'lease_until')
+                if tonumber(redis.call('HGET', key, 'attempts')) >= tonumber(ARGV[4]) then
+                    redis.call('HSET', key, 'status', 'failed', 'finished_at', ARGV[2], 'error', ARGV[5])
+                    redis.call('ZADD', prefix .. 'failed', ARGV[2], id)
+                else
+                    redis.call('HSET', key, 'status', 'queued')
+                    redis.call('ZADD', prefix .. 'queued', redis.call('HGET', key, 'run_after'), id)
+                end
+            end
+        end
+        local ids = redis.call('ZRANGEBYSCORE', prefix .. 'queued', '-inf', ARGV[2], 'LIMIT', 0, 1)
+        if #ids == 0 then
+            return false
+        end
+        local key = prefix .. 'job:' .. ids[1]
+        redis.call('ZREM', prefix .. 'queued', ids[1])
+        redis.call('HINCRBY', key, 'attempts', 1)
+        redis.call('HSET', key, 'status', 'running', 'started_at', ARGV[2], 'lease_until', ARGV[3])
+        redis.call('ZADD', prefix .. 'running', ARGV[3], ids[1])
+        return redis.call('HGETALL', key)
+    """
+    HEARTBEAT = """
+        local key = ARGV[1] .. 'job:' .. ARGV[2]
+        if redis.call('HGET', key, 'status') ~= 'running' then
+            return 0
+        end
+        redis.call('HSET', key, 'lease_until', ARGV[3])
+        redis.call('ZADD', ARGV[1] .. 'running', ARGV[3], ARGV[2])
+        return 1
+    """
+    FINISH = """
+        local key = ARGV[1] .. 'job:' .. ARGV[2]
+        if redis.call('HGET', key, 'status') ~= 'running' then
+            return 0
+        end
+        redis.call('ZREM', ARGV[1] .. 'running', ARGV[2])
+        redis.call('HDEL', key, 'lease_until', 'result', 'error')
+        redis.call('HSET', key, 'status', ARGV[3], 'finished_at', ARGV[4])
+        if ARGV[5] ~= '' then redis.call('HSET', key, 'result', ARGV[5]) end
+        if ARGV[6] ~= '' then redis.call('HSET', key, 'error', ARGV[6]) end
+        redis.call('ZADD', ARGV[1] .. ARGV[3], ARGV[4], ARGV[2])
+        return 1
+    """
+    REQUEUE = """
+        local key = ARGV[1] .. 'job:' .. ARGV[2]
+        if redis.call('HGET', key, 'status') ~= 'running' then
+            return 0
+        end
+        redis.call('ZREM', ARGV[1] .. 'running', ARGV[2])
+        redis.call('HDEL', key, 'lease_until')
+        redis.call('HINCRBY', key, 'attempts', -tonumber(ARGV[4]))
+        redis.call('HSET', key, 'status', 'queued', 'run_after', ARGV[3])
+        redis.call('ZADD', ARGV[1] .. 'queued', ARGV[3], ARGV[2])
+        return 1
+    """
+    CANCEL = """
+        local key = ARGV[1] .. 'job:' .. ARGV[2]
+        local status = redis.call('HGET', key, 'status')
+        if status ~= 'queued' and status ~= 'running' then
+            return 0
+        end
+        redis.call('ZREM', ARGV[1] .. status, ARGV[2])
+        redis.call('HDEL', key, 'lease_until')
+        redis.call('HSET', key, 'status', 'cancelled', 'finished_at', ARGV[3])
+        redis.call('ZADD', ARGV[1] .. 'cancelled', ARGV[3], ARGV[2])
+        return 1
+    """
+    PURGE = """
+        for _, status in ipairs({'done', 'failed', 'cancelled'}) do
+            local index = ARGV[1] .. status
+            for _, id in ipairs(redis.call('ZRANGEBYSCORE', index, '-inf', '(' .. ARGV[2])) do
+                redis.call('DEL', ARGV[1] .. 'job:' .. id)
+            end
+            redis.call('ZREMRANGEBYSCORE', index, '-inf', '(' .. ARGV[2])
+        end
+        return 0
+    """
+
+    def __init__(self, url: str, max_attempts: int, prefix: str = "edugen:jobs:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise Exception("JOB_QUEUE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self.client = redis.from_url(url, decode_responses=True)
+        self.max_attempts = max_attempts
+        self.prefix = prefix
+        self.scripts = {name: self.client.register_script(getattr(self, name))
+                        for name in ("CLAIM", "HEARTBEAT", "FINISH", "REQUEUE", "CANCEL", "PURGE")}
+
+    def _hash_to_job(self, fields: dict) -> dict:
+        job = {}
+        for field in self.FIELDS:
+            value = fields.get(field)
+            if value is not None and field in self.JSON_FIELDS:
+                value = json.loads(value)
+            elif value is not None and field in self.NUMBER_FIELDS:
+                value = float(value)
+            elif field == "attempts":
+                value = int(value or 0)
+            job[field] = value
+        return job
+
+    @staticmethod
+    def _json(value) -> str:
+        return json.dumps(value) if value is not None else ""
+
+    async def _run(self, script: str, *args):
+        return await self.scripts[script](args=[self.prefix, *args])
+
+    async def put(self, job: dict):
+        fields = {field: json.dumps(value) if field in self.JSON_FIELDS else repr(value) if isinstance(value, float) else value
+                  for field, value in job.items() if value is not None}
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(f"{self.prefix}job:{job['id']}", mapping=fields)
+            pipe.zadd(f"{self.prefix}{QUEUED}", {job["id"]: job["run_after"]})
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> dict:
+        fields = await self.client.hgetall(f"{self.prefix}job:{job_id}")
+        if not fields:
+            raise JobNotFound(job_id)
+        return self._hash_to_job(fields)
+
+    async def claim(self, lease_seconds: float):
+        now = time.time()
+        fields = await self._run("CLAIM", repr(now), repr(now + lease_seconds), self.max_attempts,
+                                 json.dumps({"status_code": 500, "detail": "Job worker stopped responding"}))
+        return self._hash_to_job(dict(zip(fields[::2], fields[1::2]))) if fields else None
+
+    async def heartbeat(self, job_id: str, lease_seconds: float) -> bool:
+        return await self._run("HEARTBEAT", job_id, repr(time.time() + lease_seconds)) == 1
+
+    async def finish(self, job_id: str, status: str, result=None, error=None):
+        await self._run("FINISH", job_id, status, repr(time.time()), self._json(result), self._json(error))
+
+    async def retry(self, job_id: str, delay: float, error=None):
+        job = await self.get(job_id)
+        if job["status"] != RUNNING:
+            return
+        if job["attempts"] >= self.max_attempts:
+            await self.finish(job_id, FAILED, error=error)
+        else:
+            await self._run("REQUEUE", job_id, repr(time.time() + delay), 0)
+
+    async def release(self, job_id: str):
+        await self._run("REQUEUE", job_id, repr(time.time()), 1)
+
+    async def cancel(self, job_id: str) -> dict:
+        await self._run("CANCEL", job_id, repr(time.time()))
+        return await self.get(job_id)
+
+    async def purge(self, before: float):
+        await self._run("PURGE", repr(before))
+
+    async def counts(self) -> dict:
+        statuses = (QUEUED, RUNNING, *FINISHED)
+        async with self.client.pipeline(transaction=False) as pipe:
+            for status in statuses:
+                pipe.zcard(self.prefix + status)
+            sizes = await pipe.execute()
+        return {status: size for status, size in zip(statuses, sizes) if size}
+
+
+class JobRunner:
+    """
+    Runs queued tool calls on ``workers`` local asyncio workers.
+
+    Handlers are registered per job kind and called as
+    ``await handler(payload)``; what they return is stored as the job result.
+    An ``HTTPException`` fails the job with its status and detail, except a
+    503 (quota, open breakers, busy file workers), which puts the job back in
+    the queue until its Retry-After has passed. Workers wake up at once for
+    jobs submitted in this process and poll the queue every
+    ``poll_interval`` seconds for jobs submitted elsewhere.
+    """
+
+    def __init__(self, queue, workers: int, lease_seconds: float, poll_interval: float, ttl_seconds: float):
+        self.queue = queue
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.ttl_seconds = ttl_seconds
+        self.handlers = {}
+        self.running = {}  # job id -> task, for jobs executing in this process
+        self._tasks = []
+        self._wake = None
+        self._stopping = False
+        self._purged_at = 0.0
+
+    def register(self, kind: str, handler):
+        self.handlers[kind] = handler
+
+    async def submit(self, kind: str, payload: dict) -> dict:
+        if kind not in self.handlers:
+            raise HTTPException(status_code=400, detail=f"Unknown job type: {kind}")
+        job = new_job(kind, payload)
+        await self.queue.put(job)
+        if self._wake is not None:
+            self._wake.set()
+        return job
+
+    async def cancel(self, job_id: str) -> dict:
+        job = await self.queue.cancel(job_id)
+        task = self.running.get(job_id)
+        if task is not None:
+            task.cancel()
+        return job
+
+    def start(self):
+        """Start the local workers (call from the app's event loop, e.g. at startup)."""
+        if self._tasks or self.workers <= 0:
+            return
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self):
+        while True:
+            try:
+                if time.time() - self._purged_at > 60:
+                    self._purged_at = time.time()
+                    await self.queue.purge(before=time.time() - self.ttl_seconds)
+                job = await self.queue.claim(self.lease_seconds)
+            except Exception as e:
+                print(f"ERROR: Job queue unavailable: {e}")
+                job = None
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: dict):
+        print(f"DEBUG: Running job {job['id']} ({job['kind']}, attempt {job['attempts']})")
+        task = asyncio.create_task(self.handlers[job["kind"]](job["payload"]))
+        self.running[job["id"]] = task
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"], task))
+        try:
+            result = await task
+            await self.queue.finish(job["id"], DONE, result=result)
+        except asyncio.CancelledError:
+            if self._stopping:
+                # Hand the job straight back to the queue instead of waiting for its lease to expire;
+                # a shutdown is not the job's fault, so the attempt is not counted
+                await self.queue.release(job["id"])
+                raise
+        except HTTPException as e:
+            error = {"status_code": e.status_code, "detail": e.detail}
+            if e.status_code == 503:
+                await self.queue.retry(job["id"], delay=float((e.headers or {}).get("Retry-After", 1)), error=error)
+            else:
+                await self.queue.finish(job["id"], FAILED, error=error)
+        except Exception as e:
+            print(f"ERROR: Job {job['id']} failed: {e}")
+            await self.queue.finish(job["id"], FAILED, error={"status_code": 500, "detail": str(e)})
+        finally:
+            heartbeat.cancel()
+            self.running.pop(job["id"], None)
+
+    async def _heartbeat(self, job_id: str, task: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await self.queue.heartbeat(job_id, self.lease_seconds):
+                task.cancel()  # cancelled from another worker
+                return
+
+    async def stats(self) -> dict:
+        return {
+            "backend": settings.JOB_QUEUE_BACKEND,
+            "workers": len(self._tasks),
+            "running_here": len(self.running),
+            "jobs": await self.queue.counts(),
+        }
+
+
+def _build_queue():
+    if settings.JOB_QUEUE_BACKEND == "redis":
+        return RedisJobQueue(settings.JOB_QUEUE_REDIS_URL, max_attempts=settings.JOB_MAX_ATTEMPTS)
+    if settings.JOB_QUEUE_BACKEND == "sqlite":
+        path = settings.JOB_QUEUE_PATH or os.path.join(tempfile.gettempdir(), "edugen-jobs.sqlite3")
+        return SQLiteJobQueue(path, max_attempts=settings.JOB_MAX_ATTEMPTS)
+    return MemoryJobQueue(max_attempts=settings.JOB_MAX_ATTEMPTS)
+
+
+job_runner = JobRunner(
+    queue=_build_queue(),
+    workers=settings.JOB_WORKERS,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    ttl_seconds=settings.JOB_TTL_SECONDS,
+)
@@ -0,0 +1,277 @@
+import json
+import re
+
+OPENERS = {"[": "]", "{": "}"}
+SMART_QUOTES = {"“": "”"}
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+LITERAL_PATTERN = re.compile(r"\b(True|False|None)\b")
+OBJECT_ARRAY_PATTERN = re.compile(r"\[\s*\{")
+STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix the defects LLMs commonly leave in JSON: comments, trailing commas,
+    raw newlines inside strings, curly quotes used as delimiters, Python
+    literals (True/False/None) and output cut off mid-document (unclosed
+    strings and brackets; an incomplete last element is dropped, so a
+    half-written item never comes back with made-up closing quotes).
+    """
+    out = []
+    stack = []
+    safe_points = []  # (len(out), stack) before the first or after a complete element: where a truncated document can be cut
+    in_string, closer, escape = False, None, False
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+                out.append(ch)
+            elif ch == "\\":
+                escape = True
+                out.append(ch)
+            elif ch == closer or ch == '"':
+                in_string = False
+                out.append('"')
+            else:
+                out.append(STRING_ESCAPES.get(ch, ch))
+            i += 1
+            continue
+
+        if ch == '"' or ch in SMART_QUOTES:
+            in_string, closer = True, SMART_QUOTES.get(ch, '"')
+            out.append('"')
+        elif text.startswith("//", i):
+            i = text.find("\n", i)
+            i = n if i < 0 else i
+            continue
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            continue
+        elif ch in OPENERS:
+            stack.append(OPENERS[ch])
+            out.append(ch)
+            safe_points.append((len(out), tuple(stack)))
+        elif ch in "]}":
+            _drop_trailing_comma(out)
+            if stack and stack[-1] == ch:
+                stack.pop()
+            out.append(ch)
+            safe_points.append((len(out), tuple(stack)))
+        elif ch == ",":
+            safe_points.append((len(out), tuple(stack)))
+            out.append(ch)
+        elif ch in "TFN" and (match := LITERAL_PATTERN.match(text, i)) and (i == 0 or not text[i - 1].isalnum()):
+            out.append(PYTHON_LITERALS[match.group(1)])
+            i = match.end()
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    if not in_string and not stack:
+        return "".join(out)
+
+    # Truncated: cut back to the last complete element of the outermost open
+    # array (the item list; a cut inside the unfinished item would keep half
+    # of it), else to the last complete value; close what is open only if
+    # neither parses
+    arrays = [depth for depth, closer in enumerate(stack, 1) if closer == "]"]
+    in_array = tuple(stack[:arrays[0]]) if arrays else None
+    item_points = [point for point in safe_points if point[1] == in_array]
+    for length, open_stack in [*reversed(item_points[-8:]), *reversed(safe_points[-8:])]:
+        closed = _close("".join(out[:length]), list(open_stack))
+        if _parses(closed):
+            return closed
+    if escape:
+        out.pop()
+    return _close("".join(out) + ('"' if in_string else ""), stack)
+
+
+def _drop_trailing_comma(out: list):
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+
+
+def _close(text: str, stack: list) -> str:
+    text = text.rstrip()
+    while text.endswith((",", ":")):
+        text = text[:-1].rstrip()
+    return text + "".join(reversed(stack))
+
+
+def _parses(text: str) -> bool:
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
+
+
+def loads_lenient(text: str):
+    """``json.loads``, retried once on the repaired text. Raises ``ValueError`` if both fail."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(repair_json(text))
+
+
+def _outermost_span(text: str, start: int) -> str:
+    """The bracketed value starting at ``start`` (to the end of the text if it never closes)."""
+    depth, in_string, escape = 0, False, False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in OPENERS:
+            depth += 1
+        elif ch in "]}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def extract_json(text: str):
+    """
+    Parse the JSON value in an LLM response, ignoring surrounding prose and
+    markdown fences: the outermost array or object is located, then parsed
+    (repaired if needed). Raises ``ValueError`` when no JSON can be recovered.
+
+    The first object or array of objects wins, so a bracket in the prose
+    (e.g. "Here are [5] questions:") is skipped; a bare array such as
+    ``[1, 2]`` is only tried when neither parses.
+    """
+    match = OBJECT_ARRAY_PATTERN.search(text)
+    starts = sorted({i for i in (match.start() if match else -1, text.find("{")) if i >= 0})
+    bare = text.find("[")
+    if bare >= 0 and bare not in starts:
+        starts.append(bare)  # an array of scalars, tried last
+    if not starts:
+        raise ValueError("No JSON array or object in response")
+    for start in starts[:-1]:
+        try:
+            return loads_lenient(_outermost_span(text, start))
+        except ValueError:
+            pass
+    return loads_lenient(_outermost_span(text, starts[-1]))
+
+
+def extract_json_array(text: str) -> list:
+    """
+    Like :func:`extract_json` for responses that should be an array of
+    objects: one wrapped in an object (e.g. ``{"title": ..., "questions": [...]}``)
+    is unwrapped to its first list of objects, and a lone object is returned
+    as a one-item array.
+    """
+    data = extract_json(text)
+    if isinstance(data, dict):
+        lists = [value for value in data.values() if isinstance(value, list)]
+        for value in lists:
+            if value and isinstance(value[0], dict):
+                return value
+        return lists[0] if len(lists) == 1 and not lists[0] else [data]
+    if not isinstance(data, list):
+        raise ValueError("Response is not a JSON array")
+    return data
+
+
+class JsonItemStream:
+    """
+    Incremental extractor for the elements of a JSON array in streamed text.
+
+    Feed the response as it arrives; :meth:`feed` returns each element of
+    the first array of objects in the output (a top-level array, or one
+    nested in a wrapper object such as ``{"questions": [...]}``) as soon as
+    its closing bracket has been seen. Prose and fences around the JSON are
+    ignored, and so is an array whose first element is not an object (e.g.
+    "[5]" in the prose, or a ``"tags": [...]`` field before the items).
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.array_depth = None  # depth inside the item array
+        self.first_item = False  # the item array is a candidate until its first element shows it holds objects
+        self.item_start = None
+        self.in_string = False
+        self.escape = False
+        self.finished = False
+        self.emitted = 0
+        self.skipped = 0  # elements that could not be parsed even after repair
+
+    def feed(self, chunk: str) -> list:
+        self.buffer += chunk
+        items = []
+        text = self.buffer
+        for i in range(self.pos, len(text)):
+            if self.finished:
+                break
+            ch = text[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+            if self.depth == 0 and ch not in OPENERS:
+                continue  # prose before the JSON
+            at_items = self.array_depth is not None and self.depth == self.array_depth
+
+            if at_items and self.item_start is None and self.first_item and not ch.isspace() and ch != "]":
+                self.first_item = False
+                if ch != "{":
+                    self.array_depth = None  # not an array of objects: look for the next array
+                    at_items = False
+
+            if ch == '"':
+                self.in_string = True
+                if at_items and self.item_start is None:
+                    self.item_start = i
+            elif ch in OPENERS:
+                if at_items and self.item_start is None:
+                    self.item_start = i
+                self.depth += 1
+                if ch == "[" and self.array_depth is None:
+                    self.array_depth = self.depth
+                    self.first_item = True
+            elif ch in "]}":
+                if at_items and self.first_item:
+                    self.array_depth = None  # an empty array: keep looking
+                elif at_items:
+                    self._emit(text, i, items)  # a pending scalar last item
+                    self.finished = True  # the item array closed
+                self.depth -= 1
+                if self.array_depth is not None and self.depth == self.array_depth and self.item_start is not None:
+                    self._emit(text, i + 1, items)
+            elif ch == "," and at_items:
+                self._emit(text, i, items)
+            elif at_items and self.item_start is None and not ch.isspace():
+                self.item_start = i
+        self.pos = len(text)
+        return items
+
+    def _emit(self, text: str, end: int, items: list):
+        if self.item_start is None:
+            return
+        item_text, self.item_start = text[self.item_start:end], None
+        try:
+            items.append(loads_lenient(item_text))
+            self.emitted += 1
+        except ValueError:
+            self.skipped += 1
@@ -0,0 +1,112 @@
+import asyncio
+from app.core.config import settings
+from app.core.prompts import CHUNK_NOTES_PROMPT
+from app.services.groq_service import groq_service
+from app.services.token_budget import token_budget
+
+
+class MapReduceService:
+    """
+    Hierarchical map-reduce over documents that don't fit in one prompt.
+
+    Content is split into token-budgeted chunks on paragraph/line/sentence
+    boundaries, and one completion runs per chunk with at most
+    ``concurrency`` in flight, so a long document takes roughly as long as
+    its slowest chunk (chunk calls are hedged when hedging is enabled). :meth:`condense` turns a document into ordered notes
+    for a final reduce prompt, repeating the map step while the notes are
+    still over budget.
+    """
+
+    SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+    def __init__(self, chunk_tokens: int, threshold_tokens: int, concurrency: int, max_depth: int = 3):
+        self.chunk_tokens = chunk_tokens
+        self.threshold_tokens = threshold_tokens
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+
+    def needs_map_reduce(self, text: str) -> bool:
+        return token_budget.count_tokens(text) > self.threshold_tokens
+
+    def split(self, text: str) -> list[str]:
+        """
+        Split text into chunks of about ``chunk_tokens`` (sized in characters at
+        ~4 per token), cutting at the coarsest boundary available.
+        """
+        max_chars = self.chunk_tokens * 4
+        chunks, current = [], ""
+        for piece in self._pieces(text, max_chars, self.SEPARATORS):
+            if current and len(current) + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current += piece
+        if current.strip():
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def _pieces(text: str, max_chars: int, separators: tuple):
+        if len(text) <= max_chars:
+            yield text
+            return
+        if not separators:
+            for start in range(0, len(text), max_chars):
+                yield text[start:start + max_chars]
+            return
+        parts = text.split(separators[0])
+        for idx, part in enumerate(parts):
+            if idx < len(parts) - 1:
+                part += separators[0] # keep the separator so chunks join back losslessly
+            yield from MapReduceService._pieces(part, max_chars, separators[1:])
+
+    async def map_chunks(self, chunks: list[str], make_messages, model: str = None):
+        """
+        Run ``make_messages(index, chunk)`` through the model for every chunk
+        with bounded concurrency, yielding the results in chunk order as soon
+        as each one (and everything before it) is done.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(idx, chunk):
+            async with semaphore:
+                return await groq_service.get_chat_response(make_messages(idx, chunk), model=model, hedge="map-reduce")
+
+        tasks = [asyncio.create_task(run(idx, chunk)) for idx, chunk in enumerate(chunks)]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel() # don't leave chunk completions running if the caller gives up
+
+    async def map(self, chunks: list[str], make_messages, model: str = None) -> list[str]:
+        return [result async for result in self.map_chunks(chunks, make_messages, model)]
+
+    async def condense(self, text: str, model: str = None, focus_area: str = "general", force: bool = False, depth: int = 0) -> str:
+        """
+        Map step of a summarisation: return ``text`` unchanged if it fits the
+        budget (unless ``force``), otherwise ordered per-chunk notes that do.
+        """
+        if not force and not self.needs_map_reduce(text):
+            return text
+
+        chunks = self.split(text)
+        print(f"DEBUG: Map-reduce level {depth}: {len(chunks)} chunks, ~{token_budget.count_tokens(text)} tokens")
+        notes = await self.map(chunks, lambda idx, chunk: [{"role": "user", "content": CHUNK_NOTES_PROMPT.format(
+            part=idx + 1,
+            total=len(chunks),
+            focus_area=focus_area,
+            content=chunk
+        )}], model=model)
+
+        merged = "\n\n".join(f"[Part {idx + 1} of {len(notes)}]\n{note}" for idx, note in enumerate(notes))
+        if self.needs_map_reduce(merged) and depth + 1 < self.max_depth and len(chunks) > 1:
+            return await self.condense(merged, model=model, focus_area=focus_area, depth=depth + 1)
+        return merged
+
+
+map_reduce_service = MapReduceService(
+    chunk_tokens=settings.MAP_REDUCE_CHUNK_TOKENS,
+    threshold_tokens=settings.MAP_REDUCE_THRESHOLD_TOKENS,
+    concurrency=settings.MAP_REDUCE_CONCURRENCY,
+)
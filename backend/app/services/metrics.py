@@ -0,0 +1,235 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.core.config import settings
+
+# Upper bounds in seconds; covers a base64 decode (ms) up to a long vision completion (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.registry = registry  # recording is skipped while the registry is disabled
+        self._values = {}
+        self._lock = threading.Lock()
+
+    @property
+    def recording(self) -> bool:
+        return self.registry is None or self.registry.enabled
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. upstream tokens or fallbacks."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not self.recording:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(v)}" for key, v in values]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. calls in flight."""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the enclosed block as in flight."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of durations (or sizes), bucketed as in Prometheus: buckets are cumulative."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS,
+                 registry=None):
+        super().__init__(name, documentation, labels, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        if not self.recording:
+            return
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[0][i] += 1
+            counts[1] += value
+            counts[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            values = [(key, list(buckets), total, count) for key, (buckets, total, count) in self._values.items()]
+        lines = []
+        for key, buckets, total, count in values:
+            for bound, n in zip(self.buckets, buckets):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {n}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class _Collected(_Metric):
+    """Metric read from another component's counters when /metrics is scraped."""
+
+    def __init__(self, name: str, kind: str, documentation: str, labels: tuple, fn):
+        super().__init__(name, documentation, labels)
+        self.kind = kind
+        self.fn = fn
+
+    def render(self) -> list:
+        try:
+            samples = list(self.fn())
+        except Exception as e:
+            print(f"ERROR: metrics collector {self.name} failed: {e}")
+            return []
+        return [f"{self.name}{_format_labels(self.labels, tuple(key))} {_format_value(value)}" for key, value in samples]
+
+
+class RequestTimings:
+    """Time spent per stage while serving one request, reported in its Server-Timing header."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}  # stage -> seconds, summed when a stage runs several times or in parallel
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def header(self) -> str:
+        entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+# Timings of the request being served; set by the middleware in main.py
+request_timings: ContextVar[RequestTimings] = ContextVar("request_timings", default=None)
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics in the Prometheus text format, served at ``/metrics``.
+
+    Each worker process keeps its own registry (scrape every worker, or sum
+    them in Prometheus). Pipeline stages are timed with :meth:`timed`, which
+    also adds the duration to the current request's Server-Timing header.
+    Components that already keep counters (caches, single-flight, worker
+    pool) are exposed through :meth:`collector` instead of counting twice.
+    While ``enabled`` is off, nothing is recorded: stage timings, counters,
+    gauges and histograms all skip the update.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: tuple = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels, registry=self))
+
+    def gauge(self, name: str, documentation: str, labels: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels, registry=self))
+
+    def histogram(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets, registry=self))
+
+    def collector(self, name: str, kind: str, documentation: str, labels: tuple = ()):
+        """Decorator: ``fn()`` returns ``[(label values, value), ...]`` at scrape time."""
+        def register(fn):
+            self._register(_Collected(name, kind, documentation, labels, fn))
+            return fn
+        return register
+
+    def record_stage(self, stage: str, seconds: float):
+        """Record a stage timed elsewhere (e.g. inside a worker process)."""
+        if not self.enabled:
+            return
+        stage_seconds.observe(seconds, stage=stage)
+        timings = request_timings.get()
+        if timings is not None:
+            timings.add(stage, seconds)
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Time the enclosed block as pipeline ``stage``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - started)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.header() + metric.render()
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(enabled=settings.METRICS_ENABLED)
+
+# Shared metrics, recorded by the services and the HTTP middleware
+stage_seconds = metrics.histogram(
+    "edugen_stage_seconds", "Time per pipeline stage (decode, pdf_render, jpeg_encode, ocr, llm, ...)", ("stage",))
+http_request_seconds = metrics.histogram(
+    "edugen_http_request_seconds", "HTTP request duration, until the last body chunk is sent (streams included)",
+    ("method", "route", "status"))
+http_in_flight = metrics.gauge("edugen_http_requests_in_flight", "HTTP requests being served")
+upstream_seconds = metrics.histogram(
+    "edugen_upstream_seconds", "Groq completion latency per model (time to first token when streaming)",
+    ("model", "outcome"))
+upstream_tokens = metrics.counter(
+    "edugen_upstream_tokens_total", "Tokens sent to and received from Groq per model", ("model", "kind"))
+upstream_in_flight = metrics.gauge("edugen_upstream_in_flight", "Groq calls in flight per model", ("model",))
+model_fallbacks = metrics.counter(
+    "edugen_model_fallbacks_total", "Failed model attempts that fell back to the next model", ("model",))
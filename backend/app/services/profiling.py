@@ -0,0 +1,223 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import tempfile
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+from app.core.config import settings
+from app.services.cache import artifact_cache
+
+PROFILE_HEADER = "X-Profile"
+TOP_FUNCTIONS = 30  # functions listed in the JSON summary next to each .prof file
+ABANDONED_SECONDS = 600  # a profile still open this long lost its response (e.g. the client left before it started)
+
+
+class _WorkerStats:
+    """Source for ``pstats.Stats.add`` holding a profile captured on a file worker."""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def run_profiled(fn, *args, **kwargs) -> tuple:
+    """
+    Run ``fn`` under cProfile on a worker thread or process.
+    Returns ``(result, raw stats)``; stats is None if another profiler is active there.
+    """
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:  # Python 3.12+ allows one profiler per interpreter
+        return fn(*args, **kwargs), None
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        profile.disable()
+    profile.create_stats()
+    return result, profile.stats
+
+
+class ProfileSession:
+    """CPU profile of one request: its event-loop work plus the file-worker jobs it submitted."""
+
+    def __init__(self, reason: str, method: str, path: str):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.reason = reason  # requested (X-Profile header) or sampled
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.profile = cProfile.Profile()
+        self.worker_stats = []
+        self.inputs = []
+        self.running = False
+
+    def start(self):
+        try:
+            self.profile.enable()
+            self.running = True
+        except ValueError as e:
+            print(f"DEBUG: Profiling unavailable for this request: {e}")
+
+    def stop(self) -> float:
+        if self.running:
+            self.profile.disable()
+            self.running = False
+        return time.perf_counter() - self.started
+
+    def add_worker_stats(self, stats: Optional[dict]):
+        if stats:
+            self.worker_stats.append(_WorkerStats(stats))
+
+    def note_inputs(self, files: list):
+        for buffer, file_type in files:
+            self.inputs.append({"digest": artifact_cache.digest(buffer), "type": file_type, "bytes": len(buffer)})
+
+    def stats(self) -> Optional[pstats.Stats]:
+        sources = ([self.profile] if self.profile.getstats() else []) + self.worker_stats
+        if not sources:
+            return None
+        stats = pstats.Stats(sources[0])
+        for source in sources[1:]:
+            stats.add(source)
+        return stats
+
+
+# Profile of the request being served; set by the middleware in main.py
+current_profile: ContextVar[ProfileSession] = ContextVar("current_profile", default=None)
+
+
+class RequestProfiler:
+    """
+    Opt-in CPU profiling of individual requests.
+
+    A request is profiled when it sends ``X-Profile: <PROFILING_TOKEN>``, or
+    at random with probability ``sample_rate``. Requested profiles are always
+    written to ``directory``; sampled ones only when the request took at
+    least ``slow_seconds``. Each dump is a ``.prof`` file (open it with
+    ``python -m pstats`` or snakeviz) plus a ``.json`` summary with the route,
+    status, stage timings, the top functions and the SHA-256 of every
+    uploaded file, so the offending document can be found again.
+
+    cProfile hooks the whole event-loop thread, so at most one request is
+    profiled at a time and work of concurrent requests may appear in it.
+    """
+
+    def __init__(self, enabled: bool, sample_rate: float, slow_seconds: float, token: Optional[str],
+                 directory: str, max_files: int):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.token = token
+        self.directory = directory
+        self.max_files = max_files
+        self._session = None
+        self.profiled = 0
+        self.dumped = 0
+        self.skipped = 0  # wanted a profile while another request was being profiled
+
+    def begin(self, method: str, path: str, headers) -> Optional[ProfileSession]:
+        """Start profiling this request if it asked for it or was sampled."""
+        if not self.enabled:
+            return None
+        requested = bool(self.token) and headers.get(PROFILE_HEADER) == self.token
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            return None
+        if self._session is not None and time.perf_counter() - self._session.started > ABANDONED_SECONDS:
+            self.end(self._session)
+        if self._session is not None:
+            self.skipped += 1
+            return None
+        session = ProfileSession("requested" if requested else "sampled", method, path)
+        session.start()
+        self._session = session
+        self.profiled += 1
+        return session
+
+    def end(self, session: ProfileSession) -> float:
+        """Stop profiling; returns the request's duration in seconds."""
+        elapsed = session.stop()
+        if self._session is session:
+            self._session = None
+        return elapsed
+
+    def should_dump(self, session: ProfileSession, elapsed: float) -> bool:
+        return session.reason == "requested" or elapsed >= self.slow_seconds
+
+    def dump(self, session: ProfileSession, elapsed: float, status: int, timings: dict = None) -> Optional[str]:
+        """Write the profile and its summary (blocking; run it off the event loop). Returns the .prof path."""
+        stats = session.stats()
+        if stats is None:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, session.id)
+        stats.dump_stats(base + ".prof")
+
+        top = io.StringIO()
+        stats.stream = top
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        summary = {
+            "id": session.id,
+            "reason": session.reason,
+            "method": session.method,
+            "path": session.path,
+            "status": status,
+            "seconds": round(elapsed, 4),
+            "stages": {stage: round(seconds, 4) for stage, seconds in (timings or {}).items()},
+            "inputs": session.inputs,
+            "top": top.getvalue().splitlines(),
+        }
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        self.dumped += 1
+        self._prune()
+        print(f"DEBUG: Wrote {session.reason} profile of {session.method} {session.path} "
+              f"({elapsed:.2f}s) to {base}.prof")
+        return base + ".prof"
+
+    def _prune(self):
+        profiles = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".prof")]
+        profiles.sort(key=os.path.getmtime)
+        for path in profiles[:max(0, len(profiles) - self.max_files)]:
+            for stale in (path, path[:-len(".prof")] + ".json"):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "header_opt_in": bool(self.token),
+            "sample_rate": self.sample_rate,
+            "slow_seconds": self.slow_seconds,
+            "directory": self.directory,
+            "profiled": self.profiled,
+            "dumped": self.dumped,
+            "skipped": self.skipped,
+            "in_progress": self._session is not None,
+        }
+
+
+def note_inputs(files: list):
+    """Record the digests of a request's files in its profile (no-op unless the request is profiled)."""
+    session = current_profile.get()
+    if session is not None:
+        session.note_inputs(files)
+
+
+profiler = RequestProfiler(
+    enabled=settings.PROFILING_ENABLED,
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    slow_seconds=settings.PROFILING_SLOW_SECONDS,
+    token=settings.PROFILING_TOKEN,
+    directory=settings.PROFILING_DIR or os.path.join(tempfile.gettempdir(), "edugen-profiles"),
+    max_files=settings.PROFILING_MAX_FILES,
+)
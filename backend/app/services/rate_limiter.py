@@ -0,0 +1,216 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from fastapi import HTTPException
+from app.core.config import settings
+
+# Identity used for fair queuing; set per request by the middleware in main.py
+client_id: ContextVar[str] = ContextVar("client_id", default="anonymous")
+
+
+class RateLimited(HTTPException):
+    """Raised when a model's Groq quota can't admit a call soon enough."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail="AI request quota is saturated. Please retry shortly.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most one minute's worth of quota."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self.level
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (ignoring other waiters)."""
+        return max(0.0, (amount - self.available()) / self.rate)
+
+
+class ModelLimiter:
+    """
+    Requests-per-minute and tokens-per-minute admission for one model.
+
+    A call costs one request plus its estimated prompt tokens and
+    ``max_tokens``; unused tokens are refunded once the real usage is known.
+    Calls that can't be admitted at once wait in per-client queues served
+    round-robin, so one client's burst can't starve the others. A call is
+    shed with :class:`RateLimited` instead when the queue is full or its
+    estimated wait is longer than ``max_wait``.
+    """
+
+    def __init__(self, rpm: int, tpm: int, max_wait: float, max_queue: int, max_queue_per_client: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self.queues = OrderedDict()  # client -> deque of (cost, future), in round-robin order
+        self.queued = 0
+        self.queued_tokens = 0
+        self._pump: asyncio.Task = None
+        self.admitted = 0
+        self.waited = 0
+        self.shed = 0
+
+    def _fits(self, cost: int) -> bool:
+        return self.requests.available() >= 1 and self.tokens.available() >= cost
+
+    def _take(self, cost: int):
+        self.requests.take(1)
+        self.tokens.take(cost)
+        self.admitted += 1
+
+    def _time_until_fits(self, cost: int) -> float:
+        return max(self.requests.time_until(1), self.tokens.time_until(cost))
+
+    def estimated_wait(self, cost: int) -> float:
+        """Wait for a new call queued behind everything already waiting."""
+        return max(self.requests.time_until(1 + self.queued), self.tokens.time_until(cost + self.queued_tokens))
+
+    async def acquire(self, cost: int, client: str) -> int:
+        """Admit one call costing ``cost`` tokens; returns the tokens actually reserved."""
+        cost = min(cost, int(self.tokens.capacity))  # a call bigger than the whole minute still gets through eventually
+        if not self.queues and self._fits(cost):
+            self._take(cost)
+            return cost
+
+        wait = self.estimated_wait(cost)
+        client_queue = self.queues.get(client, ())
+        if self.queued >= self.max_queue or len(client_queue) >= self.max_queue_per_client or wait > self.max_wait:
+            self.shed += 1
+            raise RateLimited(retry_after=max(1, math.ceil(wait)))
+
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(client, deque()).append((cost, future))
+        self.queued += 1
+        self.queued_tokens += cost
+        self.waited += 1
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._serve_queues())
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._give_back(cost)  # admitted just as the caller gave up: nobody will use or refund it
+            raise
+        return cost
+
+    def refund(self, tokens: int):
+        if tokens > 0:
+            self.tokens.give(tokens)
+
+    def _give_back(self, cost: int):
+        self.requests.give(1)
+        self.tokens.give(cost)
+        self.admitted -= 1
+
+    async def _serve_queues(self):
+        while self.queues:
+            client, queue = next(iter(self.queues.items()))
+            cost, future = queue[0]
+            if not future.cancelled():
+                wait = self._time_until_fits(cost)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+            queue.popleft()
+            self.queued -= 1
+            self.queued_tokens -= cost
+            del self.queues[client]
+            if queue:
+                self.queues[client] = queue  # back of the line: next client's turn
+            if not future.cancelled():
+                self._take(cost)
+                future.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "requests_available": int(self.requests.available()),
+            "tokens_available": int(self.tokens.available()),
+            "queued": self.queued,
+            "queued_clients": len(self.queues),
+            "admitted": self.admitted,
+            "waited": self.waited,
+            "shed": self.shed,
+        }
+
+
+class RateLimiter:
+    """
+    Per-model limiters sized from GROQ_RPM_LIMIT / GROQ_TPM_LIMIT and GROQ_MODEL_QUOTAS overrides.
+
+    Quotas are tracked in this process only: with several workers or
+    instances, divide the account's limits between them.
+    """
+
+    def __init__(self, enabled: bool, rpm: int, tpm: int, quotas: dict, max_wait: float, max_queue: int,
+                 max_queue_per_client: int):
+        self.enabled = enabled
+        self.rpm = rpm
+        self.tpm = tpm
+        self.quotas = quotas
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self.limiters = {}
+
+    def limiter(self, model: str) -> ModelLimiter:
+        if model not in self.limiters:
+            quota = self.quotas.get(model, {})
+            self.limiters[model] = ModelLimiter(
+                rpm=quota.get("rpm", self.rpm),
+                tpm=quota.get("tpm", self.tpm),
+                max_wait=self.max_wait,
+                max_queue=self.max_queue,
+                max_queue_per_client=self.max_queue_per_client,
+            )
+        return self.limiters[model]
+
+    async def acquire(self, model: str, cost: int) -> int:
+        if not self.enabled:
+            return 0
+        return await self.limiter(model).acquire(cost, client_id.get())
+
+    def refund(self, model: str, tokens: int):
+        if self.enabled:
+            self.limiter(model).refund(tokens)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "models": {model: limiter.stats() for model, limiter in self.limiters.items()}}
+
+
+rate_limiter = RateLimiter(
+    enabled=settings.RATE_LIMIT_ENABLED,
+    rpm=settings.GROQ_RPM_LIMIT,
+    tpm=settings.GROQ_TPM_LIMIT,
+    quotas=settings.GROQ_MODEL_QUOTAS,
+    max_wait=settings.RATE_LIMIT_MAX_WAIT_SECONDS,
+    max_queue=settings.RATE_LIMIT_MAX_QUEUE,
+    max_queue_per_client=settings.RATE_LIMIT_MAX_QUEUE_PER_CLIENT,
+)
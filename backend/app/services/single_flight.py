@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+from fastapi import HTTPException
+from app.core.config import settings
+from app.services.metrics import metrics
+
+
+class StreamAbandoned(HTTPException):
+    """Raised to a subscriber still following a shared stream whose upstream call was cancelled."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            detail="The response stream was interrupted. Please retry.",
+            headers={"Retry-After": "1"},
+        )
+
+
+class _Broadcast:
+    """One upstream token stream fanned out to every subscriber, replaying what late joiners missed."""
+
+    def __init__(self, release):
+        self.release = release  # unregisters the stream, so later callers start a fresh one
+        self.tokens = []
+        self.meta = {}
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.task: asyncio.Task = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def run(self, tokens):
+        try:
+            async for token in tokens:
+                self.tokens.append(token)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = StreamAbandoned()  # a cut-off stream must not look complete
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    async def follow(self, meta: dict = None):
+        self.subscribers += 1
+        try:
+            idx = 0
+            while True:
+                while idx < len(self.tokens):
+                    if meta is not None and idx == 0:
+                        meta.update(self.meta)
+                    yield self.tokens[idx]
+                    idx += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    if meta is not None:
+                        meta.update(self.meta)
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # Everyone disconnected: stop generating, unregistered first so nobody joins the cancelled stream
+                self.release()
+                self.task.cancel()
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight LLM calls.
+
+    Calls are keyed on the normalised messages, model and generation
+    parameters. While a call for a key is running, further callers await the
+    same result instead of going upstream; streamed calls share one upstream
+    stream and late joiners get the tokens produced so far replayed. The key
+    is released as soon as the call finishes, so this never serves stale
+    results (that is the response cache's job).
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._calls = {}
+        self._streams = {}
+        self.leaders = 0
+        self.followers = 0
+
+    @staticmethod
+    def _normalise(messages: list) -> list:
+        normalised = []
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str):
+                content = " ".join(content.split())
+            normalised.append({"role": message["role"], "content": content})
+        return normalised
+
+    @classmethod
+    def make_key(cls, messages: list, model: str, params: dict) -> str:
+        payload = json.dumps({"messages": cls._normalise(messages), "model": model, "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def do(self, key: str, call) -> tuple:
+        """Await ``call()`` once per key; returns (result, coalesced) where coalesced is True for followers."""
+        if not self.enabled:
+            return await call(), False
+        task = self._calls.get(key)
+        if task is not None:
+            self.followers += 1
+            # Shielded so one follower disconnecting doesn't cancel everyone's call
+            return await asyncio.shield(task), True
+
+        self.leaders += 1
+        task = asyncio.create_task(call())
+        self._calls[key] = task
+        task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task), False
+
+    async def stream(self, key: str, start, meta: dict = None):
+        """
+        Yield the tokens of ``start(shared_meta)`` (an async token iterator),
+        sharing one upstream stream between concurrent identical callers.
+        """
+        if not self.enabled:
+            async for token in start(meta):
+                yield token
+            return
+
+        broadcast = self._streams.get(key)
+        if broadcast is not None:
+            self.followers += 1
+        else:
+            self.leaders += 1
+            broadcast = _Broadcast(lambda: self._release(key, broadcast))
+            broadcast.task = asyncio.create_task(broadcast.run(start(broadcast.meta)))
+            broadcast.task.add_done_callback(lambda _: broadcast.release())
+            self._streams[key] = broadcast
+        follower = broadcast.follow(meta)
+        try:
+            async for token in follower:
+                yield token
+        finally:
+            await follower.aclose()  # unsubscribe now, not when the generator is garbage-collected
+
+    def _release(self, key: str, broadcast: _Broadcast):
+        # A newer stream may already be registered under the key; only drop this one
+        if self._streams.get(key) is broadcast:
+            del self._streams[key]
+
+    def stats(self) -> dict:
+        total = self.leaders + self.followers
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._calls) + len(self._streams),
+            "upstream_calls": self.leaders,
+            "coalesced_calls": self.followers,
+            "coalesced_rate": round(self.followers / total, 4) if total else 0.0,
+        }
+
+
+single_flight = SingleFlight(enabled=settings.SINGLE_FLIGHT_ENABLED)
+
+
+@metrics.collector("edugen_single_flight_calls_total", "counter",
+                   "LLM calls that went upstream (leader) or joined one in flight (follower)", ("role",))
+def _single_flight_calls():
+    return [(("leader",), single_flight.leaders), (("follower",), single_flight.followers)]
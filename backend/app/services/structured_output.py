@@ -0,0 +1,92 @@
+import json
+from pydantic import BaseModel, ValidationError
+from app.core.config import settings
+from app.core.prompts import ITEM_REASK_PROMPT
+from app.services.groq_service import groq_service
+from app.services.json_extract import extract_json_array
+
+
+class StructuredOutput:
+    """
+    Schema validation for list-shaped generations (quiz questions, flashcards).
+
+    Each item is validated on its own against a pydantic schema, so one bad
+    item no longer sinks the whole response. When fewer than the requested
+    number of valid items remain, a short follow-up turn asks for just the
+    missing ones (the accepted items are shown back to avoid repeats)
+    instead of regenerating everything, up to ``max_reasks`` times.
+    """
+
+    def __init__(self, max_reasks: int):
+        self.max_reasks = max_reasks
+
+    @staticmethod
+    def _identity(item: dict) -> str:
+        # The first field (question / front) identifies an item for de-duplication
+        return " ".join(str(next(iter(item.values()), "")).lower().split())
+
+    def validate(self, items: list, schema: type, accepted: list = (), first_index: int = 1) -> tuple:
+        """Returns (valid items as dicts, problem descriptions); duplicates of ``accepted`` are dropped."""
+        seen = {self._identity(item) for item in accepted}
+        valid, problems = [], []
+        for idx, item in enumerate(items, start=first_index):
+            try:
+                value = schema.model_validate(item).model_dump()
+            except ValidationError as e:
+                error = e.errors(include_url=False)[0]
+                location = ".".join(str(part) for part in error["loc"])
+                problems.append(f"- item {idx}: {location + ': ' if location else ''}{error['msg']}")
+                continue
+            if self._identity(value) in seen:
+                problems.append(f"- item {idx}: repeats an earlier item")
+                continue
+            seen.add(self._identity(value))
+            valid.append(value)
+        return valid, problems
+
+    async def reask(self, messages: list, model: str, accepted: list, problems: list, schema: type,
+                    wanted: int, label: str, hedge: str = None):
+        """
+        Ask for the ``wanted - len(accepted)`` missing items; async generator
+        yielding each new valid item. Returns after ``max_reasks`` follow-ups
+        even if items are still missing.
+        """
+        accepted = list(accepted)
+        for _ in range(self.max_reasks):
+            missing = wanted - len(accepted)
+            if missing <= 0:
+                return
+            if not problems:
+                problems = [f"- only {len(accepted)} of the {wanted} requested {label} were returned"]
+            print(f"DEBUG: Re-asking for {missing} {label}: {problems}")
+            followup = messages + [
+                {"role": "assistant", "content": json.dumps(accepted)},
+                {"role": "user", "content": ITEM_REASK_PROMPT.format(
+                    label=label, missing=missing, problems="\n".join(problems[:10]))},
+            ]
+            response_text, _ = await groq_service.get_chat_completion(followup, model=model, hedge=hedge)
+            try:
+                items = extract_json_array(response_text)
+            except ValueError:
+                items, problems = [], ["- the reply was not a JSON array"]
+            else:
+                items, problems = self.validate(items, schema, accepted)
+            for item in items[:missing]:
+                accepted.append(item)
+                yield item
+
+    async def complete(self, messages: list, model: str, response_text: str, schema: type, wanted: int, label: str,
+                       hedge: str = None) -> tuple:
+        """Validate the items of a full response and fill any gap. Returns (items, stats)."""
+        try:
+            valid, problems = self.validate(extract_json_array(response_text), schema)
+        except ValueError:
+            valid, problems = [], ["- the reply was not a JSON array"]
+        valid = valid[:wanted]
+        stats = {"invalid_items": len(problems), "reasked_items": max(0, wanted - len(valid))}
+        async for item in self.reask(messages, model, valid, problems, schema, wanted, label, hedge):
+            valid.append(item)
+        return valid, stats
+
+
+structured_output = StructuredOutput(max_reasks=settings.STRUCTURED_MAX_REASKS)
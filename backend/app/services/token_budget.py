@@ -0,0 +1,112 @@
+from fastapi import HTTPException
+from app.core.config import settings
+
+# Context window and output cap per model, in tokens
+MODEL_LIMITS = {
+    "llama-3.3-70b-versatile": {"context": 131072, "max_output": 32768},
+    "llama-3.1-70b-versatile": {"context": 131072, "max_output": 8000},
+    "llama-3.1-8b-instant": {"context": 131072, "max_output": 131072},
+    "gemma2-9b-it": {"context": 8192, "max_output": 8192},
+    "meta-llama/llama-4-scout-17b-16e-instruct": {"context": 131072, "max_output": 8192},
+}
+DEFAULT_LIMITS = {"context": 8192, "max_output": 8192}
+
+
+class PromptTooLarge(HTTPException):
+    """Raised before dispatch when no candidate model can fit the prompt."""
+
+    def __init__(self, prompt_tokens: int, largest_context: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Prompt is too large: ~{prompt_tokens} tokens, the largest available context is {largest_context}.",
+        )
+
+
+class TokenBudget:
+    """
+    Prompt-size estimation done before a request is sent to Groq.
+
+    Token counts come from ``tiktoken`` (cl100k_base, close to the Llama 3
+    vocabulary) when it is installed, otherwise from a characters-per-token
+    heuristic. Each vision image is charged a flat ``IMAGE_TOKENS``. Counts
+    are estimates, so ``SAFETY_MARGIN`` tokens are always left free.
+    """
+
+    IMAGE_TOKENS = 1600  # approximate cost of one image attachment
+    MESSAGE_OVERHEAD = 4  # role and separator tokens per message
+    SAFETY_MARGIN = 256
+    MIN_OUTPUT_TOKENS = 1024  # a model only "fits" if it can still answer at least this much
+
+    def __init__(self):
+        self._encoder = None
+        self._encoder_loaded = False
+
+    @property
+    def encoder(self):
+        # Loaded on first use; falls back to the heuristic if tiktoken or its vocabulary is unavailable
+        if not self._encoder_loaded:
+            self._encoder_loaded = True
+            try:
+                import tiktoken
+                self._encoder = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                print(f"DEBUG: tiktoken unavailable ({e}), estimating tokens from characters")
+        return self._encoder
+
+    def count_tokens(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoder is not None:
+            return len(self.encoder.encode(text, disallowed_special=()))
+        return len(text) // 4 + 1
+
+    def estimate_messages(self, messages: list) -> dict:
+        """Token estimate for a list of chat messages, including attached images."""
+        text_tokens, images = 0, 0
+        for message in messages:
+            text_tokens += self.MESSAGE_OVERHEAD
+            content = message["content"]
+            if isinstance(content, str):
+                text_tokens += self.count_tokens(content)
+                continue
+            for part in content:
+                if part.get("type") == "image_url":
+                    images += 1
+                else:
+                    text_tokens += self.count_tokens(part.get("text", ""))
+        return {
+            "prompt_tokens": text_tokens + images * self.IMAGE_TOKENS,
+            "text_tokens": text_tokens,
+            "images": images,
+        }
+
+    @staticmethod
+    def limits(model: str) -> dict:
+        return MODEL_LIMITS.get(model, DEFAULT_LIMITS)
+
+    def fits(self, model: str, prompt_tokens: int) -> bool:
+        return prompt_tokens + self.MIN_OUTPUT_TOKENS + self.SAFETY_MARGIN <= self.limits(model)["context"]
+
+    def max_tokens(self, model: str, prompt_tokens: int, cap: int) -> int:
+        """Largest completion that fits next to the prompt, bounded by ``cap`` and the model's output limit."""
+        limits = self.limits(model)
+        return max(1, min(cap, limits["max_output"], limits["context"] - prompt_tokens - self.SAFETY_MARGIN))
+
+    def prompt_budget(self, model: str, output_tokens: int = None) -> int:
+        """Tokens available for the prompt when reserving ``output_tokens`` for the answer."""
+        output_tokens = settings.GROQ_MAX_OUTPUT_TOKENS if output_tokens is None else output_tokens
+        return self.limits(model)["context"] - output_tokens - self.SAFETY_MARGIN
+
+    def trim(self, text: str, max_tokens: int) -> str:
+        """Cut ``text`` to about ``max_tokens``, marking where it was truncated."""
+        if max_tokens <= 0:
+            return ""
+        if self.count_tokens(text) <= max_tokens:
+            return text
+        marker = "\n\n[... content truncated to fit the model's context window ...]"
+        if self.encoder is not None:
+            return self.encoder.decode(self.encoder.encode(text, disallowed_special=())[:max_tokens]) + marker
+        return text[:max_tokens * 4] + marker
+
+
+token_budget = TokenBudget()
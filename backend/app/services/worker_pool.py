@@ -0,0 +1,113 @@
+import asyncio
+import functools
+import mmap
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from fastapi import HTTPException
+from app.core.config import settings
+from app.services.metrics import metrics
+from app.services.profiling import current_profile, run_profiled
+
+
+class WorkerPoolSaturated(HTTPException):
+    """Raised instead of queueing when the pool's backlog is full."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(
+            status_code=503,
+            detail="Server is busy processing other files. Please retry shortly.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class WorkerPool:
+    """
+    Bounded pool for CPU-bound file work (PDF rendering, JPEG encoding, OCR).
+
+    ``kind="thread"`` suits Tesseract (a subprocess, so the GIL is released)
+    and hosts where child processes are unavailable, such as serverless
+    functions; PyMuPDF is not thread-safe, so PDF opening and rendering are
+    serialized there. ``kind="process"`` gives PyMuPDF/PIL work real
+    parallelism, including several page runs of one PDF.
+    At most ``max_workers + max_queue`` jobs may be pending; beyond that
+    :class:`WorkerPoolSaturated` is raised so callers can shed load instead
+    of building an unbounded backlog.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_queue: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown worker pool kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Executor = None
+
+    @property
+    def executor(self) -> Executor:
+        # Created on first use so importing the app never forks or spawns
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="file-worker",
+                )
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result."""
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise WorkerPoolSaturated()
+        if self.kind == "process":
+            # Buffers (mmap'd uploads, memoryviews) can't be pickled to a child process
+            args = tuple(bytes(a) if isinstance(a, (mmap.mmap, memoryview, bytearray)) else a for a in args)
+        profile = current_profile.get()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            if profile is None:
+                return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+            # The request is being profiled: profile the job on the worker too and merge it in
+            result, stats = await loop.run_in_executor(self.executor, functools.partial(run_profiled, fn, *args, **kwargs))
+            profile.add_worker_stats(stats)
+            return result
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+
+worker_pool = WorkerPool(
+    kind=settings.FILE_WORKER_KIND,
+    max_workers=settings.FILE_WORKERS,
+    max_queue=settings.FILE_WORKER_QUEUE,
+)
+
+
+@metrics.collector("edugen_worker_pool_pending", "gauge", "File jobs running or waiting for a worker")
+def _worker_pool_pending():
+    return [((), worker_pool.pending)]
+
+
+@metrics.collector("edugen_worker_pool_rejected_total", "counter", "File jobs rejected because the pool was saturated")
+def _worker_pool_rejected():
+    return [((), worker_pool.rejected)]
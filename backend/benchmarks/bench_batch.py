@@ -0,0 +1,87 @@
+"""
+Batch generation benchmark.
+
+Generates a quiz for ``--documents`` distinct text documents against the fake
+Groq server, first one ``/api/v1/tools/generate-quiz`` call at a time (the
+per-file workflow), then as a single ``/api/v1/tools/batch`` job followed over
+polling its progress. The batch should take about documents / concurrency
+completions instead of one per document.
+
+Usage (from the backend directory):
+    python benchmarks/bench_batch.py --documents 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroqServer, configure_backend_env
+
+QUIZ_REPLY = json.dumps([{"question": "What is 2 + 2?", "options": ["3", "4"], "correct_answer": "4"}])
+
+
+def documents(n: int, tag: str) -> list:
+    return [f"Lecture {i} ({tag}): notes on topic number {i}." for i in range(n)]
+
+
+async def run(n: int, concurrency: int):
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=600) as client:
+        start = time.perf_counter()
+        ok = 0
+        for content in documents(n, "sequential"):
+            response = await client.post("/api/v1/tools/generate-quiz", json={"content": content, "num_questions": 1})
+            ok += response.status_code == 200
+        sequential = (ok, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        submitted = await client.post("/api/v1/tools/batch", json={
+            "contents": documents(n, "batch"),
+            "tasks": [{"tool": "generate-quiz", "params": {"num_questions": 1}}],
+            "concurrency": concurrency,
+        })
+        batch_id = submitted.json()["batch_id"]
+        first_result, seen = None, 0
+        while True:  # poll like a progress bar would
+            progress = (await client.get(f"/api/v1/tools/batch/{batch_id}", params={"since": seen})).json()
+            seen += len(progress["results"])
+            if seen and first_result is None:
+                first_result = time.perf_counter() - start
+            if progress["status"] != "running":
+                break
+            await asyncio.sleep(0.05)
+        batched = (progress["completed"] - progress["failed"], time.perf_counter() - start, first_result)
+    return sequential, batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--port", type=int, default=8772)
+    args = parser.parse_args()
+
+    os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+    os.environ["BATCH_CONCURRENCY"] = str(args.concurrency)
+    with FakeGroqServer(port=args.port, latency=args.latency, token_delay=0.0, reply=QUIZ_REPLY) as fake:
+        configure_backend_env(fake.base_url)
+        (seq_ok, seq_time), (batch_ok, batch_time, first) = asyncio.run(run(args.documents, args.concurrency))
+
+    print(f"{args.documents} quiz generations, {args.latency}s per completion, batch concurrency {args.concurrency}")
+    print(f"  sequential  {seq_ok:4d} ok  {seq_time:6.2f}s")
+    print(f"  batch       {batch_ok:4d} ok  {batch_time:6.2f}s  (first result after {first:.2f}s)")
+    print(f"  speed-up    {seq_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Burst benchmark for the client-side Groq quota limiter.
+
+The fake Groq server accepts ``--rpm`` requests per minute per model and
+answers 429 beyond that, like a real quota. A burst of ``--requests``
+concurrent completions from ``--clients`` clients runs through
+``groq_service`` with the limiter off and on. Without it every excess call
+costs 429 round trips across the fallback chain; with it, excess calls are
+shed locally with a fast 503. Reports successes, upstream 429s and latency
+of the failed calls.
+
+Usage (from the backend directory):
+    python benchmarks/bench_burst.py --requests 100 --rpm 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroqServer, configure_backend_env
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+async def burst(n: int, clients: int):
+    from app.services.groq_service import groq_service
+    from app.services.rate_limiter import client_id
+
+    async def one(idx: int):
+        client_id.set(f"client-{idx % clients}")
+        # A distinct prompt per call, so single-flight and the response cache can't coalesce the burst
+        messages = [{"role": "user", "content": f"Explain recursion (#{idx})."}]
+        start = time.perf_counter()
+        try:
+            await groq_service.get_chat_response(messages)
+            return True, time.perf_counter() - start
+        except Exception:
+            return False, time.perf_counter() - start
+
+    return await asyncio.gather(*[one(idx) for idx in range(n)])
+
+
+def run_once(args, limiter_enabled: bool, port: int):
+    # Each run gets a fresh fake server (fresh quota) and fresh backend state
+    for name in list(sys.modules):
+        if name == "main" or name.startswith("app."):
+            del sys.modules[name]
+    os.environ["RATE_LIMIT_ENABLED"] = str(limiter_enabled).lower()
+    with FakeGroqServer(port=port, latency=args.latency, token_delay=0, num_tokens=20, rpm_limit=args.rpm) as fake:
+        configure_backend_env(fake.base_url)
+        start = time.perf_counter()
+        results = asyncio.run(burst(args.requests, args.clients))
+        elapsed = time.perf_counter() - start
+        return results, elapsed, fake.app.state.rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=5)
+    parser.add_argument("--rpm", type=int, default=10, help="quota per model on the fake server")
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--port", type=int, default=8770)
+    args = parser.parse_args()
+
+    os.environ["GROQ_MAX_RETRIES"] = "0"
+    os.environ["GROQ_RPM_LIMIT"] = str(args.rpm)
+    os.environ["RATE_LIMIT_MAX_WAIT_SECONDS"] = "1"
+
+    print(f"Burst of {args.requests} requests from {args.clients} clients, quota {args.rpm} RPM per model")
+    for idx, (name, enabled) in enumerate((("limiter off", False), ("limiter on", True))):
+        results, elapsed, rejected = run_once(args, enabled, args.port + idx)
+        ok = [latency for success, latency in results if success]
+        failed = [latency for success, latency in results if not success]
+        print(f"  {name:<12} {len(ok):3d} ok  {len(failed):3d} failed  upstream 429s {rejected:4d}  "
+              f"failed p95 {percentile(failed, 0.95):6.3f}s  burst wall time {elapsed:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
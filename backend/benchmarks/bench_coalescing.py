@@ -0,0 +1,77 @@
+"""
+Spike benchmark for request coalescing (single-flight).
+
+Fires ``--requests`` identical ``/api/v1/tools/summarize`` calls at the same
+moment (a class opening a shared link), then the same number of identical
+streamed ``/api/v1/chat`` calls, and counts how many completions reached the
+fake Groq server. With coalescing on, each burst should cost one upstream
+call; every client still gets the full answer.
+
+Usage (from the backend directory):
+    python benchmarks/bench_coalescing.py --requests 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroqServer, configure_backend_env
+
+
+def answer_text(response) -> str:
+    """Response body without the per-caller metadata (which marks coalesced calls)."""
+    if response.headers.get("content-type", "").startswith("application/json"):
+        return str({k: v for k, v in response.json().items() if k != "meta"})
+    return response.text
+
+
+async def run(n: int, fake):
+    import httpx
+    from main import app
+
+    rows = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=60) as client:
+        bursts = {
+            "summarize": lambda: client.post("/api/v1/tools/summarize", json={"content": "Photosynthesis in plants."}),
+            "chat stream": lambda: client.post("/api/v1/chat", json={
+                "messages": [{"role": "user", "content": "Explain recursion."}], "stream": True}),
+        }
+        for name, send in bursts.items():
+            calls_before = fake.calls
+            start = time.perf_counter()
+            responses = await asyncio.gather(*[send() for _ in range(n)])
+            elapsed = time.perf_counter() - start
+            ok = sum(1 for r in responses if r.status_code == 200)
+            identical = len({answer_text(r) for r in responses}) == 1
+            rows.append((name, ok, fake.calls - calls_before, identical, elapsed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=8771)
+    parser.add_argument("--disable", action="store_true", help="run with SINGLE_FLIGHT_ENABLED=false")
+    args = parser.parse_args()
+
+    os.environ["SINGLE_FLIGHT_ENABLED"] = "false" if args.disable else "true"
+    os.environ["RESPONSE_CACHE_ENABLED"] = "false"  # measure coalescing alone
+    with FakeGroqServer(port=args.port, latency=args.latency, token_delay=0.005, num_tokens=50) as fake:
+        configure_backend_env(fake.base_url)
+        rows = asyncio.run(run(args.requests, fake))
+
+    print(f"{args.requests} identical concurrent requests per burst, single-flight "
+          f"{'off' if args.disable else 'on'}")
+    for name, ok, upstream, identical, elapsed in rows:
+        print(f"  {name:<12} {ok:3d} ok  upstream calls {upstream:3d}  identical bodies {identical}  {elapsed:5.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Cold-start benchmark: import cost and time to first response.
+
+Each run starts a fresh interpreter (as a serverless function would), imports
+``main`` and sends one ``GET /health`` and one ``POST /api/v1/chat`` through
+an in-process ASGI transport against a local fake Groq server. Times are
+measured from just before the process is spawned, so interpreter start-up is
+included. ``--eager`` preloads the document libraries and the Groq SDK first,
+which is what every cold start paid before they were imported lazily.
+
+Before the runs, an import-time profile (``python -X importtime``) of
+``import main`` is printed (the slowest top-level packages, summing the self
+time of their modules), and each run reports which of the heavy libraries
+ended up loaded.
+
+Usage (from the backend directory):
+    python benchmarks/bench_cold_start.py --runs 5
+    python benchmarks/bench_cold_start.py --runs 5 --eager
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroqServer, configure_backend_env
+
+HEAVY_MODULES = ["fitz", "PyPDF2", "PIL", "pytesseract", "groq"]
+EAGER_IMPORTS = "import fitz, PyPDF2, pytesseract, groq, httpx\nfrom PIL import Image\n"
+
+# Runs in the child interpreter; `spawned` is the parent's wall clock at spawn time
+CHILD = """
+import asyncio, json, sys, time
+spawned = float(sys.argv[1])
+started = time.time()
+{eager}import main
+imported = time.time()
+
+async def first_requests():
+    import httpx
+    timings = {{}}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://backend") as client:
+        response = await client.get("/health")
+        timings["health"] = (time.time() - spawned, response.status_code)
+        response = await client.post("/api/v1/chat", timeout=60, json={{
+            "messages": [{{"role": "user", "content": "Hello"}}], "stream": False}})
+        timings["chat"] = (time.time() - spawned, response.status_code)
+    return timings
+
+timings = asyncio.run(first_requests())
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"interpreter": started - spawned, "import": imported - started,
+                  "health": timings["health"], "chat": timings["chat"], "loaded": loaded}}))
+"""
+
+
+def import_profile(top: int):
+    """Run ``python -X importtime -c 'import main'`` and summarise it by top-level package."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=BACKEND_DIR, capture_output=True, text=True, env=os.environ.copy())
+    packages = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line[13:]:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[12:].split("|")]
+        if not self_us.isdigit():
+            continue  # header line
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+        total += int(self_us)
+    return total, sorted(packages.items(), key=lambda item: -item[1])[:top]
+
+
+def cold_start(eager: bool) -> dict:
+    code = CHILD.format(eager=EAGER_IMPORTS if eager else "", heavy=HEAVY_MODULES)
+    spawned = time.time()
+    result = subprocess.run([sys.executable, "-c", code, repr(spawned)],
+                            cwd=BACKEND_DIR, capture_output=True, text=True, env=os.environ.copy())
+    if result.returncode != 0:
+        raise SystemExit(f"cold start run failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--eager", action="store_true", help="preload the document libraries and Groq SDK")
+    parser.add_argument("--top", type=int, default=12, help="packages to list in the import profile")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Groq completion latency")
+    parser.add_argument("--port", type=int, default=8772)
+    args = parser.parse_args()
+
+    with FakeGroqServer(port=args.port, latency=args.latency) as fake:
+        configure_backend_env(fake.base_url)
+        os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")]))
+
+        total, packages = import_profile(args.top)
+        print(f"import main: {total / 1000:.0f}ms (sum of self times)")
+        for package, self_us in packages:
+            print(f"  {package:<28} {self_us / 1000:7.1f}ms")
+
+        runs = [cold_start(args.eager) for _ in range(args.runs)]
+
+    print(f"\nheavy modules loaded after first /chat: {', '.join(runs[0]['loaded']) or 'none'}")
+    print(f"{'cold start (' + ('eager' if args.eager else 'lazy') + ')':<24} {'median':>9} {'max':>9}")
+    rows = [("interpreter start", [r["interpreter"] for r in runs]),
+            ("import main", [r["import"] for r in runs]),
+            ("first /health", [r["health"][0] for r in runs]),
+            ("first /chat", [r["chat"][0] for r in runs])]
+    for label, values in rows:
+        print(f"{label:<24} {statistics.median(values) * 1000:7.0f}ms {max(values) * 1000:7.0f}ms")
+    statuses = {r["health"][1] for r in runs} | {r["chat"][1] for r in runs}
+    if statuses != {200}:
+        print(f"unexpected status codes: {sorted(statuses)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Concurrency benchmark for GroqService against a local fake Groq server.
+
+Fires N completions one after another and then N at once, both directly
+through ``groq_service`` and through the ``/api/v1/chat`` endpoint. With a
+non-blocking client the concurrent wall-clock time stays close to a single
+call's latency instead of growing with N. It also samples ``/health`` while
+the LLM calls are in flight to show the event loop stays responsive.
+Every call asks a distinct question, so single-flight coalescing (and the
+response cache) cannot merge them: the speedup comes only from overlapping
+the upstream waits.
+
+Usage (from the backend directory):
+    python benchmarks/bench_concurrency.py --requests 20 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroqServer, configure_backend_env
+
+
+async def run(n: int):
+    import httpx
+    from main import app
+    from app.services.groq_service import groq_service
+
+    def messages(run: str, i: int) -> list:
+        return [{"role": "user", "content": f"Explain recursion ({run} #{i})."}]
+
+    results = {}
+
+    start = time.perf_counter()
+    for i in range(n):
+        await groq_service.get_chat_response(messages("sequential", i))
+    results["service sequential"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*[groq_service.get_chat_response(messages("concurrent", i)) for i in range(n)])
+    results["service concurrent"] = time.perf_counter() - start
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        health_latencies = []
+
+        async def probe_health(stop: asyncio.Event):
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                await client.get("/health")
+                health_latencies.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.02)
+
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe_health(stop))
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/api/v1/chat", json={"messages": messages("chat", i)}, timeout=60)
+            for i in range(n)
+        ])
+        results["/chat concurrent"] = time.perf_counter() - start
+        stop.set()
+        await prober
+
+    await groq_service.aclose()
+    failures = [r for r in responses if r.status_code != 200]
+    return results, health_latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with FakeGroqServer(port=args.port, latency=args.latency) as fake:
+        configure_backend_env(fake.base_url)
+        results, health, failures = asyncio.run(run(args.requests))
+        upstream_calls = fake.calls
+
+    print(f"Fake Groq latency: {args.latency:.2f}s, requests per run: {args.requests}, "
+          f"upstream calls: {upstream_calls} (expected {3 * args.requests})")
+    for name, elapsed in results.items():
+        speedup = results["service sequential"] / elapsed
+        print(f"  {name:<20} {elapsed:7.2f}s  ({speedup:4.1f}x vs sequential)")
+    if health:
+        print(f"  /health while busy    max {max(health) * 1000:.1f}ms over {len(health)} probes")
+    if failures:
+        print(f"  {len(failures)} /chat requests failed: {failures[0].text}")
+
+
+if __name__ == "__main__":
+    main()
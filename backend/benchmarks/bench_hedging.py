@@ -0,0 +1,87 @@
+"""
+Tail-latency benchmark for hedged completions.
+
+The fake Groq server answers most completions in ``--latency`` seconds but a
+``--slow-ratio`` share of them take ``--slow-latency`` seconds, on every
+model. The same number of completions runs through ``groq_service`` with
+hedging off and on (``hedge="bench"``); with hedging on, a call that outlives
+the primary's p95 latency races the next fallback model. Reports
+p50/p95/p99 latency, the share of requests hedged and the hedge win rate.
+
+Usage (from the backend directory):
+    python benchmarks/bench_hedging.py --requests 200 --slow-ratio 0.05
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroqServer, configure_backend_env
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run(n: int, concurrency: int):
+    from app.services.groq_service import groq_service
+    from app.services.hedging import hedger
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(run: str, idx: int):
+        # A distinct prompt per call, so single-flight and the response cache can't coalesce them
+        messages = [{"role": "user", "content": f"Explain recursion ({run} #{idx})."}]
+        async with semaphore:
+            start = time.perf_counter()
+            await groq_service.get_chat_response(messages, hedge="bench")
+            return time.perf_counter() - start
+
+    results = {}
+    for name, enabled in (("hedging off", False), ("hedging on", True)):
+        hedger.enabled = enabled
+        random.seed(0) # same latency tail for both runs
+        results[name] = await asyncio.gather(*[timed(name, idx) for idx in range(n)])
+    await groq_service.aclose()
+    return results, hedger.stats()["endpoints"].get("bench", {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--slow-ratio", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--budget", type=float, default=0.1, help="max share of requests hedged")
+    parser.add_argument("--port", type=int, default=8769)
+    args = parser.parse_args()
+
+    os.environ["GROQ_HEDGE_BUDGET"] = str(args.budget)
+    os.environ["GROQ_HEDGE_MIN_DELAY_SECONDS"] = "0.05"
+    with FakeGroqServer(port=args.port, latency=args.latency, token_delay=0, num_tokens=20,
+                        slow_ratio=args.slow_ratio, slow_latency=args.slow_latency) as fake:
+        configure_backend_env(fake.base_url)
+        results, stats = asyncio.run(run(args.requests, args.concurrency))
+        hedged = stats.get("hedged", 0)
+        assert fake.calls == 2 * args.requests + hedged, \
+            f"expected {2 * args.requests + hedged} upstream calls, the fake server saw {fake.calls}"
+
+    print(f"Latency {args.latency:.2f}s, {args.slow_ratio:.0%} of calls take {args.slow_latency:.2f}s, "
+          f"{args.requests} requests per run")
+    for name, latencies in results.items():
+        print(f"  {name:<12} p50 {percentile(latencies, 0.5):6.3f}s  p95 {percentile(latencies, 0.95):6.3f}s  "
+              f"p99 {percentile(latencies, 0.99):6.3f}s")
+    print(f"  hedged {stats.get('hedged', 0)}/{stats.get('requests', 0)} requests, "
+          f"backup win rate {stats.get('backup_win_rate', 0.0):.0%}, over budget {stats.get('over_budget', 0)}")
+
+
+if __name__ == "__main__":
+    main()
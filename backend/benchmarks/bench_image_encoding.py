@@ -0,0 +1,133 @@
+"""
+Vision image size benchmark: bytes per page, fixed vs adaptive encoding.
+
+Encodes the pages of several synthetic documents the way they are sent to
+the vision model, once with the fixed encoder (2x render or 2000px cap, RGB
+JPEG at quality 85) and once with the adaptive one (margins cropped,
+grayscale when colourless, resolution from the text line height, palette
+PNG for flat pages, JPEG quality fitted to the byte budget). For each
+document it reports the mean encoded and base64 bytes per page, the output
+size, the share of grayscale and PNG pages, the encode time per page and
+the height of a typical text line in the output image (a legibility check:
+small print should keep its pixels while the payload shrinks).
+
+Usage (from the backend directory):
+    python benchmarks/bench_image_encoding.py --pages 5
+    python benchmarks/bench_image_encoding.py --pages 5 --max-bytes 150000 --min-side 900
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import configure_backend_env
+from synthetic import make_image, make_large_pdf, make_pdf, make_scanned_pdf, make_slides
+
+
+def documents(pages: int) -> list:
+    """``(name, kind, payload)``: PDFs are encoded page by page, images as a whole."""
+    return [
+        ("notes + diagram", "pdf", make_pdf(pages)),
+        ("notes, text only", "pdf", make_pdf(pages, diagram=False)),
+        ("slides", "pdf", make_slides(pages)),
+        ("scanned handout", "pdf", make_scanned_pdf(pages)),
+        ("photo-heavy packet", "pdf", make_large_pdf(2 * pages, pages)),
+        ("worksheet png", "image", [make_image(seed=n) for n in range(pages)]),
+        ("large jpeg scan", "image", [make_image(3000, 2200, lines=60, fmt="JPEG", seed=n) for n in range(pages)]),
+    ]
+
+
+def encode_all(encoder, kind: str, payload) -> list:
+    """Encode every page; returns ``(encoded bytes, seconds)`` per page."""
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    results = []
+    if kind == "pdf":
+        with fitz.open(stream=payload, filetype="pdf") as doc:
+            for page in doc:
+                started = time.perf_counter()
+                data = encoder.encode_pdf_page(page)
+                results.append((data, time.perf_counter() - started))
+    else:
+        for image_bytes in payload:
+            started = time.perf_counter()
+            data = encoder.encode(Image.open(io.BytesIO(image_bytes)))
+            results.append((data, time.perf_counter() - started))
+    return results
+
+
+def describe(encoder, pages: list) -> dict:
+    """Summarise encoded pages: sizes, modes and the median text line height in output pixels."""
+    from PIL import Image
+
+    encoded, b64, sides, gray, png, line_px, seconds = [], [], [], 0, 0, [], []
+    for data, elapsed in pages:
+        image = Image.open(io.BytesIO(data))
+        encoded.append(len(data))
+        b64.append(4 * -(-len(data) // 3))
+        sides.append(image.size)
+        gray += image.mode == "L"
+        png += image.format == "PNG"
+        seconds.append(elapsed)
+        line_height = encoder.analyze(image.convert("RGB"))["line_height"]
+        if line_height:
+            line_px.append(line_height * max(image.size))
+    return {
+        "bytes": statistics.mean(encoded),
+        "b64": statistics.mean(b64),
+        "size": "x".join(str(int(statistics.mean(side))) for side in zip(*sides)),
+        "gray": gray / len(pages),
+        "png": png / len(pages),
+        "ms": statistics.mean(seconds) * 1000,
+        "line_px": statistics.median(line_px) if line_px else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=5, help="pages (or images) per document")
+    parser.add_argument("--max-bytes", type=int, help="encoded size budget per image (default: VISION_IMAGE_MAX_BYTES)")
+    parser.add_argument("--max-side", type=int, help="default: VISION_IMAGE_MAX_SIDE")
+    parser.add_argument("--min-side", type=int, help="default: VISION_IMAGE_MIN_SIDE")
+    args = parser.parse_args()
+
+    configure_backend_env("http://127.0.0.1:1")  # Settings only; no Groq calls are made
+    from app.core.config import settings
+    from app.services.image_encoder import ImageEncoder
+
+    options = dict(max_side=args.max_side or settings.VISION_IMAGE_MAX_SIDE,
+                   min_side=args.min_side or settings.VISION_IMAGE_MIN_SIDE,
+                   max_bytes=args.max_bytes or settings.VISION_IMAGE_MAX_BYTES,
+                   max_quality=settings.VISION_IMAGE_MAX_QUALITY, min_quality=settings.VISION_IMAGE_MIN_QUALITY)
+    encoders = {"fixed": ImageEncoder(adaptive=False, **options), "adaptive": ImageEncoder(adaptive=True, **options)}
+    print(f"Adaptive: sides {options['min_side']}-{options['max_side']}px, budget {options['max_bytes'] / 1024:.0f} KiB, "
+          f"quality {options['min_quality']}-{options['max_quality']}; {args.pages} pages per document\n")
+
+    print(f"{'document':<20} {'encoder':<9} {'KiB/page':>9} {'b64 KiB':>8} {'size':>10} {'gray':>5} {'png':>5} "
+          f"{'ms/page':>8} {'line px':>8}")
+    totals = {name: 0 for name in encoders}
+    for name, kind, payload in documents(args.pages):
+        rows = {}
+        for label, encoder in encoders.items():
+            rows[label] = describe(encoder, encode_all(encoder, kind, payload))
+            totals[label] += rows[label]["b64"] * args.pages
+        for label, row in rows.items():
+            line_px = f"{row['line_px']:.0f}" if row["line_px"] else "-"
+            print(f"{name if label == 'fixed' else '':<20} {label:<9} {row['bytes'] / 1024:9.0f} {row['b64'] / 1024:8.0f} "
+                  f"{row['size']:>10} {row['gray']:5.0%} {row['png']:5.0%} {row['ms']:8.1f} {line_px:>8}")
+        saved = 1 - rows["adaptive"]["b64"] / rows["fixed"]["b64"]
+        print(f"{'':<20} {'saved':<9} {saved:9.0%}")
+    print(f"\nbase64 payload for all documents: fixed {totals['fixed'] / 1024 / 1024:.1f} MiB, "
+          f"adaptive {totals['adaptive'] / 1024 / 1024:.1f} MiB "
+          f"({1 - totals['adaptive'] / totals['fixed']:.0%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
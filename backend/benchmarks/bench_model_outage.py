@@ -0,0 +1,77 @@
+"""
+Tail-latency benchmark for a primary-model outage, with and without circuit breakers.
+
+The fake Groq server answers every call to the primary model with a 429
+after ``--fail-latency`` seconds, as during a provider incident. The same
+sequence of completions runs twice through ``groq_service``: once with the
+breakers reset before every call (each request pays the failed round trip
+before falling back) and once with them active (the primary is skipped
+after it trips). Reports p50/p95/max latency for both runs.
+
+Usage (from the backend directory):
+    python benchmarks/bench_model_outage.py --requests 40 --latency 0.2 --fail-latency 0.4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroqServer, configure_backend_env
+
+PRIMARY_MODEL = "llama-3.3-70b-versatile"
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run(n: int):
+    from app.services.groq_service import groq_service
+    from app.services.circuit_breaker import model_health
+
+    messages = [{"role": "user", "content": "Explain recursion."}]
+    results = {}
+    for name, reset in (("without breakers", True), ("with breakers", False)):
+        model_health.breakers.clear()
+        latencies = []
+        for _ in range(n):
+            if reset:
+                model_health.breakers.clear()
+            start = time.perf_counter()
+            await groq_service.get_chat_response(messages)
+            latencies.append(time.perf_counter() - start)
+        results[name] = latencies
+    await groq_service.aclose()
+    return results, model_health.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per healthy completion")
+    parser.add_argument("--fail-latency", type=float, default=0.4, help="seconds before the primary's 429")
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    os.environ["GROQ_MAX_RETRIES"] = "0"  # measure model fallback, not SDK retries
+    with FakeGroqServer(port=args.port, latency=args.latency, token_delay=0, num_tokens=20,
+                        fail_models=(PRIMARY_MODEL,), fail_latency=args.fail_latency) as fake:
+        configure_backend_env(fake.base_url)
+        results, breakers = asyncio.run(run(args.requests))
+
+    print(f"Primary model failing after {args.fail_latency:.2f}s, healthy latency {args.latency:.2f}s, "
+          f"{args.requests} requests per run")
+    for name, latencies in results.items():
+        print(f"  {name:<18} p50 {percentile(latencies, 0.5):6.3f}s  p95 {percentile(latencies, 0.95):6.3f}s  "
+              f"max {max(latencies):6.3f}s")
+    print(f"  {PRIMARY_MODEL} breaker: {breakers[PRIMARY_MODEL]['state']}")
+
+
+if __name__ == "__main__":
+    main()
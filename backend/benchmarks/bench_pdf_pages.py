@@ -0,0 +1,68 @@
+"""
+Page-parallel PDF pipeline benchmark over a synthetic 50-page PDF.
+
+Compares rendering + JPEG encoding + text-layer extraction of every page
+serially on one core against FileProcessor.process_pdf_pages fanned out
+over process pools of increasing size. With ``--ocr`` scanned-page OCR is
+forced on every page as well (requires Tesseract).
+
+Usage (from the backend directory):
+    python benchmarks/bench_pdf_pages.py --pages 50 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import configure_backend_env
+from synthetic import make_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument("--ocr", action="store_true", help="OCR every page (strips the text layer first)")
+    args = parser.parse_args()
+
+    configure_backend_env("http://127.0.0.1:1")  # Settings only; no Groq calls are made
+    from app.services import file_processor as fp_module
+    from app.services.file_processor import FileProcessor
+    from app.services.worker_pool import WorkerPool
+
+    pdf = make_pdf(args.pages)
+    text = not args.ocr  # with --ocr, skip the text layer so every page goes through Tesseract
+    print(f"Synthetic PDF: {args.pages} pages, {len(pdf) / 1024:.0f} KiB, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    pages = FileProcessor._pdf_pages_sync(pdf, list(range(args.pages)), True, args.ocr, text)
+    serial = time.perf_counter() - start
+    image_bytes = sum(len(p["image"]) for p in pages)
+    print(f"  {'serial':<12} {serial:7.2f}s  {args.pages / serial:6.1f} pages/s  "
+          f"({image_bytes / args.pages / 1024:.0f} KiB base64 per page)")
+
+    for workers in args.workers:
+        pool = WorkerPool(kind="process", max_workers=workers, max_queue=workers * 4)
+        fp_module.worker_pool = pool
+
+        async def run():
+            # First call warms up the spawned workers so startup is not counted
+            await FileProcessor.process_pdf_pages(pdf, max_pages=workers, render=True)
+            start = time.perf_counter()
+            result = await FileProcessor.process_pdf_pages(pdf, render=True, ocr=args.ocr, text=text)
+            return time.perf_counter() - start, result
+
+        elapsed, result = asyncio.run(run())
+        pool.shutdown()
+        assert [p["page"] for p in result] == list(range(args.pages)), "pages out of order"
+        print(f"  {f'{workers} workers':<12} {elapsed:7.2f}s  {args.pages / elapsed:6.1f} pages/s  "
+              f"({serial / elapsed:4.1f}x vs serial)")
+
+
+if __name__ == "__main__":
+    main()
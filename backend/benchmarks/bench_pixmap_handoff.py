@@ -0,0 +1,189 @@
+"""
+Pixmap handoff benchmark: peak memory and CPU per page, copying vs in-place.
+
+Renders the pages of synthetic documents exactly as the adaptive encoder
+does and hands each pixmap to the encoder two ways, up to the data URL sent
+to Groq:
+
+  copy      the previous path: ``Image.frombytes(..., pix.samples)`` (a bytes
+            copy of the samples, then Pillow's own), a new ``BytesIO`` and a
+            ``getvalue()`` copy per encoding attempt, base64 of that copy
+  in-place  ``ImageEncoder.encode_pdf_page``: Pillow reads the pixmap's
+            samples in place (shared outright for grayscale pages), encoding
+            attempts reuse two buffers and base64 reads the winner in place
+
+Each (document, mode) pair runs in a fresh interpreter. Reported per page:
+CPU time, peak RSS growth (the process's high-water mark, reset before the
+pages are encoded) and the peak of Python allocations (tracemalloc, in a
+separate pass since tracing slows the run down). Both modes produce the
+same images; the output sizes are printed as a check.
+
+Usage (from the backend directory):
+    python benchmarks/bench_pixmap_handoff.py --pages 10 --repeat 3
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import configure_backend_env
+
+DOCUMENTS = ["text notes (grayscale)", "notes + diagram (colour)", "scanned handout", "photo-heavy packet"]
+MODES = ["copy", "in-place"]
+
+
+def make_document(name: str, pages: int) -> bytes:
+    from synthetic import make_large_pdf, make_pdf, make_scanned_pdf
+    return {
+        "text notes (grayscale)": lambda: make_pdf(pages, diagram=False),
+        "notes + diagram (colour)": lambda: make_pdf(pages),
+        "scanned handout": lambda: make_scanned_pdf(pages),
+        "photo-heavy packet": lambda: make_large_pdf(2 * pages, pages),
+    }[name]()
+
+
+def read_status() -> dict:
+    """VmRSS and VmHWM of this process, in KiB."""
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                values[key] = int(rest.split()[0])
+    return values
+
+
+def reset_peak():
+    """Reset VmHWM to the current RSS (Linux: write 5 to clear_refs)."""
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def copy_handoff(encoder, page) -> str:
+    """The handoff before pixmaps were read in place, kept here as the baseline."""
+    from PIL import Image
+    from app.services.image_encoder import QUALITY_STEP, DOWNSCALE_STEP, mime_type
+
+    def save(image, fmt, **options):
+        buffered = io.BytesIO()
+        if fmt == "PNG":
+            scratch = io.BytesIO()
+            encoder._png(image, scratch)
+            return scratch.getvalue()
+        image.save(buffered, format=fmt, **options)
+        return buffered.getvalue()
+
+    pix, flat = encoder.render_pdf_page(page)
+    image = Image.frombytes("L" if pix.n == 1 else "RGB", [pix.width, pix.height], pix.samples)
+    qualities = list(range(encoder.min_quality, encoder.max_quality, QUALITY_STEP))
+    while True:
+        data = save(image, "JPEG", quality=encoder.max_quality)
+        if flat:
+            png = save(image, "PNG")
+            if len(png) <= min(len(data), encoder.max_bytes):
+                data = png
+                break
+        if len(data) <= encoder.max_bytes:
+            break
+        best, low, high = None, 0, len(qualities) - 1
+        while low <= high:
+            mid = (low + high) // 2
+            candidate = save(image, "JPEG", quality=qualities[mid])
+            if len(candidate) <= encoder.max_bytes:
+                best, low = candidate, mid + 1
+            else:
+                data, high = candidate, mid - 1
+        if best is not None:
+            data = best
+            break
+        side = int(max(image.size) * DOWNSCALE_STEP)
+        if side < encoder.min_side:
+            break
+        image = image.copy()
+        image.thumbnail((side, side))
+    image_b64 = base64.b64encode(data).decode("utf-8")
+    return f"data:{mime_type(image_b64)};base64,{image_b64}"
+
+
+def in_place_handoff(encoder, page) -> str:
+    from app.services.file_processor import FileProcessor
+    from app.services.image_encoder import mime_type
+
+    image_b64 = FileProcessor._to_base64(encoder.encode_pdf_page(page))
+    return f"data:{mime_type(image_b64)};base64,{image_b64}"
+
+
+def child(document: str, mode: str, pages: int, repeat: int):
+    import tracemalloc
+    import fitz  # PyMuPDF
+    from app.services.image_encoder import image_encoder
+
+    handoff = copy_handoff if mode == "copy" else in_place_handoff
+    pdf = make_document(document, pages)
+    with fitz.open(stream=pdf, filetype="pdf") as doc:
+        handoff(image_encoder, doc[0])  # warm up imports and allocator pools
+
+        reset_peak()
+        baseline = read_status()["VmRSS"]
+        cpu = time.process_time()
+        sizes = []
+        for _ in range(repeat):
+            for page in doc:
+                sizes.append(len(handoff(image_encoder, page)))
+        cpu = time.process_time() - cpu
+        peak_rss = read_status()["VmHWM"] - baseline
+
+        tracemalloc.start()
+        for page in doc:
+            handoff(image_encoder, page)
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(json.dumps({"cpu_ms": cpu * 1000 / (pages * repeat), "peak_rss_kib": peak_rss,
+                      "traced_peak_kib": traced_peak / 1024, "url_kib": sum(sizes) / len(sizes) / 1024}))
+
+
+def run(document: str, mode: str, pages: int, repeat: int) -> dict:
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", document, mode,
+                             "--pages", str(pages), "--repeat", str(repeat)],
+                            cwd=BACKEND_DIR, capture_output=True, text=True, env=os.environ.copy())
+    if result.returncode != 0:
+        raise SystemExit(f"{document} / {mode} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the pages for the CPU timing")
+    parser.add_argument("--child", nargs=2, metavar=("DOCUMENT", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    configure_backend_env("http://127.0.0.1:1")  # Settings only; no Groq calls are made
+    if args.child:
+        child(*args.child, args.pages, args.repeat)
+        return
+
+    print(f"{args.pages} pages x {args.repeat} passes per run, one fresh interpreter per run\n")
+    print(f"{'document':<26} {'handoff':<9} {'CPU ms/page':>11} {'peak RSS MiB':>13} "
+          f"{'py peak MiB':>12} {'data URL KiB':>13}")
+    for document in DOCUMENTS:
+        rows = {mode: run(document, mode, args.pages, args.repeat) for mode in MODES}
+        for mode, row in rows.items():
+            print(f"{document if mode == 'copy' else '':<26} {mode:<9} {row['cpu_ms']:11.1f} "
+                  f"{row['peak_rss_kib'] / 1024:13.1f} {row['traced_peak_kib'] / 1024:12.1f} {row['url_kib']:13.0f}")
+        copy, in_place = rows["copy"], rows["in-place"]
+        print(f"{'':<26} {'change':<9} {in_place['cpu_ms'] / copy['cpu_ms'] - 1:11.0%} "
+              f"{(in_place['peak_rss_kib'] - copy['peak_rss_kib']) / 1024:+13.1f} "
+              f"{(in_place['traced_peak_kib'] - copy['traced_peak_kib']) / 1024:+12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Time-to-first-byte benchmark for streamed vs. buffered responses.
+
+Calls ``/api/v1/chat`` and ``/api/v1/tools/solve-assignment`` against a local
+fake Groq server, once with ``stream: false`` and once with ``stream: true``,
+and reports time to first body byte and total time. The primary model is
+configured to fail with a 429 so the streamed run also exercises the
+fallback-before-first-token path.
+
+Usage (from the backend directory):
+    python benchmarks/bench_streaming.py --latency 0.3 --tokens 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import BackgroundServer, FakeGroqServer, configure_backend_env
+
+ENDPOINTS = {
+    "/api/v1/chat": {"messages": [{"role": "user", "content": "Explain recursion."}]},
+    "/api/v1/tools/solve-assignment": {"questions": "1. Define entropy.", "marks": "5"},
+}
+
+
+async def measure(client, path: str, payload: dict):
+    start = time.perf_counter()
+    first_byte = None
+    body = b""
+    async with client.stream("POST", path, json=payload, timeout=60) as response:
+        async for data in response.aiter_bytes():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            body += data
+    return response.status_code, first_byte, time.perf_counter() - start, body
+
+
+async def run(base_url: str):
+    import httpx
+
+    rows = []
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for path, payload in ENDPOINTS.items():
+            for stream in (False, True):
+                status, ttfb, total, body = await measure(client, path, {**payload, "stream": stream})
+                rows.append((path, stream, status, ttfb, total, body))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8766, help="fake Groq port (backend uses port + 1)")
+    args = parser.parse_args()
+
+    with FakeGroqServer(port=args.port, latency=args.latency, token_delay=args.token_delay,
+                        num_tokens=args.tokens, fail_models=("llama-3.3-70b-versatile",)) as fake:
+        configure_backend_env(fake.base_url)
+        os.environ.setdefault("GROQ_MAX_RETRIES", "0")  # one failed round trip, then fall back
+        # The backend runs under a real server: ASGITransport buffers whole bodies
+        from main import app
+        with BackgroundServer(app, port=args.port + 1) as backend:
+            rows = asyncio.run(run(backend.base_url))
+
+    print(f"{'endpoint':<34} {'mode':<9} {'status':>6} {'TTFB':>9} {'total':>9}")
+    for path, stream, status, ttfb, total, body in rows:
+        mode = "stream" if stream else "buffered"
+        print(f"{path:<34} {mode:<9} {status:>6} {ttfb * 1000:7.0f}ms {total * 1000:7.0f}ms")
+        if stream and b"event: done" not in body:
+            print(f"  stream did not finish cleanly: {body[-200:]!r}")
+
+
+if __name__ == "__main__":
+    main()
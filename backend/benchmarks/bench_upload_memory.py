@@ -0,0 +1,122 @@
+"""
+Peak server memory for a large upload: base64-in-JSON vs. multipart.
+
+Starts a fresh backend process per mode (with a fake Groq server), sends one
+~20 MB PDF to ``/api/v1/tools/solve-assignment`` either as ``files_data``
+base64 JSON or as a multipart part to ``/solve-assignment/upload``, and
+samples the server's /proc status while the request runs. ``RssAnon`` is
+heap memory owned by the process; memory-mapped upload pages show up under
+``RssFile`` instead and are reclaimable page cache. Linux only.
+
+Usage (from the backend directory):
+    python benchmarks/bench_upload_memory.py --size-mb 20
+"""
+import argparse
+import base64
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroqServer, configure_backend_env
+from synthetic import make_large_pdf
+
+
+def read_status(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                values[key] = int(rest.split()[0]) / 1024  # MiB
+    return values
+
+
+class Sampler(threading.Thread):
+    def __init__(self, pid: int):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak = {}
+        self.stop = threading.Event()
+
+    def run(self):
+        while not self.stop.is_set():
+            for key, value in read_status(self.pid).items():
+                self.peak[key] = max(self.peak.get(key, 0), value)
+            time.sleep(0.002)
+
+
+def wait_for(url: str, timeout: float = 30):
+    import httpx
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def measure(mode: str, pdf: bytes, port: int) -> dict:
+    import httpx
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=os.environ.copy(), stdout=subprocess.DEVNULL,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_for(f"{base_url}/health")
+        options = {"questions": "Answer the questions on the attached sheets.", "marks": "2"}
+        # Warm up imports and the worker pool with a tiny request first
+        httpx.post(f"{base_url}/api/v1/tools/solve-assignment", json=options, timeout=60)
+        baseline = read_status(server.pid)
+
+        if mode == "json":
+            body = json.dumps({**options, "files_data": [base64.b64encode(pdf).decode()],
+                               "file_types": ["application/pdf"]})
+            request = lambda: httpx.post(f"{base_url}/api/v1/tools/solve-assignment", content=body,
+                                         headers={"Content-Type": "application/json"}, timeout=120)
+        else:
+            request = lambda: httpx.post(f"{base_url}/api/v1/tools/solve-assignment/upload",
+                                         data={"payload": json.dumps(options)},
+                                         files={"files": ("sheets.pdf", pdf, "application/pdf")}, timeout=120)
+
+        sampler = Sampler(server.pid)
+        sampler.start()
+        start = time.perf_counter()
+        response = request()
+        elapsed = time.perf_counter() - start
+        sampler.stop.set()
+        sampler.join()
+        response.raise_for_status()
+        return {key: sampler.peak[key] - baseline[key] for key in baseline} | {"seconds": elapsed}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=float, default=20)
+    parser.add_argument("--port", type=int, default=8767, help="fake Groq port (backend uses port + 1)")
+    args = parser.parse_args()
+
+    pdf = make_large_pdf(args.size_mb)
+    print(f"Upload: {len(pdf) / 1024 / 1024:.1f} MiB PDF")
+    with FakeGroqServer(port=args.port, latency=0.05, num_tokens=10) as fake:
+        configure_backend_env(fake.base_url)
+        for mode in ("json", "multipart"):
+            result = measure(mode, pdf, args.port + 1)
+            print(f"  {mode:<10} peak +RssAnon {result['RssAnon']:7.1f} MiB   +RssFile {result['RssFile']:6.1f} MiB"
+                  f"   +VmRSS {result['VmRSS']:7.1f} MiB   {result['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
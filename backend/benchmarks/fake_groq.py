@@ -0,0 +1,185 @@
+"""
+Local stand-in for the Groq chat completions API.
+
+Serves ``POST /openai/v1/chat/completions`` with an OpenAI-compatible body
+after a configurable delay (or as an SSE token stream when the request asks
+for ``stream``), so the backend can be benchmarked without a network
+connection or an API key. Models listed in ``fail_models`` answer with a
+429 to exercise the fallback path; ``error_rate`` and ``rate_limit_rate``
+inject random 500s and 429s. Point the backend at it with
+``GROQ_BASE_URL=http://127.0.0.1:<port>``.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from starlette.requests import ClientDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def create_app(latency: float = 0.5, token_delay: float = 0.01, num_tokens: int = 50,
+               fail_models: tuple = (), fail_latency: float = 0.0,
+               slow_ratio: float = 0.0, slow_latency: float = 0.0, rpm_limit: int = 0,
+               reply=None, error_rate: float = 0.0, rate_limit_rate: float = 0.0) -> FastAPI:
+    """
+    latency: seconds before a full completion (or the first streamed token)
+    token_delay: seconds between streamed tokens
+    num_tokens: tokens per completion
+    fail_models: models that always answer 429 rate_limit_exceeded
+    fail_latency: seconds before that 429 is returned
+    slow_ratio: fraction of buffered completions that take `slow_latency` instead (a latency tail)
+    rpm_limit: requests per minute accepted per model before answering 429 (0 = unlimited)
+    reply: fixed completion content (e.g. a JSON array for the quiz tools), streamed in 4-character tokens;
+           a list is answered in turn, one entry per call; a callable gets the request body and returns the content
+    error_rate: fraction of calls answering 500 internal_server_error
+    rate_limit_rate: fraction of calls answering 429 rate_limit_exceeded (besides rpm_limit)
+    """
+    app = FastAPI(title="Fake Groq")
+    app.state.calls = 0
+    app.state.rejected = 0
+    app.state.injected = 0
+    recent_calls = {}  # model -> timestamps of accepted calls in the last minute
+
+    def chunk(model: str, content: str = None, finish_reason: str = None) -> str:
+        delta = {"content": content} if content is not None else {}
+        payload = {
+            "id": "chatcmpl-stream",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    def next_reply(body: dict):
+        if callable(reply):
+            return reply(body)
+        if isinstance(reply, list):
+            return reply[(app.state.calls - 1) % len(reply)]
+        return reply
+
+    async def token_stream(model: str, content: str):
+        yield chunk(model, "")
+        await asyncio.sleep(latency)
+        pieces = [content[i:i + 4] for i in range(0, len(content), 4)] if content is not None else [f"tok{i} " for i in range(num_tokens)]
+        for piece in pieces:
+            yield chunk(model, piece)
+            await asyncio.sleep(token_delay)
+        yield chunk(model, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        try:
+            body = await request.json()
+        except ClientDisconnect:  # the backend cancelled the call (e.g. a cancelled batch)
+            return JSONResponse(status_code=499, content={})
+        app.state.calls += 1
+        model = body.get("model")
+
+        if rpm_limit:
+            window = recent_calls.setdefault(model, [])
+            window[:] = [t for t in window if t > time.monotonic() - 60]
+            if len(window) >= rpm_limit:
+                app.state.rejected += 1
+                return JSONResponse(status_code=429, content={"error": {
+                    "message": f"Rate limit reached for model `{model}` on requests per minute (RPM)",
+                    "type": "requests", "code": "rate_limit_exceeded",
+                }})
+            window.append(time.monotonic())
+
+        if error_rate and random.random() < error_rate:
+            app.state.injected += 1
+            await asyncio.sleep(fail_latency)
+            return JSONResponse(status_code=500, content={"error": {
+                "message": "Internal server error", "type": "internal_server_error",
+            }})
+        if model in fail_models or (rate_limit_rate and random.random() < rate_limit_rate):
+            app.state.injected += model not in fail_models
+            await asyncio.sleep(fail_latency)
+            return JSONResponse(status_code=429, content={"error": {
+                "message": f"Rate limit reached for model `{model}`",
+                "type": "tokens", "code": "rate_limit_exceeded",
+            }})
+        if body.get("stream"):
+            return StreamingResponse(token_stream(model, next_reply(body)), media_type="text/event-stream")
+
+        # A buffered completion costs as long as generating every token
+        base_latency = slow_latency if random.random() < slow_ratio else latency
+        await asyncio.sleep(base_latency + num_tokens * token_delay)
+        content = next_reply(body)
+        if content is None:
+            content = " ".join(f"tok{i}" for i in range(num_tokens))
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": num_tokens, "total_tokens": 10 + num_tokens},
+        }
+
+    return app
+
+
+def configure_backend_env(base_url: str):
+    """Point the backend Settings at the fake server (call before importing `app`)."""
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ.setdefault("GROQ_API_KEY", "fake-key")
+
+
+class BackgroundServer:
+    """Runs an ASGI app with uvicorn on a background thread for the duration of a `with` block."""
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 8765):
+        self.app = app
+        self.base_url = f"http://{host}:{port}"
+        self._server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+class FakeGroqServer(BackgroundServer):
+    """Background fake Groq API; keyword options are passed to `create_app`."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, **app_options):
+        super().__init__(create_app(**app_options), host=host, port=port)
+
+    @property
+    def calls(self) -> int:
+        return self.app.state.calls
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a fake Groq API server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per completion")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="seconds between streamed tokens")
+    parser.add_argument("--fail-model", action="append", default=[], help="model that always returns 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answering 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls answering 429")
+    args = parser.parse_args()
+    app = create_app(latency=args.latency, token_delay=args.token_delay, fail_models=tuple(args.fail_model),
+                     error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
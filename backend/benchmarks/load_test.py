@@ -0,0 +1,570 @@
+"""
+Load test for every endpoint in chat.py and tools.py against a fake Groq API.
+
+Each scenario starts a fresh backend (``uvicorn main:app`` in a subprocess)
+pointed at a local fake Groq server with configurable latency and injected
+500s / 429s, drives it with ``--requests`` calls at ``--concurrency``, and
+reports throughput, p50/p95/p99 latency, errors and the backend's peak RSS
+(including file-worker processes; Linux only). Documents are synthetic:
+text notes, a digital PDF, a scanned PDF, PNG and JPEG worksheets.
+
+By default the response/artifact caches, single-flight and the client-side
+quota limiter are switched off so every request does its full work; pass
+``--production-settings`` to keep the configured behaviour, or ``--env`` to
+override single settings. Asynchronous endpoints (batches, jobs) are timed
+until their work has finished, not until they are accepted.
+
+Usage (from the backend directory):
+    python benchmarks/load_test.py --list
+    python benchmarks/load_test.py                          # every scenario
+    python benchmarks/load_test.py -s chat -s generate-quiz-pdf -n 200 -c 20
+    python benchmarks/load_test.py --latency 0.5 --error-rate 0.05 --rate-limit-rate 0.05
+    python benchmarks/load_test.py --json before.json       # then, after a change:
+    python benchmarks/load_test.py --baseline before.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroqServer
+from synthetic import make_image, make_pdf, make_scanned_pdf, make_text
+
+API = "/api/v1"
+TOOLS = "/api/v1/tools"
+NUM_ITEMS = 5  # questions / cards requested, and returned by the fake server
+POLL_SECONDS = 0.05
+
+# Settings that would hide per-request work behind caches or a quota queue
+COLD_PATH_ENV = {
+    "RESPONSE_CACHE_ENABLED": "false",
+    "ARTIFACT_CACHE_MAX_ENTRIES": "0",
+    "SINGLE_FLIGHT_ENABLED": "false",
+    "RATE_LIMIT_ENABLED": "false",
+}
+
+
+# --- Fake Groq replies ---
+
+def fake_reply(body: dict) -> str:
+    """Valid JSON for the quiz and flashcard prompts, prose for everything else."""
+    prompt = json.dumps(body.get("messages", []))
+    if "correct_answer" in prompt:
+        return json.dumps([{"question": f"Where does the Calvin cycle run? ({n})",
+                            "options": ["Stroma", "Thylakoid", "Nucleus", "Cytoplasm"],
+                            "correct_answer": "Stroma", "explanation": "Carbon fixation happens in the stroma."}
+                           for n in range(NUM_ITEMS)])
+    if '\\"front\\"' in prompt:
+        return json.dumps([{"front": f"What does photosynthesis produce? ({n})", "back": "Glucose and oxygen."}
+                           for n in range(NUM_ITEMS)])
+    return ("Photosynthesis converts light energy into chemical energy. " * 12).strip()
+
+
+# --- Documents ---
+
+class Documents:
+    """Synthetic inputs, built once per run."""
+
+    def __init__(self, pdf_pages: int):
+        self.text = make_text(20)
+        self.long_text = make_text(400)  # well above the map-reduce threshold
+        self.pdf = make_pdf(pdf_pages)
+        self.scanned = make_scanned_pdf(2)
+        self.png = make_image(fmt="PNG")
+        self.jpeg = make_image(fmt="JPEG")
+        self.b64 = {name: base64.b64encode(getattr(self, name)).decode() for name in ("pdf", "scanned", "png")}
+
+
+# --- Scenarios ---
+
+SCENARIOS = {}
+
+
+def scenario(name: str, router: str, setup=None):
+    """Register ``fn(client, i, docs, state) -> ok`` as a load scenario; ``setup(client, docs, total)`` builds state."""
+    def register(fn):
+        SCENARIOS[name] = {"run": fn, "router": router, "setup": setup}
+        return fn
+    return register
+
+
+def multipart(name: str, data: bytes, file_type: str, field: str = "files") -> list:
+    return [(field, (name, data, file_type))]
+
+
+def ok(response) -> bool:
+    return response.status_code < 400
+
+
+async def read_stream(client, method: str, url: str, **kwargs) -> bool:
+    async with client.stream(method, url, **kwargs) as response:
+        body = b"".join([chunk async for chunk in response.aiter_bytes()])
+    return response.status_code < 400 and b"event: error" not in body
+
+
+async def wait_for(client, url: str, finished: tuple, success: str) -> bool:
+    while True:
+        response = await client.get(url)
+        if response.status_code >= 400:
+            return False
+        status = response.json()["status"]
+        if status in finished:
+            return status == success
+        await asyncio.sleep(POLL_SECONDS)
+
+
+def chat_body(i: int, stream: bool = False) -> dict:
+    return {"messages": [{"role": "user", "content": f"Explain recursion with example {i}."}], "stream": stream}
+
+
+@scenario("chat", "chat")
+async def _chat(client, i, docs, state):
+    return ok(await client.post(f"{API}/chat", json=chat_body(i)))
+
+
+@scenario("chat-stream", "chat")
+async def _chat_stream(client, i, docs, state):
+    return await read_stream(client, "POST", f"{API}/chat", json=chat_body(i, stream=True))
+
+
+@scenario("upload-assignment", "chat")
+async def _upload_assignment(client, i, docs, state):
+    return ok(await client.post(f"{API}/upload-assignment",
+                                files=multipart("assignment.pdf", docs.pdf, "application/pdf", field="file")))
+
+
+def quiz_body(i: int, docs, **extra) -> dict:
+    return {"content": make_text(20, seed=i), "num_questions": NUM_ITEMS, **extra}
+
+
+@scenario("generate-quiz-text", "tools")
+async def _quiz_text(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/generate-quiz", json=quiz_body(i, docs)))
+
+
+@scenario("generate-quiz-pdf", "tools")
+async def _quiz_pdf(client, i, docs, state):
+    body = quiz_body(i, docs, files_data=[docs.b64["pdf"]], file_types=["application/pdf"])
+    return ok(await client.post(f"{TOOLS}/generate-quiz", json=body))
+
+
+@scenario("generate-quiz-scanned-pdf", "tools")
+async def _quiz_scanned(client, i, docs, state):
+    body = quiz_body(i, docs, files_data=[docs.b64["scanned"]], file_types=["application/pdf"])
+    return ok(await client.post(f"{TOOLS}/generate-quiz", json=body))
+
+
+@scenario("generate-quiz-stream", "tools")
+async def _quiz_stream(client, i, docs, state):
+    return await read_stream(client, "POST", f"{TOOLS}/generate-quiz", json=quiz_body(i, docs, stream=True))
+
+
+@scenario("generate-quiz-upload", "tools")
+async def _quiz_upload(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/generate-quiz/upload",
+                                data={"payload": json.dumps({"num_questions": NUM_ITEMS})},
+                                files=multipart("notes.pdf", docs.pdf, "application/pdf")))
+
+
+def cards_body(i: int, **extra) -> dict:
+    return {"content": make_text(20, seed=i), "num_cards": NUM_ITEMS, **extra}
+
+
+@scenario("generate-flashcards-text", "tools")
+async def _cards_text(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/generate-flashcards", json=cards_body(i)))
+
+
+@scenario("generate-flashcards-image", "tools")
+async def _cards_image(client, i, docs, state):
+    body = cards_body(i, files_data=[docs.b64["png"]], file_types=["image/png"])
+    return ok(await client.post(f"{TOOLS}/generate-flashcards", json=body))
+
+
+@scenario("generate-flashcards-stream", "tools")
+async def _cards_stream(client, i, docs, state):
+    return await read_stream(client, "POST", f"{TOOLS}/generate-flashcards", json=cards_body(i, stream=True))
+
+
+@scenario("generate-flashcards-upload", "tools")
+async def _cards_upload(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/generate-flashcards/upload",
+                                data={"payload": json.dumps({"num_cards": NUM_ITEMS})},
+                                files=multipart("worksheet.jpg", docs.jpeg, "image/jpeg")))
+
+
+@scenario("summarize-text", "tools")
+async def _summarize_text(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/summarize", json={"content": make_text(20, seed=i)}))
+
+
+@scenario("summarize-long-text", "tools")
+async def _summarize_long(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/summarize", json={"content": f"Part {i}.\n{docs.long_text}"}))
+
+
+@scenario("summarize-pdf", "tools")
+async def _summarize_pdf(client, i, docs, state):
+    body = {"files_data": [docs.b64["pdf"]], "file_types": ["application/pdf"]}
+    return ok(await client.post(f"{TOOLS}/summarize", json=body))
+
+
+@scenario("summarize-upload", "tools")
+async def _summarize_upload(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/summarize/upload", data={"payload": "{}"},
+                                files=multipart("notes.pdf", docs.pdf, "application/pdf")))
+
+
+def solver_body(i: int, **extra) -> dict:
+    return {"questions": f"{i}. Define photosynthesis.\n2. Where does the Calvin cycle take place?", **extra}
+
+
+@scenario("solve-assignment", "tools")
+async def _solve_assignment(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/solve-assignment", json=solver_body(i)))
+
+
+@scenario("solve-assignment-stream", "tools")
+async def _solve_assignment_stream(client, i, docs, state):
+    return await read_stream(client, "POST", f"{TOOLS}/solve-assignment", json=solver_body(i, stream=True))
+
+
+@scenario("solve-assignment-upload", "tools")
+async def _solve_assignment_upload(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/solve-assignment/upload",
+                                data={"payload": json.dumps(solver_body(i))},
+                                files=multipart("sheet.pdf", docs.pdf, "application/pdf")))
+
+
+@scenario("solve-lab-questions", "tools")
+async def _solve_lab(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/solve-lab-questions", json=solver_body(i)))
+
+
+@scenario("solve-lab-questions-upload", "tools")
+async def _solve_lab_upload(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/solve-lab-questions/upload",
+                                data={"payload": json.dumps(solver_body(i))},
+                                files=multipart("lab.txt", docs.text.encode(), "text/plain")))
+
+
+@scenario("study-helper", "tools")
+async def _study_helper(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/study-helper", json=solver_body(i)))
+
+
+@scenario("study-helper-upload", "tools")
+async def _study_helper_upload(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/study-helper/upload",
+                                data={"payload": json.dumps(solver_body(i))},
+                                files=multipart("worksheet.png", docs.png, "image/png")))
+
+
+@scenario("cache-stats", "tools")
+async def _cache_stats(client, i, docs, state):
+    return ok(await client.get(f"{TOOLS}/cache/stats"))
+
+
+@scenario("files-upload", "tools")
+async def _files_upload(client, i, docs, state):
+    return ok(await client.post(f"{TOOLS}/files", files=multipart("notes.pdf", docs.pdf, "application/pdf", "file")))
+
+
+async def _store_pdf(client, docs, total):
+    response = await client.post(f"{TOOLS}/files", files=multipart("notes.pdf", docs.pdf, "application/pdf", "file"))
+    return response.json()["file_id"]
+
+
+@scenario("files-meta", "tools", setup=_store_pdf)
+async def _files_meta(client, i, docs, file_id):
+    return ok(await client.get(f"{TOOLS}/files/{file_id}"))
+
+
+async def _store_texts(client, docs, total):
+    file_ids = []
+    for i in range(total):
+        response = await client.post(f"{TOOLS}/files", files=multipart(
+            f"notes-{i}.txt", make_text(2, seed=i).encode(), "text/plain", "file"))
+        file_ids.append(response.json()["file_id"])
+    return file_ids
+
+
+@scenario("files-delete", "tools", setup=_store_texts)
+async def _files_delete(client, i, docs, file_ids):
+    return ok(await client.delete(f"{TOOLS}/files/{file_ids[i]}"))
+
+
+@scenario("generate-quiz-file-id", "tools", setup=_store_pdf)
+async def _quiz_file_id(client, i, docs, file_id):
+    return ok(await client.post(f"{TOOLS}/generate-quiz", json={"file_ids": [file_id], "num_questions": NUM_ITEMS}))
+
+
+def batch_body(i: int) -> dict:
+    return {"contents": [make_text(10, seed=i), make_text(10, seed=i + 1)],
+            "tasks": [{"tool": "generate-quiz", "params": {"num_questions": NUM_ITEMS}},
+                      {"tool": "generate-flashcards", "params": {"num_cards": NUM_ITEMS}}]}
+
+
+@scenario("batch", "tools")
+async def _batch(client, i, docs, state):
+    response = await client.post(f"{TOOLS}/batch", json=batch_body(i))
+    if response.status_code >= 400:
+        return False
+    return await wait_for(client, f"{TOOLS}/batch/{response.json()['batch_id']}", ("done", "cancelled"), "done")
+
+
+@scenario("batch-events", "tools")
+async def _batch_events(client, i, docs, state):
+    response = await client.post(f"{TOOLS}/batch", json=batch_body(i))
+    if response.status_code >= 400:
+        return False
+    return await read_stream(client, "GET", f"{TOOLS}/batch/{response.json()['batch_id']}/events")
+
+
+@scenario("batch-cancel", "tools")
+async def _batch_cancel(client, i, docs, state):
+    response = await client.post(f"{TOOLS}/batch", json=batch_body(i))
+    if response.status_code >= 400:
+        return False
+    return ok(await client.delete(f"{TOOLS}/batch/{response.json()['batch_id']}"))
+
+
+def job_body(i: int) -> dict:
+    return {"tool": "summarize", "params": {"content": make_text(20, seed=i)}}
+
+
+@scenario("jobs", "tools")
+async def _jobs(client, i, docs, state):
+    response = await client.post(f"{TOOLS}/jobs", json=job_body(i))
+    if response.status_code >= 400:
+        return False
+    return await wait_for(client, f"{TOOLS}/jobs/{response.json()['job_id']}", ("done", "failed", "cancelled"), "done")
+
+
+@scenario("jobs-upload", "tools")
+async def _jobs_upload(client, i, docs, state):
+    response = await client.post(f"{TOOLS}/jobs/upload",
+                                 data={"payload": json.dumps({"tool": "generate-quiz", "params": {"num_questions": NUM_ITEMS}})},
+                                 files=multipart("notes.pdf", docs.pdf, "application/pdf"))
+    if response.status_code >= 400:
+        return False
+    return await wait_for(client, f"{TOOLS}/jobs/{response.json()['job_id']}", ("done", "failed", "cancelled"), "done")
+
+
+@scenario("jobs-events", "tools")
+async def _jobs_events(client, i, docs, state):
+    response = await client.post(f"{TOOLS}/jobs", json=job_body(i))
+    if response.status_code >= 400:
+        return False
+    return await read_stream(client, "GET", f"{TOOLS}/jobs/{response.json()['job_id']}/events")
+
+
+@scenario("jobs-cancel", "tools")
+async def _jobs_cancel(client, i, docs, state):
+    response = await client.post(f"{TOOLS}/jobs", json=job_body(i))
+    if response.status_code >= 400:
+        return False
+    return ok(await client.delete(f"{TOOLS}/jobs/{response.json()['job_id']}"))
+
+
+# --- Backend process ---
+
+def peak_rss_mb(pid: int):
+    """Peak resident set size of a process and its children in MB (Linux /proc), or None."""
+    def vm_hwm(p):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return 0.0
+        return 0.0
+
+    if not os.path.exists(f"/proc/{pid}/status"):
+        return None
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        children = []
+    return vm_hwm(pid) + sum(vm_hwm(child) for child in children)
+
+
+class Backend:
+    """The API under test, in its own process so its memory is measured on its own."""
+
+    def __init__(self, port: int, env: dict, log):
+        self.port = port
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        self.peak_rss = None
+
+    def wait_ready(self, timeout: float = 60.0):
+        import httpx
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise SystemExit(f"backend exited with code {self.process.returncode} (see --backend-log)")
+            try:
+                if httpx.get(f"{self.base_url}/health", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        raise SystemExit("backend did not become ready")
+
+    def stop(self):
+        self.peak_rss = peak_rss_mb(self.process.pid)
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+# --- Runner ---
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+async def drive(base_url: str, name: str, docs: Documents, requests: int, concurrency: int, warmup: int) -> dict:
+    import httpx
+
+    spec = SCENARIOS[name]
+    limits = httpx.Limits(max_connections=concurrency + 4, max_keepalive_connections=concurrency + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        state = await spec["setup"](client, docs, warmup + requests) if spec["setup"] else None
+        for i in range(warmup):
+            await spec["run"](client, i, docs, state)
+
+        latencies, failures = [], 0
+        next_index = iter(range(warmup, warmup + requests))
+
+        async def worker():
+            nonlocal failures
+            for i in next_index:
+                started = time.perf_counter()
+                try:
+                    succeeded = await spec["run"](client, i, docs, state)
+                except httpx.HTTPError:
+                    succeeded = False
+                latencies.append(time.perf_counter() - started)
+                failures += not succeeded
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": name,
+        "requests": requests,
+        "errors": failures,
+        "throughput": requests / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies, default=0.0),
+    }
+
+
+def run_scenario(name: str, args, docs: Documents, fake_url: str, log) -> dict:
+    env = {**os.environ, "GROQ_BASE_URL": fake_url, "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "fake-key")}
+    if not args.production_settings:
+        env.update(COLD_PATH_ENV)
+    env.update(dict(item.split("=", 1) for item in args.env))
+
+    backend = Backend(args.port + 1, env, log)
+    try:
+        backend.wait_ready()
+        result = asyncio.run(drive(backend.base_url, name, docs, args.requests, args.concurrency, args.warmup))
+    finally:
+        backend.stop()
+    result["peak_rss_mb"] = backend.peak_rss
+    return result
+
+
+def print_report(results: list, baseline: dict):
+    print(f"\n{'scenario':<28} {'req':>5} {'err':>4} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'peak RSS':>9}")
+    for r in results:
+        rss = f"{r['peak_rss_mb']:7.0f}MB" if r["peak_rss_mb"] else "      n/a"
+        print(f"{r['scenario']:<28} {r['requests']:>5} {r['errors']:>4} {r['throughput']:8.1f} "
+              f"{r['p50'] * 1000:6.0f}ms {r['p95'] * 1000:6.0f}ms {r['p99'] * 1000:6.0f}ms {rss}")
+        before = baseline.get(r["scenario"])
+        if before:
+            deltas = [f"{key} {(r[key] / before[key] - 1) * 100:+.0f}%"
+                      for key in ("throughput", "p50", "p95", "p99", "peak_rss_mb") if before.get(key) and r.get(key)]
+            print(f"{'  vs baseline':<28} {', '.join(deltas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-s", "--scenario", action="append", default=[], help="scenario to run (repeatable); default all")
+    parser.add_argument("--router", choices=["chat", "tools"], help="only the scenarios of one router")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    parser.add_argument("-n", "--requests", type=int, default=50)
+    parser.add_argument("-c", "--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured requests per scenario")
+    parser.add_argument("--pdf-pages", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake Groq seconds per completion")
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake Groq calls answering 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of fake Groq calls answering 429")
+    parser.add_argument("--production-settings", action="store_true", help="keep caches, single-flight and the quota limiter")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="backend setting override")
+    parser.add_argument("--port", type=int, default=8780, help="fake Groq port (backend uses port + 1)")
+    parser.add_argument("--backend-log", default=os.devnull, help="file for the backend's output")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare with results written earlier by --json")
+    args = parser.parse_args()
+
+    names = args.scenario or [n for n, spec in SCENARIOS.items() if args.router in (None, spec["router"])]
+    if args.list:
+        for name, spec in SCENARIOS.items():
+            print(f"{name:<28} {spec['router']}")
+        return
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"unknown scenario(s): {', '.join(unknown)} (see --list)")
+
+    print("Building synthetic documents...")
+    docs = Documents(args.pdf_pages)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+
+    results = []
+    with FakeGroqServer(port=args.port, latency=args.latency, token_delay=args.token_delay, num_tokens=50,
+                        reply=fake_reply, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate) as fake, \
+            open(args.backend_log, "a") as log:
+        for name in names:
+            print(f"  {name}...", flush=True)
+            results.append(run_scenario(name, args, docs, fake.base_url, log))
+        upstream = {"calls": fake.calls, "injected_errors": fake.app.state.injected}
+
+    print_report(results, baseline)
+    print(f"\nfake Groq: {upstream['calls']} calls, {upstream['injected_errors']} injected errors")
+    if args.json:
+        config = {key: getattr(args, key) for key in ("requests", "concurrency", "latency", "token_delay",
+                                                       "error_rate", "rate_limit_rate", "production_settings", "env")}
+        with open(args.json, "w") as f:
+            json.dump({"config": config, "results": results, "upstream": upstream}, f, indent=2)
+        print(f"results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Synthetic documents for the benchmarks (no fixtures checked into the repo)."""
+import fitz  # PyMuPDF
+
+LOREM = (
+    "Photosynthesis converts light energy into chemical energy stored in glucose. "
+    "The light-dependent reactions take place in the thylakoid membranes, while the "
+    "Calvin cycle fixes carbon dioxide in the stroma. "
+)
+
+
+def make_pdf(pages: int = 50, lines_per_page: int = 40, diagram: bool = True) -> bytes:
+    """A digital lecture-notes style PDF: a heading, body text and (unless disabled) a simple diagram per page."""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()  # A4-ish default (595 x 842 pt)
+        page.insert_text((56, 60), f"Lecture {page_num + 1}: Plant Biology", fontsize=18)
+        body = "\n".join(f"{line + 1}. {LOREM[(line * 7) % 60:][:90]}" for line in range(lines_per_page))
+        page.insert_textbox(fitz.Rect(56, 80, 540, 640), body, fontsize=9)
+        if diagram:
+            page.draw_rect(fitz.Rect(120, 660, 470, 800), color=(0.1, 0.3, 0.8), fill=(0.85, 0.9, 1.0))
+            page.draw_circle(fitz.Point(295, 730), 45, color=(0.8, 0.2, 0.1))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_slides(pages: int = 10) -> bytes:
+    """A 16:9 slide deck: a title and a few large bullet points per slide, lots of empty space."""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=960, height=540)
+        page.insert_text((60, 100), f"Plant Biology {page_num + 1}", fontsize=40)
+        for bullet in range(4):
+            page.insert_text((80, 190 + bullet * 60), f"- {LOREM[(bullet * 23) % 60:][:40]}", fontsize=24)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_large_pdf(size_mb: float = 20, pages: int = 4) -> bytes:
+    """A scanned-packet style PDF padded to roughly ``size_mb`` with incompressible page images."""
+    import io
+    import os
+    from PIL import Image
+
+    side = int(((size_mb * 1024 * 1024) / pages / 3) ** 0.5)
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_text((56, 60), f"Assignment sheet {page_num + 1}: answer all questions.", fontsize=14)
+        noise = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+        png = io.BytesIO()
+        noise.save(png, format="PNG", compress_level=1)
+        page.insert_image(fitz.Rect(56, 80, 540, 560), stream=png.getvalue())
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_text(paragraphs: int = 20, seed: int = 0) -> str:
+    """Plain lecture notes; ``seed`` varies the wording so each call produces a distinct document."""
+    sentences = [sentence.strip() + "." for sentence in LOREM.split(".") if sentence.strip()]
+    lines = []
+    for para in range(paragraphs):
+        picked = [sentences[(para + seed + k) % len(sentences)] for k in range(4)]
+        lines.append(f"Section {para + 1} (notes {seed}). " + " ".join(picked))
+    return "\n\n".join(lines)
+
+
+def make_image(width: int = 1600, height: int = 1200, lines: int = 25, fmt: str = "PNG", seed: int = 0) -> bytes:
+    """A photographed-worksheet style image: dark text on a light background (PNG or JPEG)."""
+    import io
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (width, height), (250, 248, 240))
+    draw = ImageDraw.Draw(image)
+    draw.text((40, 30), f"Worksheet {seed + 1}: Plant Biology", fill=(20, 20, 20))
+    for line in range(lines):
+        y = 80 + line * (height - 120) // lines
+        draw.text((40, y), f"{line + 1}. {LOREM[(line * 11 + seed) % 60:][:100]}", fill=(30, 30, 30))
+    draw.rectangle((width - 360, height - 300, width - 60, height - 60), outline=(40, 90, 200), width=4)
+    out = io.BytesIO()
+    image.save(out, format=fmt, **({"quality": 90} if fmt == "JPEG" else {}))
+    return out.getvalue()
+
+
+def make_scanned_pdf(pages: int = 3) -> bytes:
+    """A scanned handout: each page is only an image, so routing rasterises it for the vision model."""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_image(page.rect, stream=make_image(1240, 1754, lines=40, fmt="JPEG", seed=page_num))
+    data = doc.tobytes()
+    doc.close()
+    return data
@@ -1,10 +1,29 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import asyncio
+import time
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
 from app.api.routers import api_router
 from app.api.routers.tools import router as tools_router
+from app.services.groq_service import groq_service
+from app.services.worker_pool import worker_pool
+from app.services.rate_limiter import client_id
+from app.services.jobs import job_runner
+from app.services.metrics import metrics, RequestTimings, request_timings, http_request_seconds, http_in_flight
+from app.services.profiling import profiler, current_profile
 
-app = FastAPI(title=settings.PROJECT_NAME)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_runner.start()
+    yield
+    # Stop the job workers (re-queueing their jobs), then close the shared Groq connection pool and file workers
+    await job_runner.stop()
+    await groq_service.aclose()
+    worker_pool.shutdown()
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +33,93 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def identify_client(request: Request, call_next):
+    # Fair queuing for the Groq quota is per client: an explicit X-Client-Id, else the caller's address
+    token = client_id.set(request.headers.get("X-Client-Id") or (request.client.host if request.client else "anonymous"))
+    try:
+        return await call_next(request)
+    finally:
+        client_id.reset(token)
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    # Opt-in CPU profile of this request (X-Profile header or sampling), kept if requested or slow
+    session = profiler.begin(request.method, request.url.path, request.headers)
+    if session is None:
+        return await call_next(request)
+    timings = request_timings.get()
+    token = current_profile.set(session)
+    try:
+        response = await call_next(request)
+    except BaseException:
+        profiler.end(session)
+        raise
+    finally:
+        current_profile.reset(token)
+    if session.reason == "requested":
+        response.headers["X-Profile-Id"] = session.id
+    body = response.body_iterator
+
+    async def profiled_body():
+        # Streamed bodies (SSE) do their work while being sent, so stop only once they finish
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            elapsed = profiler.end(session)
+            if profiler.should_dump(session, elapsed):
+                try:
+                    await asyncio.to_thread(profiler.dump, session, elapsed, response.status_code,
+                                            timings.stages if timings else None)
+                except Exception as e:
+                    print(f"ERROR: Could not write profile {session.id}: {e}")
+
+    response.body_iterator = profiled_body()
+    return response
+
+def route_template(request: Request) -> str:
+    # Label metrics by route, not raw path: /tools/jobs/{job_id} rather than one series per job
+    if request.scope.get("endpoint") is None:
+        return "unmatched"
+    path = request.url.path
+    for name, value in request.path_params.items():
+        path = path.replace(str(value), "{" + name + "}")
+    return path
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    # Collect per-stage timings for the Server-Timing header and the HTTP latency histogram
+    timings = RequestTimings()
+    token = request_timings.set(timings)
+    http_in_flight.inc()
+    try:
+        response = await call_next(request)
+    except BaseException:
+        http_in_flight.dec()
+        http_request_seconds.observe(time.perf_counter() - timings.started,
+                                     method=request.method, route=route_template(request), status=500)
+        raise
+    finally:
+        request_timings.reset(token)
+    if settings.SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = timings.header()
+    body = response.body_iterator
+
+    async def timed_body():
+        # Streamed bodies (SSE) keep working after the headers, so the request ends with its last chunk
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            http_in_flight.dec()
+            http_request_seconds.observe(time.perf_counter() - timings.started,
+                                         method=request.method, route=route_template(request),
+                                         status=response.status_code)
+
+    response.body_iterator = timed_body()
+    return response
+
 app.include_router(api_router, prefix="/api/v1")
 app.include_router(tools_router, prefix="/api/v1/tools", tags=["tools"])
 
@@ -24,3 +130,10 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus metrics for this worker process."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,49 @@
+"""
+Standalone background job worker.
+
+Runs the queued tool calls from POST /tools/jobs without serving HTTP, on a
+long-running host. The API and its workers only share jobs through a shared
+queue backend:
+
+- JOB_QUEUE_BACKEND=sqlite is a file, so it is shared only by processes on
+  the same host (e.g. extra capacity next to a long-running API):
+
+      JOB_QUEUE_BACKEND=sqlite python worker.py
+
+- JOB_QUEUE_BACKEND=redis is shared across hosts. Use it when the API runs
+  where it can't do long work itself, like the Vercel entry point
+  (api/index.py): set JOB_WORKERS=0 there, so it only queues, and run this
+  worker on a server or container pointed at the same JOB_QUEUE_REDIS_URL:
+
+      JOB_QUEUE_BACKEND=redis JOB_QUEUE_REDIS_URL=redis://... python worker.py
+
+  The file store is local to each host, so with redis the documents of a
+  job (uploads and `file_ids`) are copied into the job itself.
+
+Serverless instances each get their own temp directory and are frozen
+between requests, so neither the memory backend nor in-process workers
+(JOB_WORKERS > 0) run jobs reliably there.
+"""
+import asyncio
+import app.api.routers.tools  # noqa: F401  registers the tool job handlers
+from app.services.groq_service import groq_service
+from app.services.jobs import job_runner
+from app.services.worker_pool import worker_pool
+
+
+async def main():
+    job_runner.start()
+    print(f"DEBUG: Job worker running {job_runner.workers} workers on the {job_runner.queue.__class__.__name__}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await job_runner.stop()
+        await groq_service.aclose()
+        worker_pool.shutdown()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass